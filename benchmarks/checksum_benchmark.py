@@ -0,0 +1,110 @@
+"""Benchmark des stratégies de lecture pour compute_blake2b.
+
+Compare la lecture naïve (``read()``), la lecture dans un buffer
+réutilisé (``readinto()``) et la projection mémoire (``mmap``) pour des
+tailles de fichiers allant de 4 KB à 8 GB.
+
+Usage :
+    python benchmarks/checksum_benchmark.py --max-size 1G
+    python benchmarks/checksum_benchmark.py --max-size 8G --drop-cache
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from hypermedia.drive.checksum import HashMode, compute_blake2b
+
+SIZES = [
+    4 * 1024,
+    64 * 1024,
+    1024 * 1024,
+    16 * 1024 * 1024,
+    256 * 1024 * 1024,
+    1024 * 1024 * 1024,
+    8 * 1024 * 1024 * 1024,
+]
+
+UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_size(value: str) -> int:
+    """Convertit une taille lisible (ex: '512M', '8G') en octets."""
+    value = value.strip().upper()
+    if value and value[-1] in UNITS:
+        return int(float(value[:-1]) * UNITS[value[-1]])
+    return int(value)
+
+
+def format_size(size: int) -> str:
+    """Formate une taille en octets de façon lisible."""
+    for unit in ("G", "M", "K"):
+        if size >= UNITS[unit]:
+            return f"{size // UNITS[unit]}{unit}B"
+    return f"{size}B"
+
+
+def create_file(directory: Path, size: int) -> Path:
+    """Crée un fichier de test de la taille demandée (données non nulles)."""
+    path = directory / f"bench_{size}.bin"
+    block = os.urandom(min(size, 4 * 1024 * 1024))
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining > 0:
+            written = f.write(block[:remaining])
+            remaining -= written
+    return path
+
+
+def run(sizes, repeat: int, drop_cache: bool, directory: Path) -> None:
+    """Exécute le benchmark et affiche un tableau de débits (MB/s)."""
+    modes = list(HashMode)
+    header = f"{'size':>8} | " + " | ".join(f"{m.value:>10}" for m in modes)
+    print(header)
+    print("-" * len(header))
+
+    for size in sizes:
+        path = create_file(directory, size)
+        try:
+            throughputs = []
+            for mode in modes:
+                best = float("inf")
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    compute_blake2b(path, mode=mode, drop_cache=drop_cache)
+                    best = min(best, time.perf_counter() - start)
+                throughputs.append(size / best / (1024 * 1024))
+            print(
+                f"{format_size(size):>8} | "
+                + " | ".join(f"{t:>10.1f}" for t in throughputs)
+            )
+        finally:
+            path.unlink()
+
+
+def main():
+    """Point d'entrée du benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--max-size", default="1G", help="Taille maximale testée (défaut: 1G)"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Répétitions par mesure")
+    parser.add_argument(
+        "--drop-cache", action="store_true", help="Active posix_fadvise(DONTNEED)"
+    )
+    parser.add_argument(
+        "--dir", type=Path, default=None, help="Répertoire des fichiers de test"
+    )
+    args = parser.parse_args()
+
+    max_size = parse_size(args.max_size)
+    sizes = [s for s in SIZES if s <= max_size]
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmpdir:
+        run(sizes, args.repeat, args.drop_cache, Path(tmpdir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Benchmark du stockage par blocs sur une collection riche en versions.
+
+Génère des versions successives de fichiers (insertions, remplacements
+et suppressions locales, comme les sauvegardes successives d'un projet
+de montage ou d'un document), les ajoute à une collection stockée par
+fichiers entiers puis à une collection stockée par blocs, et compare
+l'espace occupé et le débit d'ajout.
+
+Usage :
+    python benchmarks/chunk_store_benchmark.py --files 5 --versions 10 --size-mb 8
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from hypermedia.drive.collection import MediaCollection
+from hypermedia.drive.database import DatabaseManager
+from hypermedia.drive.storage import StorageMode
+
+
+def make_versions(
+    directory: Path, files: int, versions: int, size: int, seed: int
+) -> List[Path]:
+    """Écrit ``versions`` versions modifiées localement de ``files`` fichiers."""
+    rng = random.Random(seed)
+    paths = []
+    for f in range(files):
+        content = bytearray(rng.randbytes(size))
+        for v in range(versions):
+            for _ in range(3):
+                pos = rng.randrange(len(content))
+                edit = rng.choice(("insert", "replace", "delete"))
+                if edit == "insert":
+                    content[pos:pos] = rng.randbytes(rng.randrange(1, 4096))
+                elif edit == "replace":
+                    content[pos : pos + 512] = rng.randbytes(512)
+                else:
+                    del content[pos : pos + rng.randrange(1, 4096)]
+            path = directory / f"fichier{f}_v{v}.bin"
+            path.write_bytes(content)
+            paths.append(path)
+    return paths
+
+
+def directory_size(path: Path) -> int:
+    """Taille cumulée des fichiers d'un répertoire."""
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def add_all(
+    storage: Path, db: DatabaseManager, paths: List[Path], use_chunk_store: bool
+) -> float:
+    """Ajoute les fichiers à une nouvelle collection et retourne la durée."""
+    collection = MediaCollection(
+        storage,
+        db,
+        auto_extract_metadata=False,
+        use_checksum_cache=False,
+        storage_mode=StorageMode.COPY,
+        use_chunk_store=use_chunk_store,
+    )
+    coll_id = collection.create_collection("Versions")
+    start = time.perf_counter()
+    for path in paths:
+        collection.add_media_to_collection(coll_id, path)
+    elapsed = time.perf_counter() - start
+    if use_chunk_store:
+        report = collection.chunk_store.report()
+        print(
+            f"Chunk store: {report.chunk_count:,} chunks, "
+            f"{report.saved_bytes / 1e6:.1f} MB saved, ratio {report.dedup_ratio:.2f}"
+        )
+    return elapsed
+
+
+def run(files: int, versions: int, size: int, seed: int) -> None:
+    """Exécute le benchmark et affiche un tableau comparatif."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        sources = tmpdir / "sources"
+        sources.mkdir()
+        paths = make_versions(sources, files, versions, size, seed)
+        logical = directory_size(sources)
+        print(
+            f"{len(paths)} files ({files} x {versions} versions), "
+            f"{logical / 1e6:.1f} MB"
+        )
+
+        header = (
+            f"{'storage':>10} | {'MB stored':>9} | {'% logical':>9} | {'add MB/s':>8}"
+        )
+        print(header)
+        print("-" * len(header))
+        for name, use_chunk_store in (("files", False), ("chunks", True)):
+            db = DatabaseManager(tmpdir / f"{name}.db")
+            try:
+                elapsed = add_all(tmpdir / name, db, paths, use_chunk_store)
+            finally:
+                db.close()
+            stored = directory_size(tmpdir / name)
+            print(
+                f"{name:>10} | {stored / 1e6:>9.1f} | {stored / logical:>9.1%} | "
+                f"{logical / elapsed / 1e6:>8.1f}"
+            )
+
+
+def main():
+    """Point d'entrée du benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--files", type=int, default=5, help="Nombre de fichiers distincts"
+    )
+    parser.add_argument("--versions", type=int, default=10, help="Versions par fichier")
+    parser.add_argument(
+        "--size-mb", type=float, default=8, help="Taille initiale d'un fichier (MB)"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Graine du générateur")
+    args = parser.parse_args()
+    run(args.files, args.versions, int(args.size_mb * 1e6), args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""Benchmark mémoire et débit de DeduplicationIndex.
+
+Compare ``DeduplicationIndex`` (``dict`` et filtre de Bloom tenu à jour)
+à un ``dict`` nu de checksums hexadécimaux vers des UUID : mémoire
+allouée, temps de construction, débit des recherches positives et
+négatives, et débit du préfiltre ``might_contain``. Avec ``--db``,
+mesure aussi le chargement depuis une base existante.
+
+Usage :
+    python benchmarks/dedup_index_benchmark.py --items 1000000
+    python benchmarks/dedup_index_benchmark.py --db /data/hypermedia.db
+"""
+
+import argparse
+import gc
+import os
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from hypermedia.drive.database import DatabaseManager
+from hypermedia.drive.deduplication import DeduplicationIndex
+
+
+def make_entries(count: int) -> List[Tuple[str, str]]:
+    """Génère des couples (checksum hexadécimal de 64 octets, UUID)."""
+    return [(os.urandom(64).hex(), str(uuid.uuid4())) for _ in range(count)]
+
+
+def measure_build(build: Callable[[], object]) -> Tuple[object, float, int]:
+    """Construit une structure en mesurant durée et mémoire allouée.
+
+    La durée est mesurée sans tracemalloc (qui ralentit chaque
+    allocation), la mémoire sur une seconde construction tracée.
+    """
+    gc.collect()
+    start = time.perf_counter()
+    structure = build()
+    elapsed = time.perf_counter() - start
+    del structure
+
+    gc.collect()
+    tracemalloc.start()
+    structure = build()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return structure, elapsed, memory
+
+
+def measure_lookups(lookup: Callable[[str], object], checksums: List[str]) -> float:
+    """Débit de recherche en millions d'opérations par seconde."""
+    start = time.perf_counter()
+    for checksum in checksums:
+        lookup(checksum)
+    return len(checksums) / (time.perf_counter() - start) / 1e6
+
+
+def build_dict(entries: List[Tuple[str, str]]) -> Dict[str, str]:
+    """Représentation de référence : dict de chaînes."""
+    # Copie des chaînes pour ne pas compter les objets partagés avec entries
+    return {"".join(checksum): "".join(media_id) for checksum, media_id in entries}
+
+
+def build_index(entries: List[Tuple[str, str]]) -> DeduplicationIndex:
+    """Index dont le filtre de Bloom grandit au fil des insertions."""
+    index = DeduplicationIndex()
+    for checksum, media_id in entries:
+        index.register("".join(checksum), "".join(media_id))
+    return index
+
+
+def run(items: int, lookups: int) -> None:
+    """Exécute le benchmark et affiche un tableau comparatif."""
+    entries = make_entries(items)
+    hits = [checksum for checksum, _ in entries[:lookups]]
+    misses = [os.urandom(64).hex() for _ in range(lookups)]
+
+    print(f"{items:,} checksums, {lookups:,} lookups")
+    header = (
+        f"{'structure':>10} | {'MB':>8} | {'B/item':>7} | {'build s':>8} | "
+        f"{'hit Mops':>8} | {'miss Mops':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    table, elapsed, memory = measure_build(lambda: build_dict(entries))
+    print(
+        f"{'dict':>10} | {memory / 1e6:>8.1f} | {memory / items:>7.1f} | "
+        f"{elapsed:>8.2f} | {measure_lookups(table.get, hits):>8.2f} | "
+        f"{measure_lookups(table.get, misses):>9.2f}"
+    )
+    del table
+
+    index, elapsed, memory = measure_build(lambda: build_index(entries))
+    print(
+        f"{'index':>10} | {memory / 1e6:>8.1f} | {memory / items:>7.1f} | "
+        f"{elapsed:>8.2f} | {measure_lookups(index.check_duplicate, hits):>8.2f} | "
+        f"{measure_lookups(index.check_duplicate, misses):>9.2f}"
+    )
+    start = time.perf_counter()
+    index.might_contain(misses[0])  # construit le filtre de Bloom
+    bloom_build = time.perf_counter() - start
+    index.bloom_rejections = 0
+    prefilter = measure_lookups(index.might_contain, misses)
+    rejected = index.bloom_rejections / len(misses)
+    print(
+        f"might_contain: Bloom filter built in {bloom_build:.2f} s, "
+        f"{prefilter:.2f} Mops, "
+        f"Bloom filter rejected {rejected:.2%} of negative lookups"
+    )
+
+
+def run_database(db_path: Path) -> None:
+    """Mesure le chargement de l'index depuis une base existante."""
+    db = DatabaseManager(db_path, profile="readonly")
+    try:
+        index, elapsed, memory = measure_build(
+            lambda: DeduplicationIndex.from_database(db)
+        )
+    finally:
+        db.close()
+    print(
+        f"Loaded {len(index):,} checksums from {db_path} in {elapsed:.2f} s "
+        f"({memory / 1e6:.1f} MB)"
+    )
+
+
+def main():
+    """Point d'entrée du benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--items",
+        type=int,
+        default=1_000_000,
+        help="Nombre de checksums (défaut: 1000000)",
+    )
+    parser.add_argument(
+        "--lookups", type=int, default=200_000, help="Nombre de recherches mesurées"
+    )
+    parser.add_argument(
+        "--db", type=Path, default=None, help="Base existante à charger"
+    )
+    args = parser.parse_args()
+
+    if args.db is not None:
+        run_database(args.db)
+    else:
+        run(args.items, min(args.lookups, args.items))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Benchmark de l'import en masse (files/s).
+
+Génère une arborescence de petits fichiers distincts, puis mesure le
+débit de ``MediaCollection.import_paths`` (premier import, puis
+ré-import de fichiers déjà présents) face à une boucle
+d'``add_media_to_collection`` sur un échantillon. L'objectif visé est
+de plus de 1 000 fichiers/s sur SSD.
+
+Usage :
+    python benchmarks/import_benchmark.py --files 10000 --size-kb 16
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List
+
+from hypermedia.drive.collection import MediaCollection
+from hypermedia.drive.database import DatabaseManager
+from hypermedia.drive.storage import StorageMode
+
+
+def make_files(
+    directory: Path, files: int, size: int, per_dir: int, seed: int
+) -> List[Path]:
+    """Écrit ``files`` fichiers distincts, ``per_dir`` par sous-répertoire."""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(files):
+        folder = directory / f"dir{i // per_dir:04d}"
+        folder.mkdir(exist_ok=True)
+        path = folder / f"file{i:06d}.bin"
+        path.write_bytes(rng.randbytes(rng.randrange(size // 2, size * 3 // 2)))
+        paths.append(path)
+    return paths
+
+
+def new_collection(
+    storage: Path, db: DatabaseManager, extract_metadata: bool
+) -> MediaCollection:
+    """Collection stockée par copie, sans cache de checksums pré-rempli."""
+    return MediaCollection(
+        storage,
+        db,
+        auto_extract_metadata=extract_metadata,
+        storage_mode=StorageMode.COPY,
+    )
+
+
+def run(
+    files: int,
+    size: int,
+    per_dir: int,
+    baseline_files: int,
+    extract_metadata: bool,
+    seed: int,
+) -> None:
+    """Exécute le benchmark et affiche un tableau comparatif."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmpdir = Path(tmpdir)
+        source = tmpdir / "source"
+        source.mkdir()
+        paths = make_files(source, files, size, per_dir, seed)
+        print(f"{files:,} files of {size / 1e3:.0f} KB on average in {source}")
+
+        header = f"{'scenario':>22} | {'files':>7} | {'seconds':>7} | {'files/s':>8}"
+        print(header)
+        print("-" * len(header))
+
+        def report(name: str, count: int, elapsed: float) -> None:
+            print(
+                f"{name:>22} | {count:>7,} | {elapsed:>7.2f} | {count / elapsed:>8,.0f}"
+            )
+
+        if baseline_files:
+            db = DatabaseManager(tmpdir / "baseline.db")
+            try:
+                collection = new_collection(tmpdir / "baseline", db, extract_metadata)
+                coll_id = collection.create_collection("Baseline")
+                sample = paths[:baseline_files]
+                start = time.perf_counter()
+                for path in sample:
+                    collection.add_media_to_collection(coll_id, path)
+                report(
+                    "add_media_to_collection", len(sample), time.perf_counter() - start
+                )
+            finally:
+                db.close()
+
+        db = DatabaseManager(tmpdir / "import.db")
+        try:
+            collection = new_collection(tmpdir / "storage", db, extract_metadata)
+            coll_id = collection.create_collection("Import")
+            for name in ("import_paths (new)", "import_paths (present)"):
+                start = time.perf_counter()
+                statuses = Counter(
+                    r.status.value for r in collection.import_paths(coll_id, [source])
+                )
+                report(name, files, time.perf_counter() - start)
+                if statuses.get("failed"):
+                    print(f"  {statuses['failed']} files failed")
+        finally:
+            db.close()
+
+
+def main():
+    """Point d'entrée du benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--files", type=int, default=10000, help="Nombre de fichiers à importer"
+    )
+    parser.add_argument(
+        "--size-kb", type=float, default=16, help="Taille d'un fichier (KB)"
+    )
+    parser.add_argument(
+        "--per-dir", type=int, default=500, help="Fichiers par sous-répertoire"
+    )
+    parser.add_argument(
+        "--baseline-files",
+        type=int,
+        default=500,
+        help="Fichiers ajoutés un par un pour comparaison (0 pour ignorer)",
+    )
+    parser.add_argument(
+        "--extract-metadata",
+        action="store_true",
+        help="Active l'extraction automatique de métadonnées",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Graine du générateur")
+    args = parser.parse_args()
+    run(
+        args.files,
+        int(args.size_kb * 1e3),
+        args.per_dir,
+        args.baseline_files,
+        args.extract_metadata,
+        args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
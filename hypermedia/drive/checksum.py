@@ -6,35 +6,264 @@ l'intégrité et permettre la déduplication.
 """
 
 import hashlib
+import mmap
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from enum import Enum
+from functools import partial
 from pathlib import Path
-from typing import Union
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Union
 
 
 # Taille du buffer de lecture (8 MB)
 BUFFER_SIZE = 8 * 1024 * 1024
 
+# Taille des échantillons de début et de fin du checksum partiel (64 KB)
+PARTIAL_SAMPLE_SIZE = 64 * 1024
 
-def compute_blake2b(file_path: Union[str, Path]) -> str:
+
+class HashMode(Enum):
+    """Stratégie de lecture utilisée pour le calcul du checksum.
+
+    READ: Lecture par blocs avec ``read()`` (un objet bytes par bloc)
+    READINTO: Lecture dans un unique buffer réutilisé via ``readinto()``
+    MMAP: Projection mémoire du fichier, hachée sans copie
+    """
+
+    READ = "read"
+    READINTO = "readinto"
+    MMAP = "mmap"
+
+
+class ChecksumResult(NamedTuple):
+    """Résultat du calcul de checksum d'un fichier dans un lot.
+
+    Attributes:
+        path: Chemin du fichier
+        checksum: Checksum BLAKE2b en hexadécimal, None en cas d'erreur
+        error: Exception levée pendant le calcul, None en cas de succès
+    """
+
+    path: Path
+    checksum: Optional[str]
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """True si le checksum a été calculé sans erreur."""
+        return self.error is None
+
+
+def compute_blake2b(
+    file_path: Union[str, Path],
+    mode: HashMode = HashMode.READINTO,
+    drop_cache: bool = False,
+) -> str:
     """Calcule le checksum BLAKE2b d'un fichier.
-    
+
+    Le noyau est prévenu d'une lecture séquentielle
+    (``posix_fadvise``) lorsque la plateforme le permet. Avec
+    ``drop_cache=True``, les pages lues sont ensuite libérées du cache
+    pour ne pas en évincer les données utiles lors du hachage de gros
+    fichiers vidéo.
+
     Args:
         file_path: Chemin du fichier
-    
+        mode: Stratégie de lecture (défaut: READINTO, sans allocation par bloc)
+        drop_cache: Si True, libère les pages lues du cache disque
+
     Returns:
         Checksum BLAKE2b en hexadécimal (128 caractères)
-    
+
     Raises:
         FileNotFoundError: Si le fichier n'existe pas
         PermissionError: Si le fichier n'est pas accessible
-    
+
     Example:
         >>> checksum = compute_blake2b("/path/to/file.jpg")
         >>> print(checksum)
         'a1b2c3d4...'
+        >>> checksum = compute_blake2b(
+        ...     "/videos/master.mov", HashMode.MMAP, drop_cache=True
+        ... )
     """
-    # TODO: Implémenter calcul BLAKE2b avec lecture par buffer
-    # TODO: Gérer les exceptions
-    raise NotImplementedError("Méthode à implémenter")
+    hasher = hashlib.blake2b()
+    with open(file_path, "rb", buffering=0) as f:
+        fd = f.fileno()
+        size = os.fstat(fd).st_size
+        _fadvise(fd, "POSIX_FADV_SEQUENTIAL")
+
+        if mode is HashMode.MMAP and size > 0:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                hasher.update(mm)
+        elif mode is HashMode.READ:
+            while chunk := f.read(BUFFER_SIZE):
+                hasher.update(chunk)
+        else:
+            # Buffer unique réutilisé, dimensionné au fichier pour les petits médias
+            buffer = bytearray(max(1, min(BUFFER_SIZE, size)))
+            view = memoryview(buffer)
+            while n := f.readinto(buffer):
+                hasher.update(view[:n])
+
+        if drop_cache:
+            _fadvise(fd, "POSIX_FADV_DONTNEED")
+
+    return hasher.hexdigest()
+
+
+def copy_with_blake2b(src_path: Union[str, Path], dest_path: Union[str, Path]) -> str:
+    """Copie un fichier en calculant son checksum BLAKE2b en une seule lecture.
+
+    Chaque bloc lu dans un buffer réutilisé est à la fois haché et
+    écrit dans la destination, ce qui évite de relire la source.
+
+    Args:
+        src_path: Chemin du fichier source
+        dest_path: Chemin du fichier destination (écrasé s'il existe)
+
+    Returns:
+        Checksum BLAKE2b de la source en hexadécimal (128 caractères)
+
+    Raises:
+        FileNotFoundError: Si la source n'existe pas
+    """
+    hasher = hashlib.blake2b()
+    with open(src_path, "rb", buffering=0) as src, open(dest_path, "wb") as dest:
+        fd = src.fileno()
+        size = os.fstat(fd).st_size
+        _fadvise(fd, "POSIX_FADV_SEQUENTIAL")
+
+        buffer = bytearray(max(1, min(BUFFER_SIZE, size)))
+        view = memoryview(buffer)
+        while n := src.readinto(buffer):
+            hasher.update(view[:n])
+            dest.write(view[:n])
+    return hasher.hexdigest()
+
+
+def compute_partial_blake2b(
+    file_path: Union[str, Path], sample_size: int = PARTIAL_SAMPLE_SIZE
+) -> str:
+    """Calcule un checksum partiel sur le début et la fin d'un fichier.
+
+    Utilisé comme préfiltre de déduplication : deux fichiers de même
+    taille dont les checksums partiels diffèrent sont nécessairement
+    différents, sans avoir à lire l'intégralité de leur contenu. Les
+    fichiers de moins de ``2 * sample_size`` octets sont hachés en
+    entier.
+
+    Args:
+        file_path: Chemin du fichier
+        sample_size: Taille des échantillons de début et de fin
+
+    Returns:
+        Checksum BLAKE2b partiel en hexadécimal (64 caractères)
+
+    Raises:
+        FileNotFoundError: Si le fichier n'existe pas
+    """
+    hasher = hashlib.blake2b(digest_size=32)
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= 2 * sample_size:
+            hasher.update(f.read())
+        else:
+            hasher.update(f.read(sample_size))
+            f.seek(size - sample_size)
+            hasher.update(f.read(sample_size))
+    return hasher.hexdigest()
+
+
+def _fadvise(fd: int, advice_name: str) -> None:
+    """Transmet un conseil d'accès au noyau si la plateforme le supporte.
+
+    Args:
+        fd: Descripteur de fichier
+        advice_name: Nom de la constante ``os.POSIX_FADV_*``
+    """
+    advice = getattr(os, advice_name, None)
+    if advice is None or not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, advice)
+    except OSError:
+        pass
+
+
+def compute_blake2b_many(
+    paths: Iterable[Union[str, Path]],
+    workers: Optional[int] = None,
+    mode: HashMode = HashMode.READINTO,
+    drop_cache: bool = False,
+) -> Iterator[ChecksumResult]:
+    """Calcule les checksums BLAKE2b d'un lot de fichiers en parallèle.
+
+    Les fichiers sont hachés dans un pool de threads (hashlib relâche
+    le GIL sur les gros buffers) et les résultats sont produits au fil
+    de l'eau, dans l'ordre de complétion. Le nombre de calculs en vol
+    est borné, ce qui permet de consommer un itérable de chemins de
+    taille arbitraire sans tout charger en mémoire.
+
+    Une erreur sur un fichier n'interrompt pas le lot : elle est
+    rapportée dans le champ ``error`` du résultat correspondant.
+
+    Args:
+        paths: Chemins des fichiers à hacher
+        workers: Nombre de threads (défaut: nombre de CPU)
+        mode: Stratégie de lecture passée à compute_blake2b
+        drop_cache: Si True, libère les pages lues du cache disque
+
+    Yields:
+        ChecksumResult pour chaque fichier, dans l'ordre de complétion
+
+    Raises:
+        ValueError: Si workers est inférieur à 1
+
+    Example:
+        >>> paths = Path("/photos").rglob("*.jpg")
+        >>> for result in compute_blake2b_many(paths, workers=8):
+        ...     if result.ok:
+        ...         print(result.path, result.checksum[:16])
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError(f"workers must be >= 1, got {workers}")
+
+    hash_file = partial(compute_blake2b, mode=mode, drop_cache=drop_cache)
+    max_in_flight = workers * 2
+    path_iter = iter(paths)
+
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="blake2b"
+    ) as executor:
+        pending: Dict[Future, Path] = {}
+
+        def submit_next() -> bool:
+            for raw_path in path_iter:
+                path = Path(raw_path)
+                pending[executor.submit(hash_file, path)] = path
+                return True
+            return False
+
+        while len(pending) < max_in_flight and submit_next():
+            pass
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                error = future.exception()
+                if error is None:
+                    yield ChecksumResult(path, future.result())
+                elif isinstance(error, Exception):
+                    yield ChecksumResult(path, None, error)
+                else:
+                    raise error
+                submit_next()
 
 
 def verify_integrity(
@@ -42,17 +271,15 @@ def verify_integrity(
     expected_checksum: str
 ) -> bool:
     """Vérifie l'intégrité d'un fichier.
-    
+
     Args:
         file_path: Chemin du fichier
         expected_checksum: Checksum attendu
-    
+
     Returns:
         True si le checksum correspond, False sinon
-    
+
     Example:
         >>> is_valid = verify_integrity("/path/to/file.jpg", checksum)
     """
-    # TODO: Calculer checksum actuel
-    # TODO: Comparer avec expected_checksum
-    raise NotImplementedError("Méthode à implémenter")
+    return compute_blake2b(file_path) == expected_checksum.lower()
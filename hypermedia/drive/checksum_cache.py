@@ -0,0 +1,377 @@
+"""Cache persistant des checksums indexé par l'état des fichiers.
+
+Ce module évite de recalculer le checksum BLAKE2b d'un fichier source
+déjà haché lorsqu'il n'a pas changé depuis. La clé du cache est
+l'identité du fichier (périphérique, inode) ; l'entrée n'est valide
+que si la taille et les dates de modification (mtime, ctime en
+nanosecondes) sont identiques à celles observées lors du calcul.
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
+
+from sqlalchemy import CursorResult, delete, func, select, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .checksum import compute_blake2b
+from .database import DatabaseManager
+from .models import ChecksumCacheEntry
+
+logger = logging.getLogger(__name__)
+
+# Entrées par UPDATE de rafraîchissement (deux paramètres SQL chacune)
+TOUCH_BATCH_SIZE = 1000
+
+
+class ChecksumCache:
+    """Cache des checksums stocké dans une table SQLite annexe.
+
+    Les entrées sont invalidées dès que la taille, ``mtime_ns`` ou
+    ``ctime_ns`` du fichier change (toute écriture ou ``touch`` modifie
+    ctime). Au-delà de ``max_entries``, les entrées les moins récemment
+    utilisées sont évincées.
+
+    Les dates d'utilisation ne sont rafraîchies que si elles datent de
+    plus de ``touch_interval`` secondes, et les rafraîchissements sont
+    regroupés en un seul UPDATE par lot de ``TOUCH_BATCH_SIZE`` entrées
+    (ou avant une éviction, ou via ``flush()``).
+
+    Attributes:
+        db: Gestionnaire de base de données
+        max_entries: Nombre maximum d'entrées conservées
+        touch_interval: Âge minimal (secondes) d'une date d'utilisation
+            avant son rafraîchissement
+        hits: Nombre de checksums servis depuis le cache
+        misses: Nombre de checksums recalculés
+
+    Example:
+        >>> cache = ChecksumCache(db, max_entries=1_000_000)
+        >>> checksum = cache.get_checksum("/photos/beach.jpg")
+    """
+
+    def __init__(
+        self,
+        db: DatabaseManager,
+        max_entries: int = 1_000_000,
+        touch_interval: float = 60.0,
+    ):
+        """Initialise le cache.
+
+        Args:
+            db: Instance de DatabaseManager
+            max_entries: Nombre maximum d'entrées avant éviction LRU
+            touch_interval: Âge minimal (secondes) d'une date
+                d'utilisation avant son rafraîchissement
+
+        Raises:
+            ValueError: Si max_entries est inférieur à 1
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be >= 1, got {max_entries}")
+        self.db = db
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        # Éviction amortie : vérifiée toutes les N insertions
+        self._evict_every = max(1, max_entries // 100)
+        self._inserts_since_evict = 0
+        # Entrées (device, inode) dont la date d'utilisation reste à écrire
+        self._pending_touches: Set[Tuple[int, int]] = set()
+        self._touch_lock = threading.Lock()
+
+    def lookup(self, file_path: Union[str, Path], touch: bool = True) -> Optional[str]:
+        """Retourne le checksum en cache d'un fichier s'il est encore valide.
+
+        Args:
+            file_path: Chemin du fichier
+            touch: Si True, la date d'utilisation (LRU) de l'entrée est
+                rafraîchie si elle est plus ancienne que ``touch_interval``.
+                L'écriture est différée et regroupée avec les suivantes.
+                Sans mise à jour, la lecture n'écrit rien en base.
+
+        Returns:
+            Checksum en cache, ou None si absent ou périmé
+
+        Raises:
+            FileNotFoundError: Si le fichier n'existe pas
+        """
+        st = os.stat(file_path)
+        with self.db.get_read_session() as session:
+            entry = session.get(ChecksumCacheEntry, (st.st_dev, st.st_ino))
+            if entry is None or not self._matches(entry, st):
+                return None
+            checksum = entry.checksum
+            last_used_at = entry.last_used_at
+
+        if touch and datetime.utcnow() - last_used_at >= timedelta(
+            seconds=self.touch_interval
+        ):
+            with self._touch_lock:
+                self._pending_touches.add((st.st_dev, st.st_ino))
+                full = len(self._pending_touches) >= TOUCH_BATCH_SIZE
+            if full:
+                self.flush()
+        return checksum
+
+    def lookup_many(self, stats: Iterable[os.stat_result]) -> List[Optional[str]]:
+        """Retourne les checksums en cache d'un lot de fichiers déjà examinés.
+
+        Une requête par tranche de ``TOUCH_BATCH_SIZE`` fichiers ; les
+        dates d'utilisation ne sont pas rafraîchies.
+
+        Args:
+            stats: États des fichiers (``os.stat``)
+
+        Returns:
+            Checksums dans l'ordre de ``stats``, None si absent ou périmé
+        """
+        stats = list(stats)
+        keys = list({(st.st_dev, st.st_ino) for st in stats})
+        entries: Dict[Tuple[int, int], ChecksumCacheEntry] = {}
+        with self.db.get_read_session() as session:
+            for start in range(0, len(keys), TOUCH_BATCH_SIZE):
+                for row in session.scalars(
+                    select(ChecksumCacheEntry).where(
+                        tuple_(ChecksumCacheEntry.device, ChecksumCacheEntry.inode).in_(
+                            keys[start : start + TOUCH_BATCH_SIZE]
+                        )
+                    )
+                ):
+                    entries[(row.device, row.inode)] = row
+
+        checksums: List[Optional[str]] = []
+        for st in stats:
+            entry = entries.get((st.st_dev, st.st_ino))
+            if entry is not None and self._matches(entry, st):
+                checksums.append(entry.checksum)
+            else:
+                checksums.append(None)
+        return checksums
+
+    def flush(self) -> None:
+        """Écrit les dates d'utilisation en attente en un seul UPDATE.
+
+        La transaction est confiée au thread d'écriture sans attendre
+        sa validation.
+        """
+        with self._touch_lock:
+            keys = list(self._pending_touches)
+            self._pending_touches.clear()
+        if keys:
+            self.db.submit_write(lambda session: self._touch(session, keys))
+
+    @staticmethod
+    def _touch(session: Session, keys: List[Tuple[int, int]]) -> None:
+        """Transaction de rafraîchissement (exécutée par le thread d'écriture)."""
+        now = datetime.utcnow()
+        for start in range(0, len(keys), TOUCH_BATCH_SIZE):
+            session.execute(
+                update(ChecksumCacheEntry)
+                .where(
+                    tuple_(ChecksumCacheEntry.device, ChecksumCacheEntry.inode).in_(
+                        keys[start : start + TOUCH_BATCH_SIZE]
+                    )
+                )
+                .values(last_used_at=now)
+            )
+
+    def store(
+        self,
+        file_path: Union[str, Path],
+        checksum: str,
+        stat_before: Optional[os.stat_result] = None,
+    ) -> bool:
+        """Enregistre le checksum d'un fichier dans le cache.
+
+        Args:
+            file_path: Chemin du fichier
+            checksum: Checksum BLAKE2b du fichier
+            stat_before: État du fichier relevé avant le calcul. Si le
+                fichier a changé depuis, rien n'est enregistré.
+
+        Returns:
+            True si l'entrée a été enregistrée
+        """
+        st = os.stat(file_path)
+        if stat_before is not None and not self._same_state(stat_before, st):
+            return False
+
+        self.store_many([(st, checksum)])
+        return True
+
+    def store_many(self, entries: Iterable[Tuple[os.stat_result, str]]) -> int:
+        """Enregistre ou rafraîchit un lot d'entrées en une seule transaction.
+
+        Un seul ``INSERT ... ON CONFLICT DO UPDATE`` pour tout le lot,
+        sans relire les entrées existantes.
+
+        Args:
+            entries: Couples (état du fichier relevé lors du calcul, checksum)
+
+        Returns:
+            Nombre d'entrées enregistrées
+        """
+        now = datetime.utcnow()
+        rows = [
+            {
+                "device": st.st_dev,
+                "inode": st.st_ino,
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "ctime_ns": st.st_ctime_ns,
+                "checksum": checksum,
+                "last_used_at": now,
+            }
+            for st, checksum in entries
+        ]
+        if not rows:
+            return 0
+
+        stmt = sqlite_insert(ChecksumCacheEntry)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["device", "inode"],
+            set_={
+                name: stmt.excluded[name]
+                for name in ("size", "mtime_ns", "ctime_ns", "checksum", "last_used_at")
+            },
+        )
+        self.db.write(lambda session: session.execute(stmt, rows))
+        count = len(rows)
+
+        self._inserts_since_evict += count
+        if self._inserts_since_evict >= self._evict_every:
+            self.evict()
+        return count
+
+    def get_checksum(
+        self,
+        file_path: Union[str, Path],
+        compute: Optional[Callable[[Path], str]] = None,
+    ) -> str:
+        """Retourne le checksum d'un fichier, en le calculant si nécessaire.
+
+        Args:
+            file_path: Chemin du fichier
+            compute: Fonction de calcul utilisée en cas d'absence du cache
+                (défaut: compute_blake2b, résolue à l'appel)
+
+        Returns:
+            Checksum BLAKE2b en hexadécimal
+        """
+        file_path = Path(file_path)
+        checksum = self.lookup(file_path)
+        if checksum is not None:
+            self.hits += 1
+            return checksum
+
+        self.misses += 1
+        before = os.stat(file_path)
+        checksum = (compute or compute_blake2b)(file_path)
+        # Ne pas mettre en cache un fichier modifié pendant le calcul
+        self.store(file_path, checksum, stat_before=before)
+        return checksum
+
+    def invalidate(self, file_path: Union[str, Path]) -> bool:
+        """Supprime l'entrée correspondant à un fichier.
+
+        Args:
+            file_path: Chemin du fichier
+
+        Returns:
+            True si une entrée a été supprimée
+        """
+        st = os.stat(file_path)
+
+        def work(session: Session) -> bool:
+            result = session.execute(
+                delete(ChecksumCacheEntry).where(
+                    ChecksumCacheEntry.device == st.st_dev,
+                    ChecksumCacheEntry.inode == st.st_ino,
+                )
+            )
+            return cast("CursorResult[Any]", result).rowcount > 0
+
+        return self.db.write(work)
+
+    def evict(self) -> int:
+        """Évince les entrées les moins récemment utilisées au-delà de max_entries.
+
+        Returns:
+            Nombre d'entrées supprimées
+        """
+        self._inserts_since_evict = 0
+        # Les dates en attente déterminent les entrées à évincer
+        self.flush()
+        return self.db.write(self._evict)
+
+    def _evict(self, session: Session) -> int:
+        """Transaction d'éviction (exécutée par le thread d'écriture)."""
+        count = session.execute(
+            select(func.count()).select_from(ChecksumCacheEntry)
+        ).scalar_one()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+
+        stale = session.execute(
+            select(ChecksumCacheEntry.device, ChecksumCacheEntry.inode)
+            .order_by(ChecksumCacheEntry.last_used_at)
+            .limit(excess)
+        ).all()
+        for device, inode in stale:
+            session.execute(
+                delete(ChecksumCacheEntry).where(
+                    ChecksumCacheEntry.device == device,
+                    ChecksumCacheEntry.inode == inode,
+                )
+            )
+        logger.info(f"Evicted {len(stale)} checksum cache entries")
+        return len(stale)
+
+    def clear(self) -> None:
+        """Vide complètement le cache."""
+        self.db.write(lambda session: session.query(ChecksumCacheEntry).delete())
+
+    def __len__(self) -> int:
+        """Nombre d'entrées actuellement en cache."""
+        with self.db.get_read_session() as session:
+            return session.execute(
+                select(func.count()).select_from(ChecksumCacheEntry)
+            ).scalar_one()
+
+    @staticmethod
+    def _matches(entry: ChecksumCacheEntry, st: os.stat_result) -> bool:
+        """Vérifie qu'une entrée correspond à l'état actuel du fichier."""
+        return (
+            entry.size == st.st_size
+            and entry.mtime_ns == st.st_mtime_ns
+            and entry.ctime_ns == st.st_ctime_ns
+        )
+
+    @staticmethod
+    def _same_state(a: os.stat_result, b: os.stat_result) -> bool:
+        """Compare deux états d'un même fichier."""
+        return (a.st_dev, a.st_ino, a.st_size, a.st_mtime_ns, a.st_ctime_ns) == (
+            b.st_dev,
+            b.st_ino,
+            b.st_size,
+            b.st_mtime_ns,
+            b.st_ctime_ns,
+        )
@@ -0,0 +1,707 @@
+"""Stockage par blocs à découpage défini par le contenu.
+
+Ce module découpe les fichiers en blocs de taille variable dont les
+frontières sont choisies par une empreinte glissante (découpage
+FastCDC sur une empreinte de Rabin-Karp) : une insertion ou une modification locale
+ne déplace que les frontières voisines, et les autres blocs restent
+identiques d'une version d'un fichier à la suivante. Chaque bloc est
+stocké une seule fois sous son checksum BLAKE2b ; un média est décrit
+par son manifeste, la liste ordonnée de ses blocs, et relu en flux en
+les réassemblant.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_right
+from contextlib import contextmanager
+from itertools import accumulate
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    cast,
+)
+
+from sqlalchemy import CursorResult, delete, exists, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from .checksum import BUFFER_SIZE
+from .models import Chunk, MediaChunk
+
+try:
+    import fcntl
+
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+if TYPE_CHECKING:
+    from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+# Tailles de bloc par défaut (minimale, moyenne visée, maximale)
+MIN_CHUNK_SIZE = 16 * 1024
+AVG_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 256 * 1024
+
+# Taille des checksums de blocs (BLAKE2b-256)
+CHUNK_DIGEST_SIZE = 32
+
+# Nombre de bits ajoutés (avant la taille moyenne) ou retirés (après)
+# au masque de coupure : resserre la distribution des tailles autour
+# de la moyenne (« normalized chunking » de FastCDC)
+NORMALIZATION_LEVEL = 2
+
+# Nombre de checksums par requête lors du ramasse-miettes
+GC_LOOKUP_CHUNK_SIZE = 500
+
+# Fichier verrou (dans ``tmp``) partagé entre la réutilisation d'un bloc
+# et le ramasse-miettes de tous les processus
+GC_LOCK_FILENAME = ".gc.lock"
+
+# Table « gear » : permutation pseudo-aléatoire des octets, dérivée de
+# BLAKE2b pour être identique d'une installation à l'autre
+_GEAR = bytes(sorted(range(256), key=lambda v: hashlib.blake2b(bytes([v])).digest()))
+
+# Multiplicateur de l'empreinte glissante (constante de Fibonacci,
+# impaire et sans octet nul)
+_MULTIPLIER = 0x9E3779B97F4A7C15
+
+
+def _byte_masks(bits: int) -> Tuple[int, ...]:
+    """Masques, octet par octet, des ``bits`` bits de poids fort d'une empreinte.
+
+    Le premier masque porte sur l'octet de l'empreinte à la position
+    testée, les suivants sur les octets des positions précédentes.
+    """
+    full, rest = divmod(bits, 8)
+    return (0xFF,) * full + ((0xFF << (8 - rest)) & 0xFF,) * bool(rest)
+
+
+class ChunkRef(NamedTuple):
+    """Bloc d'un manifeste.
+
+    Attributes:
+        digest: Checksum BLAKE2b-256 du bloc en hexadécimal
+        size: Taille du bloc en bytes
+    """
+
+    digest: str
+    size: int
+
+
+class StoredFile(NamedTuple):
+    """Résultat de l'écriture d'un fichier dans le stockage par blocs.
+
+    Attributes:
+        checksum: Checksum BLAKE2b du fichier entier (comme compute_blake2b)
+        size: Taille du fichier en bytes
+        chunks: Manifeste du fichier
+        new_chunks: Nombre de blocs écrits (absents du stockage)
+        new_bytes: Nombre de bytes écrits
+    """
+
+    checksum: str
+    size: int
+    chunks: List[ChunkRef]
+    new_chunks: int
+    new_bytes: int
+
+
+class ChunkStoreReport(NamedTuple):
+    """Bilan de déduplication du stockage par blocs.
+
+    Attributes:
+        media_count: Nombre de médias stockés par blocs
+        logical_bytes: Taille cumulée de ces médias
+        stored_bytes: Taille cumulée des blocs référencés
+        chunk_count: Nombre de blocs référencés
+        garbage_bytes: Taille des blocs qui ne sont plus référencés
+            (libérés par ``collect_garbage``)
+    """
+
+    media_count: int
+    logical_bytes: int
+    stored_bytes: int
+    chunk_count: int
+    garbage_bytes: int
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Rapport taille logique / taille stockée (1.0 sans déduplication)."""
+        return self.logical_bytes / self.stored_bytes if self.stored_bytes else 1.0
+
+    @property
+    def saved_bytes(self) -> int:
+        """Bytes économisés par la déduplication."""
+        return self.logical_bytes - self.stored_bytes
+
+
+def manifest_rows(media_id: str, chunks: List[ChunkRef]) -> List[Dict[str, Any]]:
+    """Lignes ``media_chunks`` du manifeste d'un média.
+
+    Args:
+        media_id: ID du média
+        chunks: Blocs du média dans l'ordre
+
+    Returns:
+        Dictionnaires (media_id, seq, offset, size, chunk_digest)
+    """
+    offsets = accumulate((c.size for c in chunks), initial=0)
+    return [
+        {
+            "media_id": media_id,
+            "seq": seq,
+            "offset": offset,
+            "size": chunk.size,
+            "chunk_digest": chunk.digest,
+        }
+        for seq, (chunk, offset) in enumerate(zip(chunks, offsets))
+    ]
+
+
+def chunk_rows(chunks: List[ChunkRef]) -> List[Dict[str, Any]]:
+    """Lignes ``chunks`` distinctes d'un manifeste.
+
+    Args:
+        chunks: Blocs d'un ou plusieurs médias
+
+    Returns:
+        Dictionnaires (digest, size), un par bloc distinct
+    """
+    return [
+        {"digest": c.digest, "size": c.size}
+        for c in {c.digest: c for c in chunks}.values()
+    ]
+
+
+class ContentDefinedChunker:
+    """Découpage FastCDC d'un flux en blocs de taille variable.
+
+    L'empreinte glissante est celle de Rabin-Karp en base 256 sur les
+    octets passés par la table « gear » : chaque octet de
+    ``X * _MULTIPLIER``, où ``X`` est le flux traduit lu comme un entier
+    little-endian, dépend des huit octets qui le précèdent (et des
+    retenues, qui s'éteignent en quelques octets). Le produit est
+    calculé d'un bloc pour tout le tampon par l'arithmétique entière de
+    CPython, sans boucle Python par octet ; les positions candidates
+    (octet d'empreinte nul) sont trouvées par ``bytes.find``.
+
+    Une frontière est posée après la première position dont les bits de
+    poids fort de l'empreinte sélectionnés par le masque sont nuls. Les
+    ``min_size`` premiers octets d'un bloc ne sont pas examinés ; un
+    masque plus exigeant avant ``avg_size`` et plus permissif après
+    concentre les tailles autour de la moyenne.
+
+    Attributes:
+        min_size: Taille minimale d'un bloc (sauf le dernier)
+        avg_size: Taille moyenne visée (puissance de deux)
+        max_size: Taille maximale d'un bloc
+
+    Example:
+        >>> chunker = ContentDefinedChunker()
+        >>> with open("/videos/montage.mov", "rb") as f:
+        ...     sizes = [len(chunk) for chunk in chunker.iter_chunks(f)]
+    """
+
+    def __init__(
+        self,
+        min_size: int = MIN_CHUNK_SIZE,
+        avg_size: int = AVG_CHUNK_SIZE,
+        max_size: int = MAX_CHUNK_SIZE,
+    ):
+        """Initialise le découpeur.
+
+        Args:
+            min_size: Taille minimale d'un bloc
+            avg_size: Taille moyenne visée, puissance de deux
+            max_size: Taille maximale d'un bloc
+
+        Raises:
+            ValueError: Si les tailles ne vérifient pas
+                64 <= min_size <= avg_size <= max_size
+                ou si avg_size n'est pas une puissance de deux >= 1024
+        """
+        if not 64 <= min_size <= avg_size <= max_size:
+            raise ValueError(
+                f"Chunk sizes must satisfy 64 <= min <= avg <= max, "
+                f"got {min_size}, {avg_size}, {max_size}"
+            )
+        if avg_size < 1024 or avg_size & (avg_size - 1):
+            raise ValueError(f"avg_size must be a power of two >= 1024, got {avg_size}")
+        self.min_size = min_size
+        self.avg_size = avg_size
+        self.max_size = max_size
+        bits = avg_size.bit_length() - 1
+        self._masks_small = _byte_masks(bits + NORMALIZATION_LEVEL)
+        self._masks_large = _byte_masks(bits - NORMALIZATION_LEVEL)
+
+    def iter_chunks(
+        self, stream: BinaryIO, read_size: int = BUFFER_SIZE
+    ) -> Iterator[memoryview]:
+        """Découpe un flux en blocs.
+
+        Le flux est lu par tranches de ``read_size`` octets ; la mémoire
+        utilisée ne dépend pas de la taille du fichier.
+
+        Args:
+            stream: Flux binaire ouvert en lecture
+            read_size: Taille des lectures
+
+        Yields:
+            Blocs successifs (vues en lecture seule, valides tant que
+            l'appelant en garde une référence). Un flux vide ne produit
+            aucun bloc.
+        """
+        read_size = max(read_size, self.max_size)
+        buffer = b""
+        eof = False
+        while not eof:
+            data = stream.read(read_size)
+            if data:
+                buffer += data
+                if len(buffer) < self.max_size:
+                    continue
+            else:
+                eof = True
+
+            # Le tampon commence toujours à une frontière de bloc
+            hashes = self.rolling_hash(buffer)
+            view = memoryview(buffer)
+            pos = 0
+            while pos < len(buffer) and (eof or len(buffer) - pos >= self.max_size):
+                cut = self._cut_point(hashes, pos, len(buffer))
+                yield view[pos:cut]
+                pos = cut
+            buffer = buffer[pos:]
+
+    @staticmethod
+    def rolling_hash(data: bytes) -> bytes:
+        """Octets de l'empreinte glissante à chaque position de ``data``.
+
+        Args:
+            data: Données à découper
+
+        Returns:
+            Octets dont celui d'indice ``i`` est l'octet de poids fort de
+            l'empreinte après lecture de ``data[i]`` (les octets
+            d'indice inférieur sont les suivants par poids décroissant)
+        """
+        value = int.from_bytes(data.translate(_GEAR), "little") * _MULTIPLIER
+        return value.to_bytes(len(data) + 8, "little")
+
+    def _cut_point(self, hashes: bytes, start: int, end: int) -> int:
+        """Position (exclue) de la fin du bloc commençant en ``start``.
+
+        L'appelant fournit au moins ``max_size`` octets sauf en fin de flux.
+        """
+        length = end - start
+        if length <= self.min_size:
+            return end
+        limit = start + min(length, self.max_size)
+        normal = start + min(length, self.avg_size)
+
+        cut = self._find_cut(hashes, start + self.min_size, normal, self._masks_small)
+        if cut is None:
+            cut = self._find_cut(hashes, normal, limit, self._masks_large)
+        return limit if cut is None else cut
+
+    @staticmethod
+    def _find_cut(
+        hashes: bytes, begin: int, end: int, masks: Tuple[int, ...]
+    ) -> Optional[int]:
+        """Première frontière dans ``[begin, end)`` pour un masque donné."""
+        i = hashes.find(0, begin, end)
+        while i >= 0:
+            if all(not hashes[i - k] & mask for k, mask in enumerate(masks[1:], 1)):
+                return i + 1
+            i = hashes.find(0, i + 1, end)
+        return None
+
+
+class _ChunkReader(io.RawIOBase):
+    """Flux en lecture réassemblant les blocs d'un manifeste."""
+
+    def __init__(self, paths: List[Path], sizes: List[int]):
+        super().__init__()
+        self._paths = paths
+        self._offsets = list(accumulate(sizes, initial=0))
+        self._size = self._offsets[-1]
+        self._pos = 0
+        self._index = -1
+        self._file: Optional[io.BufferedReader] = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Any) -> int:
+        if self._pos >= self._size:
+            return 0
+        index = bisect_right(self._offsets, self._pos) - 1
+        if self._file is None or index != self._index:
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self._paths[index], "rb")
+            self._index = index
+        self._file.seek(self._pos - self._offsets[index])
+        view = memoryview(buffer)[: self._offsets[index + 1] - self._pos]
+        n = self._file.readinto(view)
+        if not n:
+            raise OSError(f"Chunk file truncated: {self._paths[index]}")
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError(f"Negative seek position: {pos}")
+        self._pos = pos
+        return pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        super().close()
+
+
+class ChunkStore:
+    """Stockage dédupliqué des médias par blocs définis par le contenu.
+
+    Les blocs sont écrits sous ``root/ab/cd/<checksum>`` (sharding sur
+    les premiers caractères, comme les médias) ; la table ``chunks``
+    recense les blocs connus et ``media_chunks`` le manifeste de chaque
+    média. Les manifestes sont écrits par l'appelant dans la même
+    transaction que le média (``store_manifest`` ou
+    ``BatchWriter.add_chunks``).
+
+    Les blocs ne sont jamais supprimés à la suppression d'un média :
+    ``collect_garbage`` libère ceux qui ne sont plus référencés. Un bloc
+    écrit ou réutilisé par ``put`` voit sa date de modification mise à
+    jour ; le ramasse-miettes épargne les blocs récents, ce qui protège
+    ceux d'un import dont le manifeste n'est pas encore en base. La
+    réutilisation d'un bloc et sa suppression s'excluent mutuellement,
+    y compris entre processus (``flock`` sur ``tmp/.gc.lock`` là où
+    ``fcntl`` est disponible).
+
+    Attributes:
+        root: Répertoire des blocs
+        db: Gestionnaire de base de données
+        chunker: Découpeur utilisé par ``put``
+
+    Example:
+        >>> store = ChunkStore(storage / "chunks", db)
+        >>> stored = store.put(Path("/videos/montage_v2.mov"))
+        >>> print(f"{stored.new_bytes} / {stored.size} bytes written")
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        db: "DatabaseManager",
+        chunker: Optional[ContentDefinedChunker] = None,
+    ):
+        """Initialise le stockage.
+
+        Args:
+            root: Répertoire des blocs (créé si absent)
+            db: Instance de DatabaseManager
+            chunker: Découpeur (défaut: tailles MIN/AVG/MAX_CHUNK_SIZE)
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.db = db
+        self.chunker = chunker or ContentDefinedChunker()
+        self._tmp_dir = self.root / "tmp"
+        self._tmp_dir.mkdir(exist_ok=True)
+        self._created_dirs: Set[Path] = set()
+        # Sérialise la réutilisation d'un bloc et sa suppression par le
+        # ramasse-miettes entre threads (voir _gc_lock entre processus)
+        self._lock = threading.Lock()
+        self._gc_lock_path = self._tmp_dir / GC_LOCK_FILENAME
+
+    def chunk_path(self, digest: str) -> Path:
+        """Chemin du fichier d'un bloc.
+
+        Args:
+            digest: Checksum du bloc
+
+        Returns:
+            Chemin du bloc dans le stockage
+        """
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def put(self, file_path: Union[str, Path]) -> StoredFile:
+        """Découpe un fichier et écrit ses blocs absents du stockage.
+
+        Le fichier est lu une seule fois : son checksum complet est
+        calculé sur les blocs au fil du découpage. Aucune ligne n'est
+        écrite en base.
+
+        Args:
+            file_path: Chemin du fichier
+
+        Returns:
+            StoredFile (checksum, taille, manifeste, blocs écrits)
+
+        Raises:
+            FileNotFoundError: Si le fichier n'existe pas
+        """
+        file_hasher = hashlib.blake2b()
+        chunks: List[ChunkRef] = []
+        new_chunks = new_bytes = 0
+
+        with open(file_path, "rb") as f:
+            for data in self.chunker.iter_chunks(f):
+                file_hasher.update(data)
+                digest = hashlib.blake2b(
+                    data, digest_size=CHUNK_DIGEST_SIZE
+                ).hexdigest()
+                if self._write_chunk(digest, data):
+                    new_chunks += 1
+                    new_bytes += len(data)
+                chunks.append(ChunkRef(digest, len(data)))
+
+        if not chunks:
+            # Fichier vide : un bloc vide, pour que le manifeste existe
+            digest = hashlib.blake2b(b"", digest_size=CHUNK_DIGEST_SIZE).hexdigest()
+            new_chunks += self._write_chunk(digest, b"")
+            chunks.append(ChunkRef(digest, 0))
+
+        size = sum(chunk.size for chunk in chunks)
+        logger.debug(
+            f"Chunked {file_path}: {len(chunks)} chunks, "
+            f"{new_bytes}/{size} bytes written"
+        )
+        return StoredFile(file_hasher.hexdigest(), size, chunks, new_chunks, new_bytes)
+
+    def _write_chunk(self, digest: str, data: Union[bytes, memoryview]) -> bool:
+        """Écrit un bloc s'il est absent, sinon rafraîchit sa date.
+
+        Returns:
+            True si le bloc a été écrit
+        """
+        path = self.chunk_path(digest)
+        with self._gc_lock():
+            try:
+                os.utime(path)
+                return False
+            except FileNotFoundError:
+                pass
+
+        if path.parent not in self._created_dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._created_dirs.add(path.parent)
+        fd, tmp_name = tempfile.mkstemp(dir=self._tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.lexists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        return True
+
+    @contextmanager
+    def _gc_lock(self) -> Iterator[None]:
+        """Exclut le ramasse-miettes de ce processus et des autres.
+
+        Le verrou du processus sérialise les threads ; ``flock`` sur le
+        fichier verrou sérialise les processus (le verrou est relâché à
+        la fermeture du fichier, y compris si le processus s'arrête).
+        """
+        with self._lock:
+            if not FCNTL_AVAILABLE:
+                yield
+                return
+            with open(self._gc_lock_path, "ab") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                yield
+
+    @staticmethod
+    def store_manifest(session: Session, media_id: str, chunks: List[ChunkRef]) -> None:
+        """Enregistre les blocs et le manifeste d'un média.
+
+        À appeler dans la transaction qui crée le média.
+
+        Args:
+            session: Session d'écriture
+            media_id: ID du média
+            chunks: Manifeste retourné par ``put``
+        """
+        session.execute(
+            sqlite_insert(Chunk).on_conflict_do_nothing(), chunk_rows(chunks)
+        )
+        session.execute(insert(MediaChunk), manifest_rows(media_id, chunks))
+
+    def manifest(self, media_id: str) -> List[ChunkRef]:
+        """Manifeste d'un média.
+
+        Args:
+            media_id: ID du média
+
+        Returns:
+            Blocs du média dans l'ordre (liste vide s'il n'est pas
+            stocké par blocs)
+        """
+        with self.db.get_read_session() as session:
+            rows = session.execute(
+                select(MediaChunk.chunk_digest, MediaChunk.size)
+                .where(MediaChunk.media_id == media_id)
+                .order_by(MediaChunk.seq)
+            ).all()
+        return [ChunkRef(digest, size) for digest, size in rows]
+
+    def open(self, media_id: str) -> Optional[BinaryIO]:
+        """Ouvre un média en lecture en réassemblant ses blocs.
+
+        Les blocs sont lus à la demande : la mémoire utilisée ne dépend
+        pas de la taille du média, et ``seek`` est supporté.
+
+        Args:
+            media_id: ID du média
+
+        Returns:
+            Flux binaire bufferisé, ou None si le média n'a pas de manifeste
+        """
+        chunks = self.manifest(media_id)
+        if not chunks:
+            return None
+        reader = _ChunkReader(
+            [self.chunk_path(c.digest) for c in chunks], [c.size for c in chunks]
+        )
+        return io.BufferedReader(reader, buffer_size=self.chunker.max_size)
+
+    def report(self) -> ChunkStoreReport:
+        """Calcule le bilan de déduplication du stockage.
+
+        Returns:
+            ChunkStoreReport (tailles logique et stockée, ratio)
+        """
+        referenced = exists().where(MediaChunk.chunk_digest == Chunk.digest)
+        with self.db.get_read_session() as session:
+            media_count, logical_bytes = session.execute(
+                select(
+                    func.count(func.distinct(MediaChunk.media_id)),
+                    func.coalesce(func.sum(MediaChunk.size), 0),
+                )
+            ).one()
+            chunk_count, stored_bytes = session.execute(
+                select(func.count(), func.coalesce(func.sum(Chunk.size), 0)).where(
+                    referenced
+                )
+            ).one()
+            garbage_bytes = session.execute(
+                select(func.coalesce(func.sum(Chunk.size), 0)).where(~referenced)
+            ).scalar_one()
+        return ChunkStoreReport(
+            media_count, logical_bytes, stored_bytes, chunk_count, garbage_bytes
+        )
+
+    def collect_garbage(self, grace_period: float = 3600.0) -> int:
+        """Supprime les blocs qui ne sont plus référencés.
+
+        Les lignes des blocs sans manifeste sont supprimées en une
+        transaction, puis les fichiers de blocs absents de la table
+        (y compris ceux d'un import interrompu) sont effacés s'ils n'ont
+        pas été écrits ni réutilisés depuis ``grace_period`` secondes.
+
+        Args:
+            grace_period: Âge minimal en secondes d'un bloc supprimé ;
+                doit dépasser la durée d'un import concurrent
+
+        Returns:
+            Nombre de fichiers de blocs supprimés
+        """
+
+        def drop_rows(session: Session) -> int:
+            result = session.execute(
+                delete(Chunk).where(
+                    ~exists().where(MediaChunk.chunk_digest == Chunk.digest)
+                )
+            )
+            return cast("CursorResult[Any]", result).rowcount
+
+        dropped_rows = self.db.write(drop_rows)
+
+        cutoff = time.time() - grace_period
+        removed = 0
+        batch: List[Path] = []
+        for path in self._iter_chunk_files():
+            batch.append(path)
+            if len(batch) >= GC_LOOKUP_CHUNK_SIZE:
+                removed += self._remove_unreferenced(batch, cutoff)
+                batch = []
+        removed += self._remove_unreferenced(batch, cutoff)
+
+        logger.info(
+            f"Chunk store GC: {dropped_rows} rows dropped, {removed} files removed"
+        )
+        return removed
+
+    def _iter_chunk_files(self) -> Iterator[Path]:
+        """Parcourt les fichiers de blocs du stockage."""
+        for first in sorted(self.root.iterdir()):
+            if first == self._tmp_dir or not first.is_dir():
+                continue
+            for second in sorted(first.iterdir()):
+                yield from sorted(second.iterdir())
+
+    def _remove_unreferenced(self, paths: List[Path], cutoff: float) -> int:
+        """Supprime les fichiers de blocs absents de la table et anciens."""
+        if not paths:
+            return 0
+        with self.db.get_read_session() as session:
+            known = set(
+                session.scalars(
+                    select(Chunk.digest).where(
+                        Chunk.digest.in_([p.name for p in paths])
+                    )
+                )
+            )
+
+        # Date relue et fichier supprimé sous le verrou : un put d'un autre
+        # thread ou processus ne peut pas réutiliser le bloc entre les deux
+        removed = 0
+        with self._gc_lock():
+            for path in paths:
+                if path.name in known:
+                    continue
+                try:
+                    if path.stat().st_mtime >= cutoff:
+                        continue
+                    path.unlink()
+                except FileNotFoundError:
+                    continue
+                removed += 1
+        return removed
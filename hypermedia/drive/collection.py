@@ -4,23 +4,133 @@ Ce module implémente la classe MediaCollection qui permet de créer
 et gérer des collections de médias avec déduplication automatique.
 """
 
+import base64
+import copy
+import json
 import logging
+import os
 import shutil
+import tempfile
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+    cast,
+)
 
-from sqlalchemy import and_, or_
-from sqlalchemy.orm import Session
+from sqlalchemy import CursorResult, false, func, insert, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Query, Session
+from sqlalchemy.sql.compiler import SQLCompiler
 
-from .checksum import compute_blake2b
+from .checksum import compute_blake2b, compute_partial_blake2b, copy_with_blake2b
+from .checksum_cache import ChecksumCache
+from .chunk_store import ChunkStore, StoredFile
 from .database import DatabaseManager
 from .deduplication import DeduplicationManager
+from .fulltext import (
+    BM25_WEIGHTS,
+    MEDIA_FTS,
+    build_match_query,
+    media_fts,
+    media_fts_trigram,
+    substring_condition,
+)
+from .importer import BulkImporter, ImportResult
 from .metadata_extractor import MetadataExtractor
-from .models import Collection, MediaItem, Metadata
+from .metadata_filters import MetadataFilterCompiler
+from .models import (
+    Collection,
+    MediaItem,
+    Metadata,
+    PerceptualHash,
+    collection_items,
+    typed_value_columns,
+)
+from .perceptual import (
+    PILLOW_AVAILABLE,
+    HashAlgorithm,
+    ImageHashes,
+    PerceptualIndex,
+    compute_image_hashes,
+)
+from .read_cache import ReadCache
+from .storage import FilePlacer, StorageMode
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Nombre d'identifiants par requête de get_media_info_many
+MEDIA_INFO_CHUNK_SIZE = 500
+
+# Distance de Hamming par défaut entre empreintes de quasi-doublons
+DEFAULT_SIMILARITY_DISTANCE = 8
+
+
+class SearchPage(NamedTuple):
+    """Page de résultats d'une recherche par curseur.
+
+    Attributes:
+        items: Médias de la page
+        next_cursor: Jeton opaque de la page suivante (None si dernière page)
+    """
+
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+
+
+class SearchRow(NamedTuple):
+    """Résultat léger d'une recherche en flux (sans objet ORM).
+
+    Attributes:
+        id: Identifiant du média
+        filename: Nom du fichier original
+        path: Chemin dans le stockage
+        size: Taille en bytes
+        mime_type: Type MIME
+        created_at: Date d'ajout
+    """
+
+    id: str
+    filename: Optional[str]
+    path: str
+    size: int
+    mime_type: Optional[str]
+    created_at: datetime
+
+
+def _encode_cursor(created_at: datetime, media_id: str) -> str:
+    """Encode la position (created_at, id) d'un média en jeton opaque."""
+    raw = json.dumps([created_at.isoformat(), media_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Décode un jeton produit par _encode_cursor.
+
+    Raises:
+        ValueError: Si le jeton est invalide
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, media_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(media_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid search cursor: {cursor!r}") from e
+
 
 class MediaCollection:
     """Collection de médias avec gestion locale et déduplication.
@@ -34,6 +144,11 @@ class MediaCollection:
         db: Gestionnaire de base de données
         dedup_manager: Gestionnaire de déduplication
         metadata_extractor: Extracteur de métadonnées
+        checksum_cache: Cache persistant des checksums (None si désactivé)
+        file_placer: Placement des fichiers (reflink, lien physique, copie)
+        read_cache: Cache mémoire des informations de médias et des
+            résumés de collections (None si désactivé)
+        chunk_store: Stockage par blocs des fichiers copiés (None si désactivé)
 
     Example:
         >>> storage = Path("/data/hypermedia")
@@ -47,7 +162,12 @@ class MediaCollection:
         self,
         storage_path: Path,
         db: DatabaseManager,
-        auto_extract_metadata: bool = True
+        auto_extract_metadata: bool = True,
+        use_checksum_cache: bool = True,
+        storage_mode: StorageMode = StorageMode.AUTO,
+        read_cache_size: int = 10_000,
+        read_cache_ttl: Optional[float] = 60.0,
+        use_chunk_store: bool = False,
     ):
         """Initialise le gestionnaire de collections.
 
@@ -55,6 +175,20 @@ class MediaCollection:
             storage_path: Chemin racine de stockage des médias
             db: Instance de DatabaseManager
             auto_extract_metadata: Active l'extraction automatique de métadonnées
+            use_checksum_cache: Réutilise les checksums des fichiers sources
+                inchangés (clé: périphérique, inode, taille, mtime, ctime)
+            storage_mode: Mode de placement des fichiers copiés dans le
+                stockage (AUTO: reflink si supporté, sinon copie noyau)
+            read_cache_size: Nombre d'entrées du cache mémoire de
+                get_media_info, get_collection et list_collections
+                (0 pour le désactiver)
+            read_cache_ttl: Durée de vie d'une entrée du cache en secondes
+                (borne l'obsolescence des écritures faites hors de cette
+                instance ; None: illimitée)
+            use_chunk_store: Stocke les fichiers copiés par blocs
+                dédupliqués (``storage_path/chunks``) au lieu de fichiers
+                entiers ; à privilégier pour les collections riches en
+                versions successives d'un même fichier
         """
         self.storage_path = Path(storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
@@ -62,9 +196,22 @@ class MediaCollection:
         self.db = db
         self.dedup_manager = DeduplicationManager(db)
         self.auto_extract_metadata = auto_extract_metadata
+        self.checksum_cache = ChecksumCache(db) if use_checksum_cache else None
+        self.file_placer = FilePlacer(storage_mode)
+        self.read_cache = (
+            ReadCache(read_cache_size, read_cache_ttl) if read_cache_size > 0 else None
+        )
+        self.chunk_store = (
+            ChunkStore(self.storage_path / "chunks", db) if use_chunk_store else None
+        )
         
         if auto_extract_metadata:
             self.metadata_extractor = MetadataExtractor()
+
+        # Index des empreintes perceptuelles, construits au premier
+        # find_similar puis tenus à jour par les écritures de l'instance
+        self._perceptual_indexes: Dict[HashAlgorithm, PerceptualIndex] = {}
+        self._perceptual_lock = threading.Lock()
         
         logger.info(f"MediaCollection initialized at {storage_path}")
 
@@ -91,7 +238,8 @@ class MediaCollection:
             ...     "Photos de famille 2020-2026"
             ... )
         """
-        with self.db.get_session() as session:
+
+        def create(session: Session) -> str:
             # Vérifier si le nom existe déjà
             existing = session.query(Collection).filter_by(name=name).first()
             if existing:
@@ -100,53 +248,170 @@ class MediaCollection:
             # Créer la collection
             collection = Collection(name=name, description=description)
             session.add(collection)
-            session.commit()
-            
-            logger.info(f"Collection created: {name} (ID: {collection.id})")
+            session.flush()
             return collection.id
 
+        collection_id = self.db.write(create)
+        self.invalidate_cache(collection_ids=[collection_id])
+        logger.info(f"Collection created: {name} (ID: {collection_id})")
+        return collection_id
+
     def get_collection(self, collection_id: str) -> Optional[Dict[str, Any]]:
         """Récupère les informations d'une collection.
 
+        Le résultat est servi par le cache mémoire s'il y figure.
+
         Args:
             collection_id: ID de la collection
 
         Returns:
             Dictionnaire avec les informations de la collection ou None
         """
-        with self.db.get_session() as session:
+        return self._cached(
+            ("collection", collection_id), lambda: self._load_collection(collection_id)
+        )
+
+    def _load_collection(self, collection_id: str) -> Optional[Dict[str, Any]]:
+        """Lit les informations d'une collection en base."""
+        with self.db.get_read_session() as session:
             collection = session.query(Collection).filter_by(id=collection_id).first()
             if not collection:
                 return None
-            
+
+            media_count, total_size = self._collection_stats(
+                session, collection_id
+            ).get(collection_id, (0, 0))
             return {
                 "id": collection.id,
                 "name": collection.name,
                 "description": collection.description,
                 "created_at": collection.created_at.isoformat(),
                 "updated_at": collection.updated_at.isoformat(),
-                "media_count": len(collection.media_items)
+                "media_count": media_count,
+                "total_size": total_size,
             }
 
     def list_collections(self) -> List[Dict[str, Any]]:
         """Liste toutes les collections.
 
+        Le résultat est servi par le cache mémoire s'il y figure.
+
         Returns:
             Liste des collections avec leurs informations
         """
-        with self.db.get_session() as session:
+        return self._cached(("collections",), self._load_collections)
+
+    def _load_collections(self) -> List[Dict[str, Any]]:
+        """Lit la liste des collections en base."""
+        with self.db.get_read_session() as session:
             collections = session.query(Collection).all()
+            stats = self._collection_stats(session)
             return [
                 {
                     "id": c.id,
                     "name": c.name,
                     "description": c.description,
                     "created_at": c.created_at.isoformat(),
-                    "media_count": len(c.media_items)
+                    "media_count": stats.get(c.id, (0, 0))[0],
+                    "total_size": stats.get(c.id, (0, 0))[1],
                 }
                 for c in collections
             ]
 
+    def _cached(self, key: Tuple[str, ...], load: Callable[[], T]) -> T:
+        """Lecture via le cache mémoire (chargement et mise en cache si absent).
+
+        Le cache conserve sa propre copie des valeurs : l'appelant peut
+        modifier le résultat sans altérer le cache.
+        """
+        if self.read_cache is None:
+            return load()
+
+        generation = self.read_cache.generation
+        cached: Optional[T] = self.read_cache.get(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        value = load()
+        self.read_cache.put(key, copy.deepcopy(value), generation)
+        return value
+
+    def invalidate_cache(
+        self, media_ids: Iterable[str] = (), collection_ids: Iterable[str] = ()
+    ) -> None:
+        """Invalide les entrées du cache mémoire touchées par une écriture.
+
+        Appelée par les écritures de cette classe et de l'import en
+        masse ; à appeler après toute écriture faite directement en base
+        pour ne pas attendre l'expiration des entrées. La liste des
+        collections est toujours invalidée.
+
+        Args:
+            media_ids: Médias dont les informations ont changé
+            collection_ids: Collections dont le résumé a changé
+        """
+        if self.read_cache is None:
+            return
+        keys: List[Tuple[str, ...]] = [("collections",)]
+        keys.extend(("media", media_id) for media_id in media_ids)
+        keys.extend(("collection", collection_id) for collection_id in collection_ids)
+        self.read_cache.invalidate(keys)
+
+    @staticmethod
+    def _link_media(session: Session, collection_id: str, media_id: str) -> bool:
+        """Ajoute un média à une collection s'il n'en fait pas déjà partie.
+
+        ``INSERT OR IGNORE`` sur la clé primaire (collection_id, media_id)
+        de ``collection_items`` : coût constant quelle que soit la taille
+        de la collection, sans charger ses médias.
+
+        Args:
+            session: Session à utiliser
+            collection_id: ID de la collection
+            media_id: ID du média
+
+        Returns:
+            True si le lien a été créé, False s'il existait déjà
+        """
+        result = session.execute(
+            sqlite_insert(collection_items)
+            .values(
+                collection_id=collection_id,
+                media_id=media_id,
+                added_at=datetime.utcnow(),
+            )
+            .on_conflict_do_nothing()
+        )
+        return cast("CursorResult[Any]", result).rowcount > 0
+
+    @staticmethod
+    def _collection_stats(
+        session: Session, collection_id: Optional[str] = None
+    ) -> Dict[str, Tuple[int, int]]:
+        """Compte les médias et leur taille totale par collection.
+
+        Une seule requête groupée sur ``collection_items`` (sans charger
+        les MediaItem), restreinte à une collection si demandé.
+
+        Args:
+            session: Session à utiliser
+            collection_id: Collection à compter (toutes si None)
+
+        Returns:
+            Dictionnaire {collection_id: (nombre de médias, taille totale)}
+        """
+        stmt = (
+            select(
+                collection_items.c.collection_id,
+                func.count(),
+                func.coalesce(func.sum(MediaItem.size), 0),
+            )
+            .join(MediaItem, MediaItem.id == collection_items.c.media_id)
+            .group_by(collection_items.c.collection_id)
+        )
+        if collection_id is not None:
+            stmt = stmt.where(collection_items.c.collection_id == collection_id)
+        return {cid: (count, size) for cid, count, size in session.execute(stmt)}
+
     def add_media_to_collection(
         self,
         collection_id: str,
@@ -184,94 +449,334 @@ class MediaCollection:
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        # Calculer le checksum
-        checksum = compute_blake2b(file_path)
+        with self.db.get_read_session() as session:
+            # Vérifier si la collection existe
+            if session.get(Collection, collection_id) is None:
+                raise ValueError(f"Collection not found: {collection_id}")
+
+            # Préfiltre (taille + checksum partiel) : le checksum complet
+            # n'est recherché dans l'index que si un candidat existe
+            probe = self.dedup_manager.probe_file(file_path, session=session)
+
+        staged_path = None
+        stored: Optional[StoredFile] = None
+        if copy_file and not probe.candidate and self.chunk_store is not None:
+            # Fichier a priori nouveau : découpage et hachage en une passe
+            stored = self._put_chunks(file_path)
+            checksum = stored.checksum
+        elif (
+            copy_file
+            and not probe.candidate
+            and (
+                self.file_placer.resolve_mode(file_path, self.storage_path)
+                is StorageMode.COPY
+            )
+        ):
+            # Fichier a priori nouveau à copier : copie et hachage en une passe
+            staged_path, checksum = self._stage_file(file_path)
+        else:
+            checksum = self._compute_checksum(file_path)
         logger.info(f"Computed checksum for {file_path.name}: {checksum[:16]}...")
 
-        with self.db.get_session() as session:
-            # Vérifier si la collection existe
-            collection = session.query(Collection).filter_by(id=collection_id).first()
-            if not collection:
+        # Les entrées/sorties (placement, extraction) ont lieu hors de la
+        # transaction d'écriture, qui ne contient que des opérations en base
+        existing_path = None
+        placed_path = None
+        metadata_dict: Dict[str, Any] = {}
+        image_hashes: Optional[ImageHashes] = None
+        try:
+            if probe.candidate or staged_path is not None or stored is not None:
+                with self.db.get_read_session() as session:
+                    existing = self.dedup_manager.find_duplicate(
+                        checksum, session=session
+                    )
+                    existing_path = existing.path if existing else None
+
+            if existing_path is None:
+                if copy_file and self.chunk_store is not None:
+                    if stored is None:
+                        stored = self._put_chunks(file_path)
+                    if stored.checksum != checksum:
+                        raise ValueError(f"File changed while being added: {file_path}")
+                    logger.info(
+                        f"File stored as {len(stored.chunks)} chunks "
+                        f"({stored.new_bytes} new bytes)"
+                    )
+                elif copy_file:
+                    placed_path = self._get_storage_path(checksum, file_path.suffix)
+                    placed_path.parent.mkdir(parents=True, exist_ok=True)
+                    if staged_path is not None:
+                        os.replace(staged_path, placed_path)
+                        staged_path = None
+                        logger.info(f"File copied to {placed_path}")
+                    else:
+                        mode = self.file_placer.place(file_path, placed_path)
+                        logger.info(f"File stored at {placed_path} ({mode.value})")
+                if self.auto_extract_metadata:
+                    metadata_dict = self._extract_metadata(file_path)
+                    image_hashes = self._compute_image_hashes(file_path)
+        finally:
+            # Copie temporaire non déplacée dans le stockage (doublon ou
+            # erreur) : supprimée dans tous les cas
+            if staged_path is not None:
+                staged_path.unlink(missing_ok=True)
+
+        # Chemin enregistré du média (None si le doublon lu plus tôt n'a
+        # pas été placé) ; stockage par blocs : chemin logique, le contenu
+        # est relu via open_media
+        media_path: Optional[str]
+        if stored is not None and existing_path is None:
+            media_path = str(
+                self._get_storage_path(checksum, file_path.suffix).relative_to(
+                    self.storage_path
+                )
+            )
+        elif not copy_file:
+            media_path = str(file_path)
+        elif placed_path is not None:
+            media_path = str(placed_path.relative_to(self.storage_path))
+        else:
+            media_path = None
+        partial_checksum = probe.partial_checksum or compute_partial_blake2b(file_path)
+
+        def add(session: Session) -> Optional[Tuple[str, Optional[str]]]:
+            collection = session.get(Collection, collection_id)
+            if collection is None:
                 raise ValueError(f"Collection not found: {collection_id}")
 
-            # Vérifier si un doublon existe
-            existing_media = self.dedup_manager.find_duplicate(checksum)
-            
-            if existing_media:
-                logger.info(f"Duplicate detected: {existing_media.id}")
-                media = existing_media
-                
+            # Nouvelle vérification : un autre écrivain a pu insérer ce
+            # contenu depuis la lecture
+            media = self.dedup_manager.find_duplicate(checksum, session=session)
+            if media:
+                logger.info(f"Duplicate detected: {media.id}")
                 # Ajouter à la collection si pas déjà présent
-                if media not in collection.media_items:
-                    collection.media_items.append(media)
-                    session.commit()
+                if self._link_media(session, collection_id, media.id):
                     logger.info(f"Existing media {media.id} added to collection {collection.name}")
+                duplicate_path = media.path
+            elif media_path is None:
+                # Le doublon lu plus tôt a été supprimé entre-temps
+                return None
             else:
-                # Nouveau média - copier le fichier
-                if copy_file:
-                    dest_path = self._get_storage_path(checksum, file_path.suffix)
-                    dest_path.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(file_path, dest_path)
-                    logger.info(f"File copied to {dest_path}")
-                else:
-                    dest_path = file_path
-
                 # Créer l'entrée MediaItem
                 media = MediaItem(
                     checksum=checksum,
-                    path=str(dest_path.relative_to(self.storage_path) if copy_file else dest_path),
+                    partial_checksum=partial_checksum,
+                    path=media_path,
                     mime_type=self._guess_mime_type(file_path),
-                    size=file_path.stat().st_size,
+                    size=probe.size,
                     original_filename=file_path.name
                 )
                 session.add(media)
-                
-                # Ajouter à la collection
-                collection.media_items.append(media)
-                session.commit()
+                session.flush()
+
+                # Ajouter à la collection sans charger ses médias
+                self._link_media(session, collection_id, media.id)
                 logger.info(f"New media {media.id} added to collection {collection.name}")
 
-                # Extraire métadonnées automatiques
-                if self.auto_extract_metadata:
-                    self._extract_and_save_metadata(session, media.id, file_path)
+                # Métadonnées automatiques
+                if metadata_dict:
+                    self._save_metadata(session, media.id, metadata_dict)
+                if image_hashes is not None:
+                    session.add(
+                        PerceptualHash(media_id=media.id, **image_hashes._asdict())
+                    )
+                if stored is not None:
+                    ChunkStore.store_manifest(session, media.id, stored.chunks)
+                duplicate_path = None
 
             # Ajouter métadonnées personnalisées
             if custom_metadata:
                 self._save_custom_metadata(session, media.id, custom_metadata)
+            return media.id, duplicate_path
+
+        # Une seule transaction pour le média, son lien et ses métadonnées
+        try:
+            written = self.db.write(add)
+        except BaseException:
+            if placed_path is not None:
+                placed_path.unlink(missing_ok=True)
+            raise
+        if written is None:
+            return self.add_media_to_collection(
+                collection_id, file_path, custom_metadata, copy_file
+            )
+
+        media_id, duplicate_path = written
+        self.invalidate_cache(media_ids=[media_id], collection_ids=[collection_id])
+        if duplicate_path is None and image_hashes is not None:
+            self._index_image_hashes({media_id: image_hashes})
+
+        if (
+            placed_path is not None
+            and duplicate_path is not None
+            and (self.storage_path / duplicate_path != placed_path)
+        ):
+            # Contenu inséré entre-temps sous une autre extension
+            placed_path.unlink(missing_ok=True)
+        return media_id
+
+    def import_paths(
+        self,
+        collection_id: str,
+        paths: Iterable[Union[str, Path]],
+        custom_metadata: Optional[Dict[str, Any]] = None,
+        copy_file: bool = True,
+        hash_workers: Optional[int] = None,
+        io_workers: int = 4,
+        metadata_workers: int = 4,
+        batch_size: int = 500,
+    ) -> Iterator[ImportResult]:
+        """Importe en masse des fichiers et répertoires dans une collection.
+
+        Pipeline par étapes (parcours → hachage → déduplication →
+        stockage → métadonnées → écriture par lots), chacune avec ses
+        propres threads et des files bornées. Les résultats sont
+        produits au fil des écritures en base.
+
+        Args:
+            collection_id: ID de la collection cible
+            paths: Fichiers et/ou répertoires (parcourus récursivement)
+            custom_metadata: Métadonnées personnalisées appliquées à chaque média
+            copy_file: Si True, place les fichiers dans le stockage
+            hash_workers: Threads de hachage (défaut: nombre de CPU)
+            io_workers: Threads de placement dans le stockage
+            metadata_workers: Threads d'extraction de métadonnées
+            batch_size: Nombre de médias écrits par transaction
 
-            return media.id
+        Yields:
+            ImportResult (chemin, media_id, statut, erreur) par fichier
+
+        Raises:
+            ValueError: Si la collection n'existe pas
+
+        Example:
+            >>> for result in collection.import_paths(coll_id, [Path("/photos/2026")]):
+            ...     if result.error:
+            ...         print(f"Échec: {result.path}: {result.error}")
+        """
+        importer = BulkImporter(
+            self,
+            hash_workers=hash_workers,
+            io_workers=io_workers,
+            metadata_workers=metadata_workers,
+            batch_size=batch_size,
+        )
+        return importer.run(collection_id, paths, custom_metadata, copy_file)
 
     def get_media_info(self, media_id: str) -> Optional[Dict[str, Any]]:
         """Récupère les informations d'un média.
 
+        Une seule requête : les métadonnées et les collections sont
+        agrégées par SQLite, sans chargement d'objets ORM. Le résultat est
+        servi par le cache mémoire s'il y figure.
+
         Args:
             media_id: Identifiant du média
 
         Returns:
             Dictionnaire contenant les informations et métadonnées ou None
         """
-        with self.db.get_session() as session:
-            media = session.query(MediaItem).filter_by(id=media_id).first()
-            if not media:
-                return None
+        return self.get_media_info_many([media_id]).get(media_id)
 
-            # Compiler les métadonnées
-            metadata_dict = {}
-            for meta in media.metadata:
-                metadata_dict[meta.key] = meta.value
+    def get_media_info_many(
+        self, media_ids: Iterable[str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """Récupère les informations de plusieurs médias.
 
-            return {
-                "id": media.id,
-                "checksum": media.checksum,
-                "path": media.path,
-                "mime_type": media.mime_type,
-                "size": media.size,
-                "original_filename": media.original_filename,
-                "created_at": media.created_at.isoformat(),
-                "updated_at": media.updated_at.isoformat(),
-                "collections": [c.name for c in media.collections],
-                "metadata": metadata_dict
-            }
+        Les médias présents dans le cache mémoire sont servis sans
+        requête ; les autres sont lus à raison d'une requête par tranche
+        de ``MEDIA_INFO_CHUNK_SIZE`` identifiants, quel que soit le nombre
+        de métadonnées et de collections.
+
+        Args:
+            media_ids: Identifiants des médias
+
+        Returns:
+            Dictionnaire {media_id: informations}, dans l'ordre des
+            identifiants demandés ; les médias inexistants sont absents
+
+        Example:
+            >>> infos = collection.get_media_info_many(page_ids)
+            >>> titles = [infos[i]["metadata"].get("audio.title") for i in page_ids]
+        """
+        media_ids = list(dict.fromkeys(media_ids))
+        if self.read_cache is None:
+            return self._load_media_info(media_ids)
+
+        generation = self.read_cache.generation
+        hits = self.read_cache.get_many(("media", media_id) for media_id in media_ids)
+        cached = {
+            media_id: hits[("media", media_id)]
+            for media_id in media_ids
+            if ("media", media_id) in hits
+        }
+        loaded = self._load_media_info(
+            [media_id for media_id in media_ids if media_id not in cached]
+        )
+        for media_id, info in loaded.items():
+            self.read_cache.put(("media", media_id), copy.deepcopy(info), generation)
+
+        return {
+            media_id: (
+                copy.deepcopy(cached[media_id])
+                if media_id in cached
+                else loaded[media_id]
+            )
+            for media_id in media_ids
+            if media_id in cached or media_id in loaded
+        }
+
+    def _load_media_info(self, media_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Lit en base les informations de médias (voir get_media_info_many)."""
+        if not media_ids:
+            return {}
+        metadata_json = (
+            select(func.json_group_object(Metadata.key, Metadata.value))
+            .where(Metadata.media_id == MediaItem.id)
+            .scalar_subquery()
+        )
+        collections_json = (
+            select(func.json_group_array(Collection.name))
+            .join(collection_items, collection_items.c.collection_id == Collection.id)
+            .where(collection_items.c.media_id == MediaItem.id)
+            .scalar_subquery()
+        )
+
+        found: Dict[str, Dict[str, Any]] = {}
+        with self.db.get_read_session() as session:
+            for start in range(0, len(media_ids), MEDIA_INFO_CHUNK_SIZE):
+                chunk = media_ids[start : start + MEDIA_INFO_CHUNK_SIZE]
+                rows = session.execute(
+                    select(
+                        MediaItem.id,
+                        MediaItem.checksum,
+                        MediaItem.path,
+                        MediaItem.mime_type,
+                        MediaItem.size,
+                        MediaItem.original_filename,
+                        MediaItem.created_at,
+                        MediaItem.updated_at,
+                        collections_json,
+                        metadata_json,
+                    ).where(MediaItem.id.in_(chunk))
+                )
+                for row in rows:
+                    found[row.id] = {
+                        "id": row.id,
+                        "checksum": row.checksum,
+                        "path": row.path,
+                        "mime_type": row.mime_type,
+                        "size": row.size,
+                        "original_filename": row.original_filename,
+                        "created_at": row.created_at.isoformat(),
+                        "updated_at": row.updated_at.isoformat(),
+                        "collections": json.loads(row[8]),
+                        "metadata": json.loads(row[9]),
+                    }
+
+        return {
+            media_id: found[media_id] for media_id in media_ids if media_id in found
+        }
 
     def search(
         self,
@@ -283,10 +788,22 @@ class MediaCollection:
     ) -> List[Dict[str, Any]]:
         """Recherche des médias par métadonnées.
 
+        Les résultats sont triés par date d'ajout puis identifiant. Pour
+        parcourir de grands volumes, préférez ``search_page`` : le coût
+        d'un offset croît avec sa valeur.
+
         Args:
             collection_id: Filtrer par collection (optionnel)
-            query: Recherche textuelle libre (optionnel)
-            metadata_filters: Filtres par métadonnées
+            query: Fragments recherchés, séparés par des espaces,
+                optionnel. Chaque fragment doit apparaître comme
+                sous-chaîne (sans tenir compte de la casse) du nom, du
+                chemin ou des métadonnées textuelles : « 1234 » trouve
+                ``IMG1234.jpg``. Servi par l'index trigram ; les fragments
+                de moins de 3 caractères imposent un parcours
+            metadata_filters: Filtres par métadonnées : valeur (égalité
+                exacte, et non plus sous-chaîne ; ``{"contains": v}`` pour
+                une sous-chaîne) ou opérateurs ``{"gte": 1920, "lt": 4000}``
+                (voir ``metadata_filters.metadata_condition``)
             limit: Nombre maximum de résultats
             offset: Offset pour pagination
 
@@ -296,53 +813,345 @@ class MediaCollection:
         Example:
             >>> results = collection.search(
             ...     collection_id="abc123",
-            ...     metadata_filters={"exif.Model": "Canon EOS"},
+            ...     metadata_filters={
+            ...         "exif.Model": {"contains": "Canon EOS"},
+            ...         "image.width": {"gte": 1920},
+            ...     },
             ...     limit=50
             ... )
         """
-        with self.db.get_session() as session:
-            query_obj = session.query(MediaItem)
+        with self.db.get_read_session() as session:
+            query_obj = self._search_query(
+                session, collection_id, query, metadata_filters
+            )
+            results = (
+                query_obj.order_by(MediaItem.created_at, MediaItem.id)
+                .limit(limit)
+                .offset(offset)
+                .all()
+            )
+            return [self._search_result(m) for m in results]
 
-            # Filtrer par collection
-            if collection_id:
-                query_obj = query_obj.join(MediaItem.collections).filter(
-                    Collection.id == collection_id
-                )
+    def search_page(
+        self,
+        collection_id: Optional[str] = None,
+        query: Optional[str] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> SearchPage:
+        """Recherche paginée par curseur (keyset) sur (created_at, id).
 
-            # Filtrer par métadonnées
-            if metadata_filters:
-                for key, value in metadata_filters.items():
-                    query_obj = query_obj.join(MediaItem.metadata).filter(
-                        and_(
-                            Metadata.key == key,
-                            Metadata.value.like(f"%{value}%")
-                        )
-                    )
+        Chaque page reprend directement après le dernier média de la
+        précédente grâce à l'index ``(created_at, id)`` : la page 5 000
+        coûte autant que la première, contrairement à un offset.
 
-            # Recherche textuelle (filename)
-            if query:
+        Args:
+            collection_id: Filtrer par collection (optionnel)
+            query: Fragments recherchés, comme sous-chaînes (voir ``search``)
+            metadata_filters: Filtres par métadonnées
+            limit: Nombre maximum de résultats par page
+            cursor: Jeton ``next_cursor`` de la page précédente
+                (None pour la première page)
+
+        Returns:
+            SearchPage (résultats, jeton de la page suivante ou None)
+
+        Raises:
+            ValueError: Si le curseur est invalide
+
+        Example:
+            >>> page = collection.search_page(collection_id=coll_id, limit=200)
+            >>> while page.next_cursor:
+            ...     page = collection.search_page(collection_id=coll_id, limit=200,
+            ...                                   cursor=page.next_cursor)
+        """
+        with self.db.get_read_session() as session:
+            query_obj = self._search_query(
+                session, collection_id, query, metadata_filters
+            )
+            if cursor is not None:
+                created_at, media_id = _decode_cursor(cursor)
                 query_obj = query_obj.filter(
-                    or_(
-                        MediaItem.original_filename.like(f"%{query}%"),
-                        MediaItem.path.like(f"%{query}%")
-                    )
+                    tuple_(MediaItem.created_at, MediaItem.id)
+                    > tuple_(created_at, media_id)
                 )
 
-            # Pagination
-            results = query_obj.limit(limit).offset(offset).all()
+            # Un élément de plus pour savoir s'il existe une page suivante
+            results = (
+                query_obj.order_by(MediaItem.created_at, MediaItem.id)
+                .limit(limit + 1)
+                .all()
+            )
+            has_more = len(results) > limit
+            results = results[:limit]
+            next_cursor = (
+                _encode_cursor(results[-1].created_at, results[-1].id)
+                if has_more
+                else None
+            )
+            return SearchPage([self._search_result(m) for m in results], next_cursor)
+
+    def search_text(
+        self,
+        text: str,
+        collection_id: Optional[str] = None,
+        limit: int = 50,
+        prefix: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Recherche plein texte classée par pertinence (bm25).
 
+        Interroge l'index FTS5 sur le nom de fichier, le chemin et les
+        métadonnées textuelles (titres, artistes, descriptions EXIF,
+        champs personnalisés). Tous les mots sont requis.
+
+        Args:
+            text: Texte recherché
+            collection_id: Filtrer par collection (optionnel)
+            limit: Nombre maximum de résultats
+            prefix: Si True, chaque mot est recherché comme préfixe
+
+        Returns:
+            Médias du plus au moins pertinent, avec leur score ``rank``
+            (bm25, plus petit = plus pertinent)
+
+        Example:
+            >>> results = collection.search_text("plage 2026")
+        """
+        match = build_match_query(text, prefix=prefix)
+        if match is None:
+            return []
+
+        rank = func.bm25(MEDIA_FTS, *BM25_WEIGHTS).label("rank")
+        stmt = (
+            select(MediaItem, rank)
+            .join(media_fts, media_fts.c.media_id == MediaItem.id)
+            .where(MEDIA_FTS.match(match))
+            .order_by(rank)
+            .limit(limit)
+        )
+        if collection_id:
+            stmt = stmt.join(
+                collection_items, collection_items.c.media_id == MediaItem.id
+            ).where(collection_items.c.collection_id == collection_id)
+
+        with self.db.get_read_session() as session:
             return [
-                {
-                    "id": m.id,
-                    "filename": m.original_filename,
-                    "path": m.path,
-                    "size": m.size,
-                    "mime_type": m.mime_type,
-                    "created_at": m.created_at.isoformat()
-                }
-                for m in results
+                {**self._search_result(media), "rank": score}
+                for media, score in session.execute(stmt)
             ]
 
+    def iter_search(
+        self,
+        collection_id: Optional[str] = None,
+        query: Optional[str] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+    ) -> Iterator[SearchRow]:
+        """Recherche en flux, sans matérialiser la liste des résultats.
+
+        Les lignes sont lues par paquets de ``batch_size`` (``yield_per``)
+        sous forme de tuples légers, sans objets ORM : la mémoire reste
+        constante quel que soit le nombre de résultats et le premier
+        résultat arrive dès la lecture du premier paquet. La session de
+        lecture reste ouverte tant que l'itérateur n'est pas épuisé ou
+        fermé.
+
+        Args:
+            collection_id: Filtrer par collection (optionnel)
+            query: Fragments recherchés, comme sous-chaînes (voir ``search``)
+            metadata_filters: Filtres par métadonnées
+            batch_size: Nombre de lignes lues à la fois
+
+        Yields:
+            SearchRow, triés par date d'ajout puis identifiant
+
+        Example:
+            >>> for row in collection.iter_search(collection_id=coll_id):
+            ...     writer.writerow(row)
+        """
+        with self.db.get_read_session() as session:
+            query_obj = self._search_query(
+                session,
+                collection_id,
+                query,
+                metadata_filters,
+                entities=(
+                    MediaItem.id,
+                    MediaItem.original_filename,
+                    MediaItem.path,
+                    MediaItem.size,
+                    MediaItem.mime_type,
+                    MediaItem.created_at,
+                ),
+            )
+            rows = query_obj.order_by(MediaItem.created_at, MediaItem.id).yield_per(
+                batch_size
+            )
+            for row in rows:
+                yield SearchRow._make(row)
+
+    def explain_search(
+        self,
+        collection_id: Optional[str] = None,
+        query: Optional[str] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        filter_strategy: str = "exists",
+    ) -> Dict[str, Any]:
+        """Décrit l'exécution d'une recherche sans la lancer.
+
+        Args:
+            collection_id: Filtrer par collection (optionnel)
+            query: Recherche textuelle libre (optionnel)
+            metadata_filters: Filtres par métadonnées
+            filter_strategy: Compilation des filtres ("exists" ou "intersect")
+
+        Returns:
+            Dictionnaire avec ``sql`` (requête générée), ``filters`` (ordre
+            des filtres et lignes estimées) et ``plan`` (lignes de
+            ``EXPLAIN QUERY PLAN`` de SQLite)
+
+        Example:
+            >>> info = collection.explain_search(
+            ...     metadata_filters={
+            ...         "exif.Make": "Canon", "image.width": {"gte": 1920}
+            ...     }
+            ... )
+            >>> print("\n".join(info["plan"]))
+        """
+        filters_plan: List[Tuple[str, int]] = []
+        with self.db.get_read_session() as session:
+            stmt = (
+                self._search_query(
+                    session,
+                    collection_id,
+                    query,
+                    metadata_filters,
+                    entities=(MediaItem.id,),
+                    filter_strategy=filter_strategy,
+                    plan=filters_plan,
+                )
+                .order_by(MediaItem.created_at, MediaItem.id)
+                .statement
+            )
+
+            # Paramètres positionnels convertis par le type de chaque bind
+            # (dates, empreintes), comme à l'exécution de la requête
+            dialect = self.db.engine.dialect
+            compiled = cast(
+                SQLCompiler,
+                stmt.compile(
+                    dialect=dialect, compile_kwargs={"render_postcompile": True}
+                ),
+            )
+            params = []
+            for key in compiled.positiontup or ():
+                processor = compiled.binds[key].type.bind_processor(dialect)
+                value = compiled.params[key]
+                params.append(processor(value) if processor else value)
+            rows = (
+                session.connection()
+                .exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", tuple(params))
+                .fetchall()
+            )
+
+        return {
+            "sql": str(compiled),
+            "filters": [
+                {"key": key, "estimated_rows": estimated}
+                for key, estimated in filters_plan
+            ],
+            "plan": [row[3] for row in rows],
+        }
+
+    @staticmethod
+    def _search_query(
+        session: Session,
+        collection_id: Optional[str],
+        query: Optional[str],
+        metadata_filters: Optional[Dict[str, Any]],
+        entities: Tuple[Any, ...] = (MediaItem,),
+        filter_strategy: str = "exists",
+        plan: Optional[List[Tuple[str, int]]] = None,
+    ) -> "Query[Any]":
+        """Construit la requête de recherche (filtres, sans tri ni pagination).
+
+        ``plan``, si fourni, reçoit l'ordre des filtres de métadonnées
+        retenu et le nombre de lignes estimé pour chacun.
+        """
+        query_obj: "Query[Any]" = session.query(*entities)
+
+        # Filtrer par collection
+        if collection_id:
+            query_obj = query_obj.join(
+                collection_items, collection_items.c.media_id == MediaItem.id
+            ).filter(collection_items.c.collection_id == collection_id)
+
+        # Filtrer par métadonnées : une seule condition, filtres ordonnés
+        # par sélectivité estimée (voir MetadataFilterCompiler)
+        if metadata_filters:
+            compiler = MetadataFilterCompiler(session, strategy=filter_strategy)
+            condition = compiler.compile(metadata_filters, MediaItem.id)
+            if condition is not None:
+                query_obj = query_obj.filter(condition)
+            if plan is not None:
+                plan.extend(compiler.plan)
+
+        # Recherche de sous-chaînes (index FTS5 trigram : nom, chemin,
+        # métadonnées textuelles)
+        if query:
+            condition = substring_condition(query)
+            if condition is None:
+                return query_obj.filter(false())
+            query_obj = query_obj.filter(
+                MediaItem.id.in_(select(media_fts_trigram.c.media_id).where(condition))
+            )
+        return query_obj
+
+    @staticmethod
+    def _search_result(media: MediaItem) -> Dict[str, Any]:
+        """Représentation d'un média dans les résultats de recherche."""
+        return {
+            "id": media.id,
+            "filename": media.original_filename,
+            "path": media.path,
+            "size": media.size,
+            "mime_type": media.mime_type,
+            "created_at": media.created_at.isoformat(),
+        }
+
+    def open_media(self, media_id: str) -> BinaryIO:
+        """Ouvre le contenu d'un média en lecture binaire.
+
+        Les médias stockés par blocs sont relus en flux en réassemblant
+        leurs blocs ; les autres sont ouverts depuis leur fichier.
+
+        Args:
+            media_id: Identifiant du média
+
+        Returns:
+            Flux binaire à fermer par l'appelant
+
+        Raises:
+            FileNotFoundError: Si le média ou son contenu n'existe pas
+
+        Example:
+            >>> with collection.open_media(media_id) as f:
+            ...     header = f.read(16)
+        """
+        if self.chunk_store is not None:
+            stream = self.chunk_store.open(media_id)
+            if stream is not None:
+                return stream
+
+        with self.db.get_read_session() as session:
+            path = session.scalar(
+                select(MediaItem.path).where(MediaItem.id == media_id)
+            )
+        if path is None:
+            raise FileNotFoundError(f"Media not found: {media_id}")
+        return open(self.storage_path / path, "rb")
+
     def delete_media(
         self,
         media_id: str,
@@ -350,6 +1159,10 @@ class MediaCollection:
     ) -> bool:
         """Supprime un média.
 
+        Les blocs d'un média stocké par blocs ne sont pas supprimés :
+        ``chunk_store.collect_garbage`` libère ceux qui ne sont plus
+        référencés.
+
         Args:
             media_id: Identifiant du média
             remove_file: Si True, supprime aussi le fichier physique
@@ -357,23 +1170,203 @@ class MediaCollection:
         Returns:
             True si supprimé, False si non trouvé
         """
-        with self.db.get_session() as session:
+
+        def delete(session: Session) -> Optional[Tuple[str, List[str]]]:
             media = session.query(MediaItem).filter_by(id=media_id).first()
             if not media:
-                return False
+                return None
+            collection_ids = [c.id for c in media.collections]
+            session.delete(media)
+            return media.path, collection_ids
 
-            # Supprimer le fichier physique si demandé
-            if remove_file:
-                file_path = self.storage_path / media.path
-                if file_path.exists():
-                    file_path.unlink()
-                    logger.info(f"File deleted: {file_path}")
+        # Supprimer de la base de données
+        deleted = self.db.write(delete)
+        if deleted is None:
+            return False
+        path, collection_ids = deleted
+        self.invalidate_cache(media_ids=[media_id], collection_ids=collection_ids)
+        with self._perceptual_lock:
+            for index in self._perceptual_indexes.values():
+                index.remove(media_id)
+        logger.info(f"Media deleted: {media_id}")
 
-            # Supprimer de la base de données
-            session.delete(media)
-            session.commit()
-            logger.info(f"Media deleted: {media_id}")
-            return True
+        # Supprimer le fichier physique si demandé
+        if remove_file:
+            file_path = self.storage_path / path
+            if file_path.exists():
+                file_path.unlink()
+                logger.info(f"File deleted: {file_path}")
+        return True
+
+    def find_similar(
+        self,
+        media_id: str,
+        max_distance: int = DEFAULT_SIMILARITY_DISTANCE,
+        algorithm: HashAlgorithm = HashAlgorithm.PHASH,
+    ) -> List[Dict[str, Any]]:
+        """Recherche les quasi-doublons d'une image.
+
+        Compare les empreintes perceptuelles (images réencodées,
+        redimensionnées, légèrement retouchées) via un index multiple
+        de sous-chaînes, sans parcourir toutes les images. L'index d'un
+        algorithme est chargé au premier appel puis tenu à jour par les
+        écritures de cette instance ; les empreintes écrites par un autre
+        processus sont prises en compte par ``cluster_near_duplicates`` ou
+        une nouvelle instance.
+
+        Args:
+            media_id: Identifiant de l'image de référence
+            max_distance: Distance de Hamming maximale (sur 64 bits)
+            algorithm: Empreinte comparée
+
+        Returns:
+            Liste de dictionnaires ``{"media_id", "distance"}`` triée par
+            distance, sans l'image elle-même (vide si elle n'a pas
+            d'empreinte)
+
+        Example:
+            >>> for similar in collection.find_similar(media_id, max_distance=6):
+            ...     print(similar["media_id"], similar["distance"])
+        """
+        index = self._perceptual_index(algorithm)
+        with self._perceptual_lock:
+            similar = index.find_similar(media_id, max_distance)
+        return [
+            {"media_id": other, "distance": distance} for other, distance in similar
+        ]
+
+    def cluster_near_duplicates(
+        self,
+        max_distance: int = DEFAULT_SIMILARITY_DISTANCE,
+        algorithm: HashAlgorithm = HashAlgorithm.PHASH,
+        min_size: int = 2,
+    ) -> List[List[str]]:
+        """Regroupe toutes les images en grappes de quasi-doublons.
+
+        Traitement de fond : l'index est reconstruit à partir de la base
+        (empreintes de tous les processus) et remplace celui de
+        ``find_similar``. Les grappes sont les composantes connexes du
+        graphe « distance au plus ``max_distance`` ».
+
+        Args:
+            max_distance: Distance de Hamming maximale (sur 64 bits)
+            algorithm: Empreinte comparée
+            min_size: Taille minimale des grappes retournées
+
+        Returns:
+            Grappes d'identifiants, de la plus grande à la plus petite
+        """
+        with self._perceptual_lock:
+            index = PerceptualIndex.from_database(self.db, algorithm)
+            self._perceptual_indexes[algorithm] = index
+            clusters = index.clusters(max_distance, min_size)
+        logger.info(
+            f"Found {len(clusters)} near-duplicate clusters "
+            f"({algorithm.value}, max_distance={max_distance})"
+        )
+        return clusters
+
+    def index_perceptual_hashes(self, batch_size: int = 500) -> int:
+        """Calcule les empreintes perceptuelles des images qui n'en ont pas.
+
+        Traitement de fond pour les images ajoutées sans extraction
+        automatique ou avant l'introduction des empreintes. Les fichiers
+        illisibles sont ignorés (et retentés au prochain appel).
+
+        Args:
+            batch_size: Nombre d'images écrites par transaction
+
+        Returns:
+            Nombre d'images dont les empreintes ont été enregistrées
+
+        Raises:
+            RuntimeError: Si Pillow n'est pas installé
+        """
+        if not PILLOW_AVAILABLE:
+            raise RuntimeError("Pillow is required to compute perceptual hashes")
+
+        indexed = 0
+        after = ""
+        while True:
+            with self.db.get_read_session() as session:
+                rows = session.execute(
+                    select(MediaItem.id, MediaItem.path)
+                    .outerjoin(PerceptualHash, PerceptualHash.media_id == MediaItem.id)
+                    .where(
+                        PerceptualHash.media_id.is_(None),
+                        MediaItem.mime_type.like("image/%"),
+                        MediaItem.id > after,
+                    )
+                    .order_by(MediaItem.id)
+                    .limit(batch_size)
+                ).all()
+            if not rows:
+                break
+            after = rows[-1].id
+
+            hashes: Dict[str, ImageHashes] = {}
+            for media_id, path in rows:
+                image_hashes = self._compute_image_hashes(
+                    self.storage_path / path, media_id
+                )
+                if image_hashes is not None:
+                    hashes[media_id] = image_hashes
+            if hashes:
+                hash_rows = [{"media_id": m, **h._asdict()} for m, h in hashes.items()]
+
+                def store(
+                    session: Session, hash_rows: List[Dict[str, Any]] = hash_rows
+                ) -> None:
+                    # Média supprimé ou haché par ailleurs entre-temps : ignoré
+                    session.execute(
+                        sqlite_insert(PerceptualHash).on_conflict_do_nothing(),
+                        hash_rows,
+                    )
+
+                self.db.write(store)
+                self._index_image_hashes(hashes)
+                indexed += len(hashes)
+
+        logger.info(f"Perceptual hashes computed for {indexed} images")
+        return indexed
+
+    def _perceptual_index(self, algorithm: HashAlgorithm) -> PerceptualIndex:
+        """Index des empreintes d'un algorithme (chargé au premier appel)."""
+        # Chargé sous le verrou : aucune empreinte écrite pendant le
+        # chargement ne peut échapper à _index_image_hashes
+        with self._perceptual_lock:
+            index = self._perceptual_indexes.get(algorithm)
+            if index is None:
+                index = PerceptualIndex.from_database(self.db, algorithm)
+                self._perceptual_indexes[algorithm] = index
+            return index
+
+    def _index_image_hashes(self, hashes: Dict[str, ImageHashes]) -> None:
+        """Ajoute des empreintes écrites en base aux index déjà chargés."""
+        with self._perceptual_lock:
+            for algorithm, index in self._perceptual_indexes.items():
+                for media_id, image_hashes in hashes.items():
+                    index.add(media_id, image_hashes.get(algorithm))
+
+    def _compute_image_hashes(
+        self, file_path: Path, media_id: Optional[str] = None
+    ) -> Optional[ImageHashes]:
+        """Empreintes perceptuelles d'une image (None si non image ou illisible).
+
+        Avec ``media_id``, l'image est relue via open_media (médias
+        stockés par blocs) ; ``file_path`` ne sert qu'au type MIME.
+        """
+        mime_type = self._guess_mime_type(file_path)
+        if not PILLOW_AVAILABLE or not mime_type or not mime_type.startswith("image/"):
+            return None
+        try:
+            if media_id is not None:
+                with self.open_media(media_id) as stream:
+                    return compute_image_hashes(stream)
+            return compute_image_hashes(file_path)
+        except Exception as e:
+            logger.warning(f"Failed to compute perceptual hashes for {file_path}: {e}")
+            return None
 
     def _get_storage_path(self, checksum: str, extension: str) -> Path:
         """Génère le chemin de stockage basé sur le checksum.
@@ -391,32 +1384,94 @@ class MediaCollection:
         # Sharding: premiers 2 et 4 caractères
         return self.storage_path / "media" / checksum[:2] / checksum[2:4] / f"{checksum}{extension}"
 
+    def _stage_file(
+        self, file_path: Path, cache_checksum: bool = True
+    ) -> Tuple[Path, str]:
+        """Copie un fichier dans la zone temporaire du stockage en le hachant.
+
+        Le fichier temporaire est créé sous ``storage_path/tmp`` pour
+        rester sur le même système de fichiers que le stockage et
+        pouvoir être déplacé atomiquement dans son répertoire de
+        sharding par ``os.replace``.
+
+        Args:
+            file_path: Chemin du fichier source
+            cache_checksum: Si False, le checksum n'est pas mis en cache
+                (l'import en masse l'écrit par lots)
+
+        Returns:
+            Tuple (chemin du fichier temporaire, checksum BLAKE2b)
+        """
+        tmp_dir = self.storage_path / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=tmp_dir, suffix=file_path.suffix)
+        os.close(fd)
+        staged_path = Path(tmp_name)
+
+        try:
+            stat_before = file_path.stat()
+            checksum = copy_with_blake2b(file_path, staged_path)
+            shutil.copystat(file_path, staged_path)
+            if cache_checksum and self.checksum_cache is not None:
+                self.checksum_cache.store(file_path, checksum, stat_before=stat_before)
+        except BaseException:
+            staged_path.unlink(missing_ok=True)
+            raise
+        return staged_path, checksum
+
+    def _put_chunks(self, file_path: Path) -> StoredFile:
+        """Écrit un fichier dans le stockage par blocs et met son checksum en cache."""
+        chunk_store = self.chunk_store
+        if chunk_store is None:
+            raise RuntimeError("Chunk store is not enabled")
+        stat_before = file_path.stat()
+        stored = chunk_store.put(file_path)
+        if self.checksum_cache is not None:
+            self.checksum_cache.store(
+                file_path, stored.checksum, stat_before=stat_before
+            )
+        return stored
+
+    def _compute_checksum(self, file_path: Path) -> str:
+        """Calcule le checksum d'un fichier source via le cache si actif."""
+        if self.checksum_cache is not None:
+            return self.checksum_cache.get_checksum(file_path)
+        return compute_blake2b(file_path)
+
     def _guess_mime_type(self, file_path: Path) -> Optional[str]:
         """Détermine le type MIME d'un fichier."""
         import mimetypes
         return mimetypes.guess_type(str(file_path))[0]
 
-    def _extract_and_save_metadata(
-        self,
-        session: Session,
-        media_id: str,
-        file_path: Path
-    ) -> None:
-        """Extrait et sauvegarde les métadonnées automatiques."""
+    def _extract_metadata(self, file_path: Path) -> Dict[str, Any]:
+        """Extrait les métadonnées automatiques (vide en cas d'échec)."""
         try:
-            metadata_dict = self.metadata_extractor.extract(file_path)
-            for key, value in metadata_dict.items():
-                metadata = Metadata(
-                    media_id=media_id,
-                    key=key,
-                    value=str(value),
-                    source="auto"
-                )
-                session.add(metadata)
-            session.commit()
-            logger.info(f"Extracted {len(metadata_dict)} metadata entries for {media_id}")
+            return self.metadata_extractor.extract(file_path)
         except Exception as e:
             logger.error(f"Failed to extract metadata: {e}")
+            return {}
+
+    def _save_metadata(
+        self, session: Session, media_id: str, metadata_dict: Dict[str, Any]
+    ) -> None:
+        """Insère les métadonnées automatiques en un seul lot.
+
+        L'insertion a lieu dans la transaction de la session ; la
+        validation est laissée à l'appelant.
+        """
+        rows = [
+            {
+                "media_id": media_id,
+                "key": key,
+                "value": str(value),
+                "source": "auto",
+                **typed_value_columns(value),
+            }
+            for key, value in metadata_dict.items()
+        ]
+        if rows:
+            session.execute(insert(Metadata), rows)
+        logger.info(f"Extracted {len(rows)} metadata entries for {media_id}")
 
     def _save_custom_metadata(
         self,
@@ -424,15 +1479,22 @@ class MediaCollection:
         media_id: str,
         custom_metadata: Dict[str, Any]
     ) -> None:
-        """Sauvegarde les métadonnées personnalisées."""
-        import json
-        for key, value in custom_metadata.items():
-            metadata = Metadata(
-                media_id=media_id,
-                key=f"custom.{key}",
-                value=json.dumps(value) if isinstance(value, (dict, list)) else str(value),
-                source="user"
-            )
-            session.add(metadata)
-        session.commit()
+        """Insère les métadonnées personnalisées en un seul lot.
+
+        L'insertion a lieu dans la transaction de la session ; la
+        validation est laissée à l'appelant.
+        """
+        rows = [
+            {
+                "media_id": media_id,
+                "key": f"custom.{key}",
+                "value": (
+                    json.dumps(value) if isinstance(value, (dict, list)) else str(value)
+                ),
+                "source": "user",
+                **typed_value_columns(value),
+            }
+            for key, value in custom_metadata.items()
+        ]
+        session.execute(insert(Metadata), rows)
         logger.info(f"Saved {len(custom_metadata)} custom metadata entries for {media_id}")
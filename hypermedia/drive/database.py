@@ -5,29 +5,110 @@ SQLite utilisée pour stocker les métadonnées des médias.
 """
 
 import logging
+import queue
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import Future
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Generator, Optional
-
-from sqlalchemy import create_engine, event
-from sqlalchemy.engine import Engine
+from types import TracebackType
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple, Type, TypeVar
+from urllib.parse import quote
+
+from sqlalchemy import (
+    DefaultClause,
+    bindparam,
+    create_engine,
+    event,
+    insert,
+    inspect,
+    select,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import Session, sessionmaker
-
-from .models import Base
+from sqlalchemy.pool import QueuePool
+
+from .chunk_store import ChunkRef, chunk_rows, manifest_rows
+from .fulltext import (
+    create_fulltext_index,
+    drop_fulltext_index,
+    flush_pending_fulltext,
+    rebuild_fulltext_index,
+)
+from .metadata_filters import create_key_statistics
+from .models import (
+    CHECKSUM_TRIGGERS,
+    MEDIA_CHANGE_TRIGGERS,
+    Base,
+    Chunk,
+    HexDigest,
+    MediaChunk,
+    MediaItem,
+    Metadata,
+    PerceptualHash,
+    checksum_prefix,
+    collection_items,
+    typed_value_columns,
+)
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+
+# Profils de performance SQLite (PRAGMA appliqués à chaque connexion)
+#
+# - durable : WAL + synchronous=FULL, aucune transaction validée n'est
+#   perdue même en cas de coupure de courant
+# - ingest : WAL + synchronous=NORMAL, gros cache et mmap pour les
+#   imports massifs (une coupure peut perdre les dernières transactions,
+#   jamais corrompre la base)
+# - readonly : connexions en lecture seule (query_only), cache et mmap
+#   dimensionnés pour la recherche
+SQLITE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -64_000,  # en KiB (~64 MB)
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5_000,  # en ms
+    },
+    "ingest": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -256_000,
+        "mmap_size": 1024 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30_000,
+    },
+    "readonly": {
+        "query_only": "ON",
+        "cache_size": -128_000,
+        "mmap_size": 1024 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5_000,
+    },
+}
+
+
+def set_sqlite_pragma(dbapi_conn: sqlite3.Connection, pragmas: Dict[str, Any]) -> None:
+    """Configure une connexion SQLite.
+
+    Active les contraintes de clés étrangères puis applique les PRAGMA
+    du profil de performance.
 
-@event.listens_for(Engine, "connect")
-def set_sqlite_pragma(dbapi_conn, connection_record):
-    """Active les contraintes de clés étrangères pour SQLite.
-    
     Args:
         dbapi_conn: Connexion DBAPI
-        connection_record: Enregistrement de connexion
+        pragmas: PRAGMA à appliquer (nom -> valeur)
     """
     cursor = dbapi_conn.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
     cursor.close()
 
 
@@ -39,8 +120,11 @@ class DatabaseManager:
 
     Attributes:
         db_path: Chemin du fichier SQLite
+        profile: Nom du profil de performance SQLite
         engine: Moteur SQLAlchemy
         SessionLocal: Factory de sessions
+        read_engine: Moteur des connexions en lecture seule (``mode=ro``)
+        ReadSessionLocal: Factory de sessions en lecture seule
 
     Example:
         >>> db = DatabaseManager("/path/to/hypermedia.db")
@@ -49,15 +133,34 @@ class DatabaseManager:
         ...     media = session.query(MediaItem).first()
     """
 
-    def __init__(self, db_path: Path, echo: bool = False):
+    def __init__(
+        self,
+        db_path: Path,
+        echo: bool = False,
+        profile: str = "durable",
+        read_pool_size: int = 8,
+    ):
         """Initialise le gestionnaire de base de données.
 
         Args:
             db_path: Chemin du fichier SQLite
             echo: Si True, affiche les requêtes SQL (débogage)
+            profile: Profil de performance SQLite ("durable", "ingest"
+                ou "readonly"). Le profil "readonly" n'initialise pas
+                le schéma.
+            read_pool_size: Nombre de connexions en lecture seule conservées
+
+        Raises:
+            ValueError: Si le profil est inconnu
         """
+        if profile not in SQLITE_PROFILES:
+            raise ValueError(
+                f"Unknown SQLite profile '{profile}' "
+                f"(expected one of {', '.join(SQLITE_PROFILES)})"
+            )
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.profile = profile
 
         # Création du moteur SQLAlchemy
         db_url = f"sqlite:///{self.db_path}"
@@ -67,15 +170,59 @@ class DatabaseManager:
             connect_args={"check_same_thread": False},  # Support multi-threading
         )
 
+        # PRAGMA propres à ce moteur (et non à tous les Engine du processus)
+        pragmas = SQLITE_PROFILES[profile]
+        event.listen(
+            self.engine,
+            "connect",
+            lambda dbapi_conn, connection_record: set_sqlite_pragma(
+                dbapi_conn, pragmas
+            ),
+        )
+
         # Factory de sessions
         self.SessionLocal = sessionmaker(
             autocommit=False, autoflush=False, bind=self.engine
         )
 
+        # Texte plein texte des médias dont les métadonnées ont changé,
+        # recalculé une fois par transaction juste avant sa validation
+        self._fulltext_ready = False
+        event.listen(self.engine, "commit", self._flush_fulltext)
+
         # Initialisation du schéma si nécessaire
-        self.init_schema()
+        if profile != "readonly":
+            self.init_schema()
+
+        # Pool de lecture : connexions ouvertes en mode=ro, qui ne
+        # prennent jamais le verrou d'écriture (lecteurs concurrents en WAL)
+        read_uri = f"file:{quote(str(self.db_path.resolve()))}?mode=ro"
+        self.read_engine = create_engine(
+            "sqlite://",
+            echo=echo,
+            creator=lambda: sqlite3.connect(
+                read_uri, uri=True, check_same_thread=False
+            ),
+            poolclass=QueuePool,
+            pool_size=read_pool_size,
+            max_overflow=read_pool_size,
+        )
+        read_pragmas = SQLITE_PROFILES["readonly"]
+        event.listen(
+            self.read_engine,
+            "connect",
+            lambda dbapi_conn, connection_record: set_sqlite_pragma(
+                dbapi_conn, read_pragmas
+            ),
+        )
+        self.ReadSessionLocal = sessionmaker(
+            autocommit=False, autoflush=False, bind=self.read_engine
+        )
+
+        self._writer: Optional["DatabaseWriter"] = None
+        self._writer_lock = threading.Lock()
 
-        logger.info(f"Database initialized at {self.db_path}")
+        logger.info(f"Database initialized at {self.db_path} (profile: {profile})")
 
     def init_schema(self) -> None:
         """Initialise le schéma de base de données.
@@ -86,11 +233,164 @@ class DatabaseManager:
         """
         try:
             Base.metadata.create_all(bind=self.engine)
+            added = self._upgrade_schema()
+            if "metadata.value_num" in added:
+                self._backfill_typed_metadata()
+            if "media_items.checksum_prefix" in added:
+                self._migrate_binary_checksums()
+            with self.engine.begin() as conn:
+                for statement in CHECKSUM_TRIGGERS + MEDIA_CHANGE_TRIGGERS:
+                    conn.exec_driver_sql(statement)
+                create_fulltext_index(conn)
+                create_key_statistics(conn)
+            self._fulltext_ready = True
             logger.info("Database schema initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize database schema: {e}")
             raise
 
+    def _upgrade_schema(self) -> List[str]:
+        """Ajoute les colonnes et index manquants aux tables existantes.
+
+        ``create_all`` ne modifie pas une table déjà présente : les
+        colonnes ajoutées au modèle depuis la création de la base sont
+        ajoutées ici par ``ALTER TABLE ADD COLUMN``. Seules les colonnes
+        nullables ou dotées d'une valeur par défaut serveur sont
+        supportées, ce qui couvre les évolutions additives du schéma.
+
+        Returns:
+            Colonnes ajoutées, sous la forme ``table.colonne``
+        """
+        added: List[str] = []
+        inspector = inspect(self.engine)
+        existing_tables = set(inspector.get_table_names())
+
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                if table.name not in existing_tables:
+                    continue
+
+                existing_columns = {
+                    c["name"] for c in inspector.get_columns(table.name)
+                }
+                for column in table.columns:
+                    if column.name in existing_columns:
+                        continue
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    ddl = (
+                        f'ALTER TABLE "{table.name}" '
+                        f'ADD COLUMN "{column.name}" {column_type}'
+                    )
+                    if isinstance(column.server_default, DefaultClause):
+                        default = column.server_default.arg
+                        ddl += f" DEFAULT {getattr(default, 'text', default)}"
+                    conn.exec_driver_sql(ddl)
+                    added.append(f"{table.name}.{column.name}")
+                    logger.info(f"Added column {table.name}.{column.name}")
+
+                for index in table.indexes:
+                    index.create(bind=conn, checkfirst=True)
+        return added
+
+    def _backfill_typed_metadata(self, batch_size: int = 10_000) -> None:
+        """Renseigne value_num/value_time des métadonnées existantes.
+
+        Exécuté une fois, lorsque les colonnes typées viennent d'être
+        ajoutées à une base antérieure.
+
+        Args:
+            batch_size: Nombre de lignes lues et mises à jour à la fois
+        """
+        updated = 0
+        last_id = 0
+        with self.engine.begin() as conn:
+            while True:
+                partition = conn.execute(
+                    select(Metadata.id, Metadata.value)
+                    .where(Metadata.id > last_id)
+                    .order_by(Metadata.id)
+                    .limit(batch_size)
+                ).all()
+                if not partition:
+                    break
+                last_id = partition[-1][0]
+
+                params = []
+                for row_id, value in partition:
+                    typed = typed_value_columns(value)
+                    if (
+                        typed["value_num"] is not None
+                        or typed["value_time"] is not None
+                    ):
+                        params.append(
+                            {
+                                "row_id": row_id,
+                                "num": typed["value_num"],
+                                "time": typed["value_time"],
+                            }
+                        )
+                if params:
+                    conn.execute(
+                        update(Metadata)
+                        .where(Metadata.id == bindparam("row_id"))
+                        .values(
+                            value_num=bindparam("num"), value_time=bindparam("time")
+                        ),
+                        params,
+                    )
+                    updated += len(params)
+        logger.info(f"Backfilled typed values for {updated} metadata rows")
+
+    def _migrate_binary_checksums(self, batch_size: int = 10_000) -> None:
+        """Convertit les checksums hexadécimaux existants en BLOB.
+
+        Exécuté une fois, lorsque la colonne ``checksum_prefix`` vient
+        d'être ajoutée à une base antérieure : l'index UNIQUE sur le
+        checksum texte est supprimé, chaque checksum est réécrit en
+        binaire et son préfixe renseigné. L'espace libéré n'est rendu
+        au système de fichiers qu'après ``vacuum()``.
+
+        Args:
+            batch_size: Nombre de médias lus et mis à jour à la fois
+        """
+        converted = 0
+        last_id = ""
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX IF EXISTS ix_media_items_checksum")
+            while True:
+                partition = conn.execute(
+                    select(MediaItem.id, MediaItem.checksum)
+                    .where(MediaItem.id > last_id)
+                    .order_by(MediaItem.id)
+                    .limit(batch_size)
+                ).all()
+                if not partition:
+                    break
+                last_id = partition[-1][0]
+
+                conn.execute(
+                    update(MediaItem)
+                    .where(MediaItem.id == bindparam("row_id"))
+                    .values(
+                        checksum=bindparam("digest", type_=HexDigest()),
+                        checksum_prefix=bindparam("prefix"),
+                        updated_at=MediaItem.updated_at,  # pas de onupdate
+                    ),
+                    [
+                        {
+                            "row_id": row_id,
+                            "digest": checksum,
+                            "prefix": checksum_prefix(checksum),
+                        }
+                        for row_id, checksum in partition
+                    ],
+                )
+                converted += len(partition)
+        logger.info(
+            f"Converted {converted} checksums to binary storage "
+            "(run vacuum() to reclaim space)"
+        )
+
     @contextmanager
     def get_session(self) -> Generator[Session, None, None]:
         """Crée une nouvelle session de base de données.
@@ -116,6 +416,82 @@ class DatabaseManager:
         finally:
             session.close()
 
+    @contextmanager
+    def get_read_session(self) -> Generator[Session, None, None]:
+        """Crée une session sur le pool de connexions en lecture seule.
+
+        Les lectures ne bloquent pas et ne sont pas bloquées par le
+        thread d'écriture. Toute tentative d'écriture échoue.
+
+        Yields:
+            Session SQLAlchemy en lecture seule
+
+        Example:
+            >>> with db.get_read_session() as session:
+            ...     count = session.query(MediaItem).count()
+        """
+        session = self.ReadSessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    def submit_write(self, work: Callable[[Session], T]) -> "Future[T]":
+        """Confie une transaction d'écriture au thread d'écriture.
+
+        ``work`` reçoit une session et ne doit pas appeler ``commit()`` :
+        le thread d'écriture regroupe les transactions en attente et les
+        valide ensemble. En cas d'échec d'une transaction du groupe,
+        chacune est rejouée isolément ; ``work`` doit donc se limiter
+        à des opérations en base. La valeur retournée ne doit pas être
+        un objet ORM (il serait détaché après la validation).
+
+        Args:
+            work: Fonction exécutée dans la transaction
+
+        Returns:
+            Future résolue avec la valeur retournée par ``work``
+            (ou l'exception levée) une fois la transaction validée
+        """
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = DatabaseWriter(self)
+            return self._writer.submit(work)
+
+    def write(self, work: Callable[[Session], T]) -> T:
+        """Exécute une transaction d'écriture et attend sa validation.
+
+        Args:
+            work: Fonction exécutée dans la transaction (voir submit_write)
+
+        Returns:
+            Valeur retournée par ``work``
+
+        Raises:
+            RuntimeError: Si appelée depuis le thread d'écriture lui-même
+        """
+        writer = self._writer
+        if writer is not None and writer.is_current_thread():
+            raise RuntimeError("write() cannot be called from the writer thread")
+        return self.submit_write(work).result()
+
+    def batch_writer(self, batch_size: int = 500) -> "BatchWriter":
+        """Crée un écrivain par lots pour les insertions massives.
+
+        Args:
+            batch_size: Nombre de médias par transaction
+
+        Returns:
+            BatchWriter à utiliser comme context manager
+
+        Example:
+            >>> with db.batch_writer(batch_size=1000) as writer:
+            ...     media_id = writer.add_media(checksum=c, path=p, size=s)
+            ...     writer.add_link(coll_id, media_id)
+            ...     writer.add_metadata(media_id, "file.name", "a.jpg")
+        """
+        return BatchWriter(self, batch_size)
+
     def create_session(self) -> Session:
         """Crée une nouvelle session (sans context manager).
 
@@ -134,6 +510,9 @@ class DatabaseManager:
         À utiliser uniquement pour les tests ou les réinitialisations.
         """
         logger.warning("Dropping all database tables")
+        self._fulltext_ready = False
+        with self.engine.begin() as conn:
+            drop_fulltext_index(conn)
         Base.metadata.drop_all(bind=self.engine)
 
     def reset(self) -> None:
@@ -146,7 +525,360 @@ class DatabaseManager:
         self.drop_all()
         self.init_schema()
 
+    def _flush_fulltext(self, conn: Connection) -> None:
+        """Met à jour l'index plein texte en attente avant chaque COMMIT."""
+        if self._fulltext_ready:
+            flush_pending_fulltext(conn)
+
+    def rebuild_fulltext_index(self) -> int:
+        """Reconstruit l'index plein texte (``media_fts`` et ``media_fts_trigram``).
+
+        L'index est normalement tenu à jour par des triggers ; la
+        reconstruction sert après une modification de la liste des
+        métadonnées indexées ou une restauration partielle.
+
+        Returns:
+            Nombre de médias indexés
+        """
+        count = self.write(lambda session: rebuild_fulltext_index(session.connection()))
+        logger.info(f"Full-text index rebuilt for {count} media")
+        return count
+
+    def vacuum(self) -> None:
+        """Reconstruit le fichier de base pour en libérer l'espace inutilisé.
+
+        À lancer après une migration ou des suppressions massives. La
+        base est verrouillée pendant l'opération, qui nécessite un espace
+        disque temporaire de la taille de la base.
+
+        Les lignes de l'index plein texte ont pour rowid celui de leur
+        média ; si VACUUM a renuméroté ``media_items`` (ce que SQLite
+        s'autorise pour les tables sans ``INTEGER PRIMARY KEY``), l'index
+        est reconstruit.
+        """
+        with self.engine.connect() as conn:
+            conn.exec_driver_sql("VACUUM")
+            drifted = conn.exec_driver_sql(
+                "SELECT 1 FROM media_fts AS f "
+                "LEFT JOIN media_items AS mi ON mi.rowid = f.rowid "
+                "WHERE mi.id IS NOT f.media_id LIMIT 1"
+            ).first()
+        logger.info(f"Database vacuumed: {self.db_path}")
+        if drifted is not None:
+            self.rebuild_fulltext_index()
+
     def close(self) -> None:
-        """Ferme toutes les connexions et libère les ressources."""
+        """Ferme toutes les connexions et libère les ressources.
+
+        Les écritures déjà soumises sont validées avant l'arrêt du
+        thread d'écriture.
+        """
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.stop()
+                self._writer = None
+        self.read_engine.dispose()
         self.engine.dispose()
         logger.info("Database connections closed")
+
+
+class DatabaseWriter:
+    """Thread unique sérialisant toutes les transactions d'écriture.
+
+    SQLite n'accepte qu'un écrivain à la fois : plutôt que de laisser
+    les threads se disputer le verrou (« database is locked »), les
+    écritures sont placées dans une file et exécutées par un seul
+    thread. Les transactions en attente sont regroupées (jusqu'à
+    ``max_batch``) et validées par un unique ``COMMIT``.
+
+    Attributes:
+        db: Gestionnaire de base de données
+        max_batch: Nombre maximal de transactions validées ensemble
+        transactions: Nombre de transactions exécutées
+        commits: Nombre de COMMIT effectués
+    """
+
+    _STOP = object()
+
+    def __init__(self, db: DatabaseManager, max_batch: int = 64):
+        """Démarre le thread d'écriture.
+
+        Args:
+            db: Instance de DatabaseManager
+            max_batch: Nombre maximal de transactions par COMMIT
+        """
+        self.db = db
+        self.max_batch = max_batch
+        self.transactions = 0
+        self.commits = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="hm-drive-db-writer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, work: Callable[[Session], T]) -> "Future[T]":
+        """Ajoute une transaction à la file.
+
+        Args:
+            work: Fonction exécutée dans la transaction
+
+        Returns:
+            Future résolue après validation
+        """
+        future: "Future[T]" = Future()
+        self._queue.put((work, future))
+        return future
+
+    def is_current_thread(self) -> bool:
+        """Indique si l'appelant est le thread d'écriture."""
+        return threading.current_thread() is self._thread
+
+    def stop(self) -> None:
+        """Valide les transactions en attente puis arrête le thread."""
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def _run(self) -> None:
+        """Boucle du thread d'écriture."""
+        while True:
+            job = self._queue.get()
+            if job is self._STOP:
+                return
+
+            jobs = [job]
+            stopping = False
+            while len(jobs) < self.max_batch:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is self._STOP:
+                    stopping = True
+                    break
+                jobs.append(job)
+
+            try:
+                self._execute(jobs)
+            except BaseException as e:
+                # Échec hors d'une transaction (ouverture de session,
+                # rollback) : le thread continue de servir la file et
+                # aucune future du groupe ne reste en attente
+                logger.exception(f"Database writer failed on {len(jobs)} transactions")
+                for _, future in jobs:
+                    if not future.done():
+                        future.set_exception(e)
+            if stopping:
+                return
+
+    def _execute(self, jobs: List[Tuple[Callable[[Session], Any], Future]]) -> None:
+        """Exécute un groupe de transactions, isolément en cas d'échec."""
+        jobs = [
+            (work, future)
+            for work, future in jobs
+            if future.set_running_or_notify_cancel()
+        ]
+        if not jobs:
+            return
+
+        if len(jobs) > 1:
+            session = self.db.SessionLocal()
+            try:
+                results = [work(session) for work, _ in jobs]
+                session.commit()
+            except BaseException as e:
+                session.rollback()
+                logger.debug(
+                    f"Grouped write of {len(jobs)} transactions failed ({e}), "
+                    "retrying one by one"
+                )
+            else:
+                self.transactions += len(jobs)
+                self.commits += 1
+                for (_, future), result in zip(jobs, results):
+                    future.set_result(result)
+                return
+            finally:
+                session.close()
+
+        for work, future in jobs:
+            session = self.db.SessionLocal()
+            try:
+                result = work(session)
+                session.commit()
+            except BaseException as e:
+                session.rollback()
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            finally:
+                session.close()
+                self.transactions += 1
+                self.commits += 1
+
+
+class BatchWriter:
+    """Écriture par lots de médias, liens de collection et métadonnées.
+
+    Les lignes sont accumulées en mémoire puis insérées via SQLAlchemy
+    Core (``insert()`` en executemany), une transaction par lot de
+    ``batch_size`` médias. Toutes les lignes ajoutées entre deux appels
+    à ``add_media`` appartiennent au même lot que le média qui les
+    précède, ce qui garantit que les liens et métadonnées d'un média
+    sont écrits dans la même transaction que lui.
+
+    Attributes:
+        db: Gestionnaire de base de données
+        batch_size: Nombre de médias par transaction
+        media_written: Nombre total de médias écrits
+    """
+
+    def __init__(self, db: DatabaseManager, batch_size: int = 500):
+        """Initialise l'écrivain.
+
+        Args:
+            db: Instance de DatabaseManager
+            batch_size: Nombre de médias par transaction
+
+        Raises:
+            ValueError: Si batch_size est inférieur à 1
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        self.db = db
+        self.batch_size = batch_size
+        self.media_written = 0
+        self._media: List[Dict[str, Any]] = []
+        self._links: List[Dict[str, Any]] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._perceptual: List[Dict[str, Any]] = []
+        self._chunks: List[ChunkRef] = []
+        self._manifests: List[Dict[str, Any]] = []
+
+    def add_media(self, **values: Any) -> str:
+        """Ajoute un MediaItem au lot courant.
+
+        Args:
+            **values: Colonnes du MediaItem (checksum, path, size, ...)
+
+        Returns:
+            Identifiant du média (généré si absent)
+        """
+        if len(self._media) >= self.batch_size:
+            self.flush()
+        media_id: str = values.setdefault("id", str(uuid.uuid4()))
+        self._media.append(values)
+        return media_id
+
+    def add_link(self, collection_id: str, media_id: str) -> None:
+        """Ajoute un média à une collection.
+
+        Args:
+            collection_id: ID de la collection
+            media_id: ID du média
+        """
+        self._links.append({"collection_id": collection_id, "media_id": media_id})
+
+    def add_metadata(
+        self, media_id: str, key: str, value: str, source: str = "auto"
+    ) -> None:
+        """Ajoute une métadonnée au lot courant.
+
+        Args:
+            media_id: ID du média
+            key: Clé de la métadonnée
+            value: Valeur sérialisée
+            source: Source de la métadonnée (auto/user/import/api)
+        """
+        self._metadata.append(
+            {
+                "media_id": media_id,
+                "key": key,
+                "value": value,
+                "source": source,
+                **typed_value_columns(value),
+            }
+        )
+
+    def add_perceptual_hashes(
+        self, media_id: str, ahash: int, dhash: int, phash: int
+    ) -> None:
+        """Ajoute les empreintes perceptuelles d'une image au lot courant.
+
+        Args:
+            media_id: ID du média
+            ahash: Empreinte moyenne
+            dhash: Empreinte de gradients
+            phash: Empreinte DCT
+        """
+        self._perceptual.append(
+            {"media_id": media_id, "ahash": ahash, "dhash": dhash, "phash": phash}
+        )
+
+    def add_chunks(self, media_id: str, chunks: List[ChunkRef]) -> None:
+        """Ajoute le manifeste d'un média stocké par blocs au lot courant.
+
+        Args:
+            media_id: ID du média
+            chunks: Manifeste retourné par ``ChunkStore.put``
+        """
+        self._chunks.extend(chunks)
+        self._manifests.extend(manifest_rows(media_id, chunks))
+
+    def flush(self) -> None:
+        """Écrit le lot courant dans une unique transaction."""
+        if not (
+            self._media
+            or self._links
+            or self._metadata
+            or self._perceptual
+            or self._manifests
+        ):
+            return
+
+        media, links, metadata = self._media, self._links, self._metadata
+        perceptual, chunks, manifests = self._perceptual, self._chunks, self._manifests
+
+        def work(session: Session) -> None:
+            if media:
+                session.execute(insert(MediaItem), media)
+            if links:
+                session.execute(insert(collection_items), links)
+            if metadata:
+                session.execute(insert(Metadata), metadata)
+            if perceptual:
+                session.execute(insert(PerceptualHash), perceptual)
+            if manifests:
+                session.execute(
+                    sqlite_insert(Chunk).on_conflict_do_nothing(), chunk_rows(chunks)
+                )
+                session.execute(insert(MediaChunk), manifests)
+
+        self.db.write(work)
+
+        logger.debug(
+            f"Flushed {len(self._media)} media, {len(self._links)} links, "
+            f"{len(self._metadata)} metadata rows"
+        )
+        self.media_written += len(self._media)
+        self._media, self._links, self._metadata, self._perceptual = [], [], [], []
+        self._chunks, self._manifests = [], []
+
+    def discard(self) -> None:
+        """Abandonne les lignes non encore écrites."""
+        self._media, self._links, self._metadata, self._perceptual = [], [], [], []
+        self._chunks, self._manifests = [], []
+
+    def __enter__(self) -> "BatchWriter":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
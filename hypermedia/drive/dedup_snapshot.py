@@ -0,0 +1,561 @@
+"""Index de déduplication persisté et projeté en mémoire.
+
+Ce module fournit ``DeduplicationSnapshot``, une version sur disque de
+``DeduplicationIndex`` qu'un processus ouvre en quelques millisecondes
+au lieu de relire toute la table ``media_items``. Le fichier est
+projeté en mémoire (``mmap``) en lecture seule : les processus forkés
+ou les workers d'un pool qui ouvrent le même fichier partagent ses
+pages via le cache du système.
+
+Format du fichier (entiers little-endian) :
+
+- en-tête de 64 octets : signature, version, taille des clés, nombre
+  d'entrées, marque de progression (``seq`` du dernier changement de
+  ``media_changes`` pris en compte), taille du filtre de Bloom ;
+- entrées de largeur fixe triées par clé : clé de 16 octets puis
+  identifiant du média sur 36 octets (complété par des octets nuls) ;
+- tableau de bits du filtre de Bloom.
+
+Les changements postérieurs à la marque sont ajoutés par ``sync()`` à
+un journal (``<fichier>.journal``) relu à l'ouverture, et conservés en
+mémoire devant la table triée. ``build()`` réécrit l'instantané et
+vide le journal.
+
+La table ``media_changes`` reste bornée : ``build()`` purge les
+changements inclus dans l'instantané, et ``sync()`` ceux qui ont plus
+de ``CHANGE_RETENTION`` changements de retard sur sa marque.
+"""
+
+import heapq
+import logging
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Union, cast
+
+from sqlalchemy import CursorResult, and_, delete, func, not_, select, text
+from sqlalchemy.orm import Session
+
+from .database import DatabaseManager
+from .deduplication import (
+    DIGEST_KEY_SIZE,
+    BloomFilter,
+    _raw_column,
+    _raw_digest_key,
+    digest_key,
+)
+from .models import MediaChange, MediaItem
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"HMDEDUP1"
+SNAPSHOT_VERSION = 1
+HEADER_SIZE = 64
+MEDIA_ID_SIZE = 36
+
+# signature, version, taille des clés, entrées, marque, bits et fonctions du filtre
+_HEADER = struct.Struct("<8sIIQQQI")
+# opération, seq, clé, identifiant du média
+_JOURNAL_RECORD = struct.Struct("<cQ16s36s")
+_RECORD_SIZE = DIGEST_KEY_SIZE + MEDIA_ID_SIZE
+_WRITE_BUFFER = 1 << 20
+
+# Nombre de changements conservés derrière la marque d'un instantané qui
+# se synchronise : les instantanés moins en retard se mettent à jour
+# sans reconstruction
+CHANGE_RETENTION = 100_000
+
+
+def _sort_key(key: bytes) -> bytes:
+    """Clé rangée dans l'instantané.
+
+    Le bit de poids fort du premier octet est inversé : l'ordre des
+    octets devient celui de ``checksum_prefix`` (entier signé), ce qui
+    permet de lire les checksums déjà triés via l'index du préfixe.
+    """
+    return bytes((key[0] ^ 0x80,)) + key[1:]
+
+
+def _encode_media_id(media_id: str) -> bytes:
+    """Identifiant du média sur ``MEDIA_ID_SIZE`` octets."""
+    encoded = media_id.encode()
+    if len(encoded) > MEDIA_ID_SIZE:
+        raise ValueError(f"Media id too long for snapshot: {media_id!r}")
+    return encoded.ljust(MEDIA_ID_SIZE, b"\0")
+
+
+def _journal_path(path: Path) -> Path:
+    return path.with_name(path.name + ".journal")
+
+
+def database_high_water_mark(db: DatabaseManager) -> int:
+    """Numéro du dernier changement enregistré dans ``media_changes``.
+
+    Lu dans ``sqlite_sequence`` : la valeur ne diminue pas quand le
+    journal des changements est purgé.
+
+    Args:
+        db: Instance de DatabaseManager
+
+    Returns:
+        Dernier ``seq`` attribué (0 si aucun)
+    """
+    with db.get_read_session() as session:
+        return _high_water_mark(session)
+
+
+def _high_water_mark(session: Session) -> int:
+    seq = session.scalar(
+        text("SELECT seq FROM sqlite_sequence WHERE name = :name"),
+        {"name": MediaChange.__tablename__},
+    )
+    return int(seq or 0)
+
+
+def prune_changes_up_to(db: DatabaseManager, up_to: int) -> int:
+    """Supprime de ``media_changes`` les changements jusqu'à ``up_to``.
+
+    Les instantanés dont la marque est inférieure devront être
+    reconstruits (``load_or_build`` s'en charge).
+
+    Args:
+        db: Instance de DatabaseManager
+        up_to: Dernier ``seq`` supprimé
+
+    Returns:
+        Nombre de changements supprimés
+    """
+
+    def work(session: Session) -> int:
+        result = session.execute(delete(MediaChange).where(MediaChange.seq <= up_to))
+        return cast("CursorResult[Any]", result).rowcount
+
+    return db.write(work)
+
+
+class DeduplicationSnapshot:
+    """Index des checksums ouvert depuis un instantané sur disque.
+
+    Même interface de consultation que ``DeduplicationIndex``
+    (``check_duplicate``, ``might_contain``, ``in``, ``len``). Une
+    recherche consulte d'abord les changements du journal, puis le
+    filtre de Bloom, puis la table triée par recherche dichotomique
+    (une vingtaine de comparaisons pour un million d'entrées).
+
+    La cohérence avec la base est vérifiée par la marque de progression
+    : ``sync()`` applique les changements de ``media_changes`` dont le
+    ``seq`` la dépasse. Si ces changements ont été purgés, ou si la base
+    est en retard sur l'instantané (base restaurée, autre base),
+    l'instantané est périmé et doit être reconstruit.
+
+    Attributes:
+        path: Chemin de l'instantané
+        hwm: Marque de progression (dernier changement pris en compte)
+        lookups: Nombre de recherches
+        bloom_rejections: Recherches écartées par le filtre de Bloom
+
+    Example:
+        >>> with DeduplicationSnapshot.load_or_build(db, "dedup.snapshot") as index:
+        ...     duplicate = index.check_duplicate(checksum)
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """Ouvre un instantané et rejoue son journal.
+
+        Args:
+            path: Chemin de l'instantané
+
+        Raises:
+            FileNotFoundError: Si le fichier n'existe pas
+            ValueError: Si le fichier n'est pas un instantané valide
+        """
+        self.path = Path(path)
+        self.lookups = 0
+        self.bloom_rejections = 0
+        self._added: Dict[bytes, str] = {}
+        self._removed: Set[bytes] = set()
+        self._view: Optional[memoryview] = None
+        self._bloom_view: Optional[memoryview] = None
+
+        with open(self.path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER_SIZE:
+                raise ValueError(f"Not a deduplication snapshot: {self.path}")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, key_size, count, hwm, bloom_bits, bloom_hashes = (
+                _HEADER.unpack_from(self._map, 0)
+            )
+            if magic != SNAPSHOT_MAGIC or key_size != DIGEST_KEY_SIZE:
+                raise ValueError(f"Not a deduplication snapshot: {self.path}")
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported snapshot version {version}: {self.path}")
+            bloom_start = HEADER_SIZE + count * _RECORD_SIZE
+            if size != bloom_start + (bloom_bits + 7) // 8:
+                raise ValueError(f"Truncated deduplication snapshot: {self.path}")
+        except Exception:
+            self.close()
+            raise
+
+        self._count: int = count
+        self._base_size: int = count
+        self.hwm: int = hwm
+        self._view = memoryview(self._map)
+        self._bloom_view = self._view[bloom_start:]
+        self._bloom = BloomFilter(bloom_bits, bloom_hashes, self._bloom_view)
+        self._replay_journal()
+
+    @property
+    def journal_path(self) -> Path:
+        """Chemin du journal des changements postérieurs à l'instantané."""
+        return _journal_path(self.path)
+
+    @classmethod
+    def build(
+        cls,
+        db: DatabaseManager,
+        path: Union[str, Path],
+        bloom_bits_per_item: int = 10,
+        prune_changes: bool = True,
+        batch_size: int = 100_000,
+    ) -> "DeduplicationSnapshot":
+        """Écrit un instantané de tous les checksums de la base.
+
+        Les checksums binaires sont lus déjà triés (index du préfixe) et
+        écrits au fil de l'eau ; seuls les checksums non hexadécimaux
+        sont triés en mémoire. Le fichier est écrit à côté puis renommé :
+        les processus qui ont déjà ouvert l'ancien instantané continuent
+        de le lire.
+
+        Args:
+            db: Instance de DatabaseManager
+            path: Chemin de l'instantané
+            bloom_bits_per_item: Taille du filtre de Bloom par entrée
+            prune_changes: Si True (défaut), supprime de ``media_changes``
+                les changements inclus dans l'instantané ; les instantanés
+                plus anciens d'autres chemins seront reconstruits par
+                ``load_or_build``
+            batch_size: Nombre de lignes lues à la fois
+
+        Returns:
+            Instantané ouvert
+
+        Raises:
+            ValueError: Si bloom_bits_per_item est inférieur à 1
+        """
+        if bloom_bits_per_item < 1:
+            raise ValueError(
+                f"bloom_bits_per_item must be >= 1, got {bloom_bits_per_item}"
+            )
+        path = Path(path)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+        with db.get_read_session() as session:
+            # Marque relevée avant la lecture : les changements concurrents
+            # déjà visibles dans la lecture seront rejoués sans effet
+            hwm = _high_water_mark(session)
+            total = session.execute(
+                select(func.count()).select_from(MediaItem)
+            ).scalar_one()
+            bloom = BloomFilter.for_capacity(max(1, total), bloom_bits_per_item)
+
+            raw_checksum = _raw_column(MediaItem.checksum)
+            binary = and_(
+                func.typeof(MediaItem.checksum) == "blob",
+                func.length(MediaItem.checksum) >= DIGEST_KEY_SIZE,
+            )
+            # Checksums non hexadécimaux (clé = condensé de la chaîne)
+            others = sorted(
+                _sort_key(_raw_digest_key(raw)) + _encode_media_id(media_id)
+                for raw, media_id in session.execute(
+                    select(raw_checksum, MediaItem.id).where(not_(binary))
+                )
+            )
+            rows = session.execute(
+                select(raw_checksum, MediaItem.id)
+                .where(binary)
+                .order_by(MediaItem.checksum_prefix, MediaItem.checksum)
+                .execution_options(yield_per=batch_size)
+            )
+            ordered = (
+                _sort_key(raw[:DIGEST_KEY_SIZE]) + _encode_media_id(media_id)
+                for raw, media_id in rows
+            )
+
+            count = 0
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(bytes(HEADER_SIZE))
+                    buffer = bytearray()
+                    for record in heapq.merge(ordered, others):
+                        buffer += record
+                        bloom.add(record[:DIGEST_KEY_SIZE])
+                        count += 1
+                        if len(buffer) >= _WRITE_BUFFER:
+                            f.write(buffer)
+                            buffer.clear()
+                    f.write(buffer)
+                    f.write(bloom.buffer)
+                    f.seek(0)
+                    f.write(
+                        _HEADER.pack(
+                            SNAPSHOT_MAGIC,
+                            SNAPSHOT_VERSION,
+                            DIGEST_KEY_SIZE,
+                            count,
+                            hwm,
+                            bloom.bits,
+                            bloom.hashes,
+                        )
+                    )
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+
+        # Les enregistrements du journal sont tous antérieurs à la marque
+        # ou seront relus depuis la base par sync()
+        _journal_path(path).unlink(missing_ok=True)
+        if prune_changes:
+            prune_changes_up_to(db, hwm)
+        logger.info(
+            f"Deduplication snapshot written: {path} ({count} checksums, hwm={hwm})"
+        )
+        return cls(path)
+
+    @classmethod
+    def load_or_build(
+        cls, db: DatabaseManager, path: Union[str, Path], bloom_bits_per_item: int = 10
+    ) -> "DeduplicationSnapshot":
+        """Ouvre et synchronise un instantané, ou le reconstruit.
+
+        Point d'entrée d'un worker : l'instantané est reconstruit s'il
+        est absent, invalide ou périmé.
+
+        Args:
+            db: Instance de DatabaseManager
+            path: Chemin de l'instantané
+            bloom_bits_per_item: Taille du filtre de Bloom en cas de
+                reconstruction
+
+        Returns:
+            Instantané à jour de la base
+        """
+        try:
+            snapshot = cls(path)
+        except (FileNotFoundError, ValueError) as e:
+            logger.info(f"Rebuilding deduplication snapshot {path}: {e}")
+            return cls.build(db, path, bloom_bits_per_item)
+        try:
+            snapshot.sync(db)
+        except ValueError as e:
+            snapshot.close()
+            logger.warning(f"Rebuilding deduplication snapshot {path}: {e}")
+            return cls.build(db, path, bloom_bits_per_item)
+        return snapshot
+
+    def is_current(self, db: DatabaseManager) -> bool:
+        """Vérifie que l'instantané reflète le dernier changement de la base.
+
+        Args:
+            db: Instance de DatabaseManager
+
+        Returns:
+            True si la marque de progression est celle de la base
+        """
+        return self.hwm == database_high_water_mark(db)
+
+    def sync(self, db: DatabaseManager) -> int:
+        """Applique les changements de la base postérieurs à la marque.
+
+        Les changements sont aussi ajoutés au journal, pour que les
+        processus qui ouvriront l'instantané ensuite n'aient pas à les
+        relire en base. Quand ``media_changes`` conserve plus de deux
+        fois ``CHANGE_RETENTION`` changements antérieurs à la marque, les
+        plus anciens sont purgés pour n'en garder que
+        ``CHANGE_RETENTION``.
+
+        Args:
+            db: Instance de DatabaseManager
+
+        Returns:
+            Nombre de changements appliqués
+
+        Raises:
+            ValueError: Si l'instantané est périmé (changements purgés
+                de ``media_changes``, ou base en retard sur l'instantané)
+        """
+        with db.get_read_session() as session:
+            db_hwm = _high_water_mark(session)
+            if db_hwm < self.hwm:
+                raise ValueError(
+                    f"Snapshot is ahead of the database (hwm {self.hwm} > {db_hwm})"
+                )
+            if db_hwm == self.hwm:
+                return 0
+            oldest = session.scalar(select(func.min(MediaChange.seq)))
+            changes = session.execute(
+                select(
+                    MediaChange.seq,
+                    MediaChange.op,
+                    MediaChange.media_id,
+                    _raw_column(MediaChange.checksum),
+                )
+                .where(MediaChange.seq > self.hwm, MediaChange.seq <= db_hwm)
+                .order_by(MediaChange.seq)
+            ).all()
+
+        if not changes or changes[0].seq != self.hwm + 1:
+            raise ValueError(
+                f"Changes after hwm {self.hwm} were pruned from the database"
+            )
+
+        journal = bytearray()
+        for seq, op, media_id, raw in changes:
+            key = _sort_key(_raw_digest_key(raw))
+            journal += _JOURNAL_RECORD.pack(
+                op.encode(), seq, key, _encode_media_id(media_id)
+            )
+            self._apply(op, seq, key, media_id)
+
+        # Un seul write() en mode ajout : les enregistrements de processus
+        # concurrents ne s'entrelacent pas, les doublons sont ignorés à la
+        # relecture
+        fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, journal)
+        finally:
+            os.close(fd)
+        logger.debug(
+            f"Deduplication snapshot synced: {len(changes)} changes, hwm={self.hwm}"
+        )
+
+        if oldest is not None and self.hwm - oldest >= 2 * CHANGE_RETENTION:
+            up_to = self.hwm - CHANGE_RETENTION
+            pruned = prune_changes_up_to(db, up_to)
+            logger.info(f"Pruned {pruned} media changes up to seq {up_to}")
+        return len(changes)
+
+    def check_duplicate(self, checksum: str) -> Optional[str]:
+        """Vérifie si un checksum existe déjà.
+
+        Args:
+            checksum: Checksum BLAKE2b à vérifier
+
+        Returns:
+            media_id du doublon si existe, None sinon
+        """
+        self.lookups += 1
+        key = _sort_key(digest_key(checksum))
+        media_id = self._added.get(key)
+        if media_id is not None:
+            return media_id
+        if key in self._removed:
+            return None
+        if key not in self._bloom:
+            self.bloom_rejections += 1
+            return None
+        row = self._search(key)
+        return self._media_id(row) if row >= 0 else None
+
+    def might_contain(self, checksum: str) -> bool:
+        """Test du journal et du seul filtre de Bloom.
+
+        Args:
+            checksum: Checksum BLAKE2b
+
+        Returns:
+            False si le checksum est certainement absent de l'index
+        """
+        key = _sort_key(digest_key(checksum))
+        return key in self._added or (key not in self._removed and key in self._bloom)
+
+    def close(self) -> None:
+        """Libère la projection mémoire."""
+        if self._bloom_view is not None:
+            self._bloom_view.release()
+            self._bloom_view = None
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        self._map.close()
+
+    def __enter__(self) -> "DeduplicationSnapshot":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Nombre de checksums indexés."""
+        return self._count
+
+    def __contains__(self, checksum: str) -> bool:
+        """True si le checksum est indexé."""
+        return self.check_duplicate(checksum) is not None
+
+    def _replay_journal(self) -> None:
+        """Applique les enregistrements complets du journal."""
+        try:
+            data = self.journal_path.read_bytes()
+        except FileNotFoundError:
+            return
+        # Un enregistrement incomplet (écriture interrompue) est ignoré
+        usable = len(data) - len(data) % _JOURNAL_RECORD.size
+        for op, seq, key, media_id in _JOURNAL_RECORD.iter_unpack(data[:usable]):
+            self._apply(op.decode(), seq, key, media_id.rstrip(b"\0").decode())
+
+    def _apply(self, op: str, seq: int, key: bytes, media_id: str) -> None:
+        """Applique un changement s'il est postérieur à la marque."""
+        if seq <= self.hwm:
+            return
+        present = self._lookup(key) is not None
+        if op == "I":
+            self._added[key] = media_id
+            self._removed.discard(key)
+            self._count += not present
+        else:
+            self._added.pop(key, None)
+            if self._search(key) >= 0:
+                self._removed.add(key)
+            self._count -= present
+        self.hwm = seq
+
+    def _lookup(self, key: bytes) -> Optional[str]:
+        """Recherche sans compteurs ni filtre de Bloom."""
+        if key in self._added:
+            return self._added[key]
+        if key in self._removed:
+            return None
+        row = self._search(key)
+        return self._media_id(row) if row >= 0 else None
+
+    def _search(self, key: bytes) -> int:
+        """Recherche dichotomique d'une clé dans la table triée.
+
+        Returns:
+            Numéro de l'entrée, ou -1 si la clé est absente
+        """
+        data = self._map
+        lo, hi = 0, self._base_size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            offset = HEADER_SIZE + mid * _RECORD_SIZE
+            if data[offset : offset + DIGEST_KEY_SIZE] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._base_size:
+            offset = HEADER_SIZE + lo * _RECORD_SIZE
+            if data[offset : offset + DIGEST_KEY_SIZE] == key:
+                return lo
+        return -1
+
+    def _media_id(self, row: int) -> str:
+        """Identifiant du média d'une entrée de la table triée."""
+        offset = HEADER_SIZE + row * _RECORD_SIZE + DIGEST_KEY_SIZE
+        return self._map[offset : offset + MEDIA_ID_SIZE].rstrip(b"\0").decode()
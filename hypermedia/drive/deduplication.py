@@ -4,8 +4,54 @@ Ce module gère la détection des fichiers en double dans les collections
 en utilisant les checksums BLAKE2b.
 """
 
-from typing import Optional, Dict, Set
+import hashlib
+import logging
+import math
+import os
+import re
+import sys
 from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union, cast
+
+from sqlalchemy import and_, func, or_, select, type_coerce
+from sqlalchemy.orm import InstrumentedAttribute, Session
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.types import NullType
+
+from .checksum import compute_blake2b, compute_partial_blake2b
+from .database import DatabaseManager
+from .models import MediaItem, checksum_prefix
+
+logger = logging.getLogger(__name__)
+
+# Octets de checksum formant les clés du filtre de Bloom et de
+# DeduplicationSnapshot
+DIGEST_KEY_SIZE = 16
+
+# Checksums recherchés par requête dans find_duplicates_many (deux
+# paramètres SQL chacun, sous la limite de 32766 variables de SQLite)
+DUPLICATE_LOOKUP_CHUNK_SIZE = 1000
+
+_HEX_KEY_RE = re.compile(rf"^[0-9a-f]{{{2 * DIGEST_KEY_SIZE}}}")
+
+
+def checksum_condition(checksum: str) -> ColumnElement:
+    """Condition SQL sélectionnant le média d'un checksum.
+
+    La recherche passe par l'index du préfixe entier de 8 octets,
+    le checksum complet départageant les éventuelles collisions.
+
+    Args:
+        checksum: Checksum BLAKE2b (hex digest)
+
+    Returns:
+        Condition SQL sur ``MediaItem``
+    """
+    return and_(
+        MediaItem.checksum_prefix == checksum_prefix(checksum),
+        MediaItem.checksum == checksum,
+    )
 
 
 class DuplicationPolicy(Enum):
@@ -22,54 +68,501 @@ class DuplicationPolicy(Enum):
     ALLOW = "allow"
 
 
+# Alias utilisé par l'API publique (DeduplicationManager)
+DuplicatePolicy = DuplicationPolicy
+
+
+class DuplicateProbe(NamedTuple):
+    """Résultat du préfiltre de déduplication d'un fichier.
+
+    Attributes:
+        size: Taille du fichier en bytes
+        partial_checksum: Checksum partiel (début + fin), None s'il n'a
+            pas été nécessaire de le calculer
+        candidate: True si un média existant pourrait être identique ;
+            False garantit que le fichier est nouveau
+    """
+
+    size: int
+    partial_checksum: Optional[str]
+    candidate: bool
+
+
+def digest_key(checksum: str) -> bytes:
+    """Clé de 16 octets d'un checksum (filtre de Bloom, ``DeduplicationSnapshot``).
+
+    Pour un checksum BLAKE2b hexadécimal, ses 16 premiers octets ; pour
+    toute autre chaîne (checksums courts, identifiants de test), un
+    condensé BLAKE2b de 16 octets de la chaîne.
+
+    Args:
+        checksum: Checksum hexadécimal
+
+    Returns:
+        Clé de ``DIGEST_KEY_SIZE`` octets
+    """
+    if _HEX_KEY_RE.match(checksum):
+        return bytes.fromhex(checksum[: 2 * DIGEST_KEY_SIZE])
+    return hashlib.blake2b(checksum.encode(), digest_size=DIGEST_KEY_SIZE).digest()
+
+
+def _raw_digest_key(raw: Union[bytes, str]) -> bytes:
+    """Clé d'un checksum lu brut en base (BLOB binaire ou texte)."""
+    if isinstance(raw, str):
+        return digest_key(raw)
+    return digest_key(bytes(raw).hex())
+
+
+def _raw_column(column: InstrumentedAttribute[str]) -> ColumnElement[Any]:
+    """Colonne de checksum lue telle que stockée (BLOB binaire ou texte)."""
+    return type_coerce(column, NullType())
+
+
+class BloomFilter:
+    """Filtre de Bloom sur des clés de ``DIGEST_KEY_SIZE`` octets.
+
+    Les positions des bits sont dérivées des 128 bits de la clé par
+    double hachage (les clés sont déjà des condensés uniformes). Le
+    tableau de bits peut être un ``bytearray`` ou une projection
+    mémoire en lecture seule (``DeduplicationSnapshot``).
+
+    Attributes:
+        bits: Nombre de bits du filtre
+        hashes: Nombre de bits positionnés par clé
+        buffer: Tableau de bits
+    """
+
+    def __init__(self, bits: int, hashes: int, buffer: Any = None):
+        """Initialise le filtre.
+
+        Args:
+            bits: Nombre de bits du filtre
+            hashes: Nombre de bits positionnés par clé
+            buffer: Tableau de bits existant (vide par défaut)
+        """
+        self.bits = bits
+        self.hashes = hashes
+        self.buffer = buffer if buffer is not None else bytearray((bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, bits_per_item: int = 10) -> "BloomFilter":
+        """Filtre vide dimensionné pour ``capacity`` clés.
+
+        Args:
+            capacity: Nombre de clés prévu
+            bits_per_item: Bits par clé (10 : environ 1 % de faux positifs)
+
+        Returns:
+            BloomFilter vide
+        """
+        return cls(
+            bits=max(64, capacity * bits_per_item),
+            hashes=max(1, round(bits_per_item * math.log(2))),
+        )
+
+    def add(self, key: bytes) -> None:
+        """Ajoute une clé au filtre."""
+        buffer, bits = self.buffer, self.bits
+        h1 = int.from_bytes(key[:8], "little")
+        h2 = int.from_bytes(key[8:16], "little") | 1
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % bits
+            buffer[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: bytes) -> bool:
+        """False si la clé n'a jamais été ajoutée au filtre."""
+        buffer, bits = self.buffer, self.bits
+        h1 = int.from_bytes(key[:8], "little")
+        h2 = int.from_bytes(key[8:16], "little") | 1
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % bits
+            if not buffer[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
 class DeduplicationIndex:
     """Index des checksums pour détection rapide des doublons.
-    
+
+    Les recherches passent par un ``dict`` checksum -> media_id : un
+    échec de recherche dans un ``dict`` coûte moins qu'un sondage du
+    filtre de Bloom en Python, qui n'est donc pas placé devant lui. Le
+    filtre de Bloom sert de préfiltre aux appelants qui consulteraient
+    sinon la base (``might_contain``) : construit au premier appel, il
+    est ensuite tenu à jour et reconstruit au double de sa capacité dès
+    que l'index la dépasse.
+
+    Pour une représentation compacte partagée entre processus (16
+    octets de clé et 16 octets d'identifiant par média), voir
+    ``DeduplicationSnapshot``.
+
     Attributes:
         checksums: Mapping checksum -> media_id
         policy: Politique de gestion des doublons
-    
+        bloom_bits_per_item: Bits du filtre de Bloom par entrée prévue
+        lookups: Nombre de recherches
+        bloom_rejections: Appels à ``might_contain`` écartés par le
+            filtre de Bloom
+
     Example:
-        >>> index = DeduplicationIndex(policy=DuplicationPolicy.IGNORE)
+        >>> index = DeduplicationIndex.from_database(db)
         >>> duplicate = index.check_duplicate(checksum)
     """
-    
-    def __init__(self, policy: DuplicationPolicy = DuplicationPolicy.REFERENCE):
+
+    def __init__(
+        self,
+        policy: DuplicationPolicy = DuplicationPolicy.REFERENCE,
+        capacity: int = 1024,
+        bloom_bits_per_item: int = 10,
+    ):
         """Initialise l'index de déduplication.
-        
+
         Args:
             policy: Politique de gestion des doublons
+            capacity: Nombre d'entrées prévu pour le filtre de Bloom
+                (reconstruit plus grand au-delà)
+            bloom_bits_per_item: Taille du filtre de Bloom par entrée
+                (10 bits : environ 1 % de faux positifs)
+
+        Raises:
+            ValueError: Si capacity ou bloom_bits_per_item est inférieur à 1
         """
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        if bloom_bits_per_item < 1:
+            raise ValueError(
+                f"bloom_bits_per_item must be >= 1, got {bloom_bits_per_item}"
+            )
         self.checksums: Dict[str, str] = {}
         self.policy = policy
-    
+        self.bloom_bits_per_item = bloom_bits_per_item
+        self.lookups = 0
+        self.bloom_rejections = 0
+        self._bloom_capacity = capacity
+        self._bloom: Optional[BloomFilter] = None
+
+    @classmethod
+    def from_database(
+        cls,
+        db: DatabaseManager,
+        policy: DuplicationPolicy = DuplicationPolicy.REFERENCE,
+        batch_size: int = 100_000,
+    ) -> "DeduplicationIndex":
+        """Construit l'index à partir de tous les médias de la base.
+
+        Les checksums sont lus en flux et le filtre de Bloom est
+        dimensionné pour leur nombre.
+
+        Args:
+            db: Instance de DatabaseManager
+            policy: Politique de gestion des doublons
+            batch_size: Nombre de lignes lues à la fois
+
+        Returns:
+            Index contenant un checksum par média
+        """
+        with db.get_read_session() as session:
+            total = session.execute(
+                select(func.count()).select_from(MediaItem)
+            ).scalar_one()
+            index = cls(policy=policy, capacity=max(1, total))
+            rows = session.execute(
+                select(MediaItem.id, MediaItem.checksum).execution_options(
+                    yield_per=batch_size
+                )
+            )
+            for media_id, checksum in rows:
+                index.register(checksum, media_id)
+        logger.info(f"Deduplication index loaded: {len(index)} checksums")
+        return index
+
     def check_duplicate(self, checksum: str) -> Optional[str]:
         """Vérifie si un checksum existe déjà.
-        
+
         Args:
             checksum: Checksum BLAKE2b à vérifier
-        
+
         Returns:
             media_id du doublon si existe, None sinon
         """
-        # TODO: Chercher dans l'index
-        raise NotImplementedError("Méthode à implémenter")
-    
+        self.lookups += 1
+        return self.checksums.get(checksum)
+
+    def might_contain(self, checksum: str) -> bool:
+        """Test du seul filtre de Bloom, avant une recherche en base.
+
+        Args:
+            checksum: Checksum BLAKE2b
+
+        Returns:
+            False si le checksum est certainement absent de l'index
+        """
+        if self._bloom is None:
+            self._allocate_bloom(max(self._bloom_capacity, len(self.checksums)))
+        if digest_key(checksum) in cast(BloomFilter, self._bloom):
+            return True
+        self.bloom_rejections += 1
+        return False
+
     def register(self, checksum: str, media_id: str) -> None:
         """Enregistre un nouveau checksum dans l'index.
-        
+
         Args:
             checksum: Checksum du fichier
-            media_id: Identifiant du média
+            media_id: Identifiant du média (remplace l'éventuel précédent)
         """
-        # TODO: Ajouter à l'index
-        raise NotImplementedError("Méthode à implémenter")
-    
+        if self._bloom is not None and checksum not in self.checksums:
+            if len(self.checksums) >= self._bloom_capacity:
+                self._allocate_bloom(2 * self._bloom_capacity)
+            cast(BloomFilter, self._bloom).add(digest_key(checksum))
+        self.checksums[checksum] = media_id
+
     def remove(self, checksum: str) -> None:
         """Retire un checksum de l'index.
-        
+
+        Le filtre de Bloom n'est pas modifiable : le checksum retiré y
+        reste jusqu'à sa prochaine reconstruction, ce qui ne coûte
+        qu'un faux positif de ``might_contain``.
+
         Args:
             checksum: Checksum à retirer
         """
-        # TODO: Retirer de l'index
-        raise NotImplementedError("Méthode à implémenter")
+        self.checksums.pop(checksum, None)
+
+    def memory_usage(self) -> int:
+        """Estime la mémoire occupée par l'index.
+
+        Returns:
+            Taille en octets du dictionnaire, de ses chaînes et du
+            filtre de Bloom
+        """
+        return (
+            sys.getsizeof(self.checksums)
+            + sum(
+                sys.getsizeof(checksum) + sys.getsizeof(media_id)
+                for checksum, media_id in self.checksums.items()
+            )
+            + (len(self._bloom.buffer) if self._bloom is not None else 0)
+        )
+
+    def __len__(self) -> int:
+        """Nombre de checksums indexés."""
+        return len(self.checksums)
+
+    def __contains__(self, checksum: str) -> bool:
+        """True si le checksum est indexé."""
+        return checksum in self.checksums
+
+    def _allocate_bloom(self, capacity: int) -> None:
+        """(Re)construit le filtre de Bloom pour ``capacity`` entrées."""
+        bloom = BloomFilter.for_capacity(capacity, self.bloom_bits_per_item)
+        for checksum in self.checksums:
+            bloom.add(digest_key(checksum))
+        self._bloom, self._bloom_capacity = bloom, capacity
+
+
+class DeduplicationManager:
+    """Gestionnaire de déduplication adossé à la base de données.
+
+    Détecte les doublons en interrogeant l'index du préfixe de
+    ``MediaItem.checksum`` (``checksum_prefix``).
+
+    Attributes:
+        db: Gestionnaire de base de données
+        policy: Politique de gestion des doublons
+
+    Example:
+        >>> dedup = DeduplicationManager(db, policy=DuplicatePolicy.REFERENCE)
+        >>> if dedup.is_duplicate(checksum):
+        ...     media = dedup.find_duplicate(checksum)
+    """
+
+    def __init__(
+        self, db: DatabaseManager, policy: DuplicatePolicy = DuplicatePolicy.REFERENCE
+    ):
+        """Initialise le gestionnaire de déduplication.
+
+        Args:
+            db: Instance de DatabaseManager
+            policy: Politique de gestion des doublons
+        """
+        self.db = db
+        self.policy = policy
+
+    def find_duplicate(
+        self, checksum: str, session: Optional[Session] = None
+    ) -> Optional[MediaItem]:
+        """Trouve le média correspondant à un checksum.
+
+        Args:
+            checksum: Checksum BLAKE2b à rechercher
+            session: Session à utiliser (optionnel). Sans session, le
+                MediaItem retourné est détaché.
+
+        Returns:
+            MediaItem existant ou None
+        """
+        if session is not None:
+            return session.query(MediaItem).filter(checksum_condition(checksum)).first()
+
+        with self.db.get_read_session() as own_session:
+            return (
+                own_session.query(MediaItem)
+                .filter(checksum_condition(checksum))
+                .first()
+            )
+
+    def find_duplicates_many(
+        self,
+        checksums: Iterable[str],
+        session: Optional[Session] = None,
+        chunk_size: int = DUPLICATE_LOOKUP_CHUNK_SIZE,
+    ) -> Dict[str, MediaItem]:
+        """Trouve les médias correspondant à un lot de checksums.
+
+        Une requête par tranche de ``chunk_size`` checksums distincts
+        (``checksum_prefix IN (...) AND checksum IN (...)``, résolue par
+        l'index du préfixe) au lieu d'une requête par checksum.
+
+        Args:
+            checksums: Checksums BLAKE2b à rechercher (doublons tolérés)
+            session: Session à utiliser (optionnel). Sans session, les
+                MediaItem retournés sont détachés.
+            chunk_size: Nombre de checksums par requête
+
+        Returns:
+            Dictionnaire {checksum: MediaItem} des seuls checksums trouvés
+
+        Raises:
+            ValueError: Si chunk_size est inférieur à 1
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be >= 1, got {chunk_size}")
+        if session is None:
+            with self.db.get_read_session() as own_session:
+                return self.find_duplicates_many(checksums, own_session, chunk_size)
+
+        unique = list(dict.fromkeys(checksums))
+        found: Dict[str, MediaItem] = {}
+        for start in range(0, len(unique), chunk_size):
+            chunk = unique[start : start + chunk_size]
+            prefixes = {checksum_prefix(c) for c in chunk}
+            medias = session.scalars(
+                select(MediaItem).where(
+                    MediaItem.checksum_prefix.in_(prefixes),
+                    MediaItem.checksum.in_(chunk),
+                )
+            )
+            for media in medias:
+                found.setdefault(media.checksum, media)
+        return found
+
+    def probe_file(
+        self, file_path: Union[str, Path], session: Optional[Session] = None
+    ) -> DuplicateProbe:
+        """Préfiltre un fichier sans calculer son checksum complet.
+
+        Deux étapes : aucun média de même taille ne peut être un doublon ;
+        sinon, seul un média de même taille et de même checksum partiel
+        (début et fin du fichier) peut l'être. Les médias antérieurs au
+        préfiltre (sans checksum partiel) restent candidats dès que la
+        taille correspond.
+
+        Args:
+            file_path: Chemin du fichier
+            session: Session à utiliser (optionnel)
+
+        Returns:
+            DuplicateProbe décrivant le résultat du préfiltre
+        """
+        if session is None:
+            with self.db.get_read_session() as own_session:
+                return self.probe_file(file_path, session=own_session)
+
+        size = os.stat(file_path).st_size
+        same_size = session.query(MediaItem.id).filter(MediaItem.size == size)
+        if not session.query(same_size.exists()).scalar():
+            return DuplicateProbe(size, None, False)
+
+        partial_checksum = compute_partial_blake2b(file_path)
+        candidates = same_size.filter(
+            or_(
+                MediaItem.partial_checksum == partial_checksum,
+                MediaItem.partial_checksum.is_(None),
+            )
+        )
+        candidate = session.query(candidates.exists()).scalar()
+        return DuplicateProbe(size, partial_checksum, candidate)
+
+    def find_duplicate_for_file(
+        self, file_path: Union[str, Path], session: Optional[Session] = None
+    ) -> Tuple[Optional[MediaItem], Optional[str]]:
+        """Recherche un doublon d'un fichier en ne hachant que si nécessaire.
+
+        Le checksum complet n'est calculé que si le préfiltre
+        (taille puis checksum partiel) signale un candidat.
+
+        Args:
+            file_path: Chemin du fichier
+            session: Session à utiliser (optionnel)
+
+        Returns:
+            Tuple (média existant ou None, checksum complet ou None s'il
+            n'a pas été calculé)
+        """
+        probe = self.probe_file(file_path, session=session)
+        if not probe.candidate:
+            return None, None
+
+        checksum = compute_blake2b(file_path)
+        return self.find_duplicate(checksum, session=session), checksum
+
+    def is_duplicate(self, checksum: str) -> bool:
+        """Vérifie si un checksum existe déjà.
+
+        Args:
+            checksum: Checksum BLAKE2b à vérifier
+
+        Returns:
+            True si un média possède déjà ce checksum
+        """
+        with self.db.get_read_session() as session:
+            return bool(
+                session.query(
+                    session.query(MediaItem.id)
+                    .filter(checksum_condition(checksum))
+                    .exists()
+                ).scalar()
+            )
+
+    def get_duplicates_count(self, checksum: str) -> int:
+        """Compte les médias possédant un checksum donné.
+
+        Args:
+            checksum: Checksum BLAKE2b
+
+        Returns:
+            Nombre de médias correspondants
+        """
+        with self.db.get_read_session() as session:
+            count: int = (
+                session.query(func.count(MediaItem.id))
+                .filter(checksum_condition(checksum))
+                .scalar()
+            )
+            return count
+
+    def list_all_duplicates(self) -> List[Dict[str, Any]]:
+        """Liste les checksums présents plusieurs fois.
+
+        Returns:
+            Liste de dictionnaires ``{"checksum", "count"}``
+        """
+        with self.db.get_read_session() as session:
+            rows = (
+                session.query(MediaItem.checksum, func.count(MediaItem.id))
+                .group_by(MediaItem.checksum_prefix, MediaItem.checksum)
+                .having(func.count(MediaItem.id) > 1)
+                .all()
+            )
+            return [{"checksum": checksum, "count": count} for checksum, count in rows]
@@ -0,0 +1,355 @@
+"""Index plein texte (SQLite FTS5) des médias.
+
+Ce module maintient deux tables virtuelles qui indexent, pour chaque
+média, son nom de fichier original, son chemin de stockage et le texte
+d'une sélection de métadonnées (titres, artistes, descriptions EXIF,
+étiquettes personnalisées) :
+
+- ``media_fts`` (tokenizer ``unicode61``) sert la recherche classée par
+  mots et préfixes de mots (``search_text``) ;
+- ``media_fts_trigram`` (tokenizer ``trigram``) sert la recherche de
+  sous-chaînes (``search(query=...)``).
+
+Chaque ligne a pour rowid celui du média dans ``media_items``. Les
+triggers sur ``media_items`` ajoutent, renomment et suppriment les
+lignes par rowid. Les triggers sur ``metadata`` ne font que noter le
+média dans ``media_fts_pending`` : le texte des métadonnées de chaque
+média noté est recalculé une seule fois par transaction, juste avant sa
+validation (``flush_pending_fulltext``, appelé par ``DatabaseManager``
+sur l'événement ``commit`` de son moteur), quel que soit le nombre de
+métadonnées écrites.
+"""
+
+import logging
+import re
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import ColumnClause, and_, column, literal_column, or_, table
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.elements import ColumnElement
+
+from .metadata_filters import _escape_like
+
+logger = logging.getLogger(__name__)
+
+# Métadonnées dont la valeur est indexée en plein texte
+FTS_METADATA_KEYS: Tuple[str, ...] = (
+    "audio.title",
+    "audio.artist",
+    "audio.album",
+    "audio.albumartist",
+    "audio.genre",
+    "audio.comment",
+    "audio.tit2",
+    "audio.tpe1",
+    "audio.talb",
+    "exif.ImageDescription",
+    "exif.Artist",
+    "exif.XPTitle",
+    "exif.XPSubject",
+    "exif.XPKeywords",
+    "exif.XPComment",
+    "exif.UserComment",
+    "exif.camera_model",
+    "video.tag.title",
+    "video.tag.artist",
+    "video.tag.comment",
+    "video.tag.description",
+)
+
+# Préfixes de clés indexées (étiquettes et champs personnalisés)
+FTS_METADATA_PREFIXES: Tuple[str, ...] = ("custom.",)
+
+# Colonnes interrogées par les recherches (media_id n'est pas indexé,
+# il sert à la jointure avec media_items)
+FTS_SEARCH_COLUMNS = "{filename path metadata_text}"
+
+# Tables virtuelles tenues à jour à l'identique
+FTS_TABLES = ("media_fts", "media_fts_trigram")
+
+# Nombre minimal de caractères d'un terme servi par l'index trigram
+# (les termes plus courts sont cherchés par LIKE, sans index)
+TRIGRAM_MIN_LENGTH = 3
+
+# Construction légère pour les requêtes (les tables virtuelles ne sont pas
+# déclarées dans Base.metadata, create_all ne sait pas les créer)
+media_fts = table(
+    "media_fts",
+    column("rowid"),
+    column("media_id"),
+    column("filename"),
+    column("path"),
+    column("metadata_text"),
+)
+media_fts_trigram = table(
+    "media_fts_trigram",
+    column("rowid"),
+    column("media_id"),
+    column("filename"),
+    column("path"),
+    column("metadata_text"),
+)
+
+# Expressions désignant les tables elles-mêmes (opérande de MATCH et bm25)
+MEDIA_FTS: ColumnClause[Any] = literal_column("media_fts")
+MEDIA_FTS_TRIGRAM: ColumnClause[Any] = literal_column("media_fts_trigram")
+
+# Poids bm25 par colonne : media_id, filename, path, metadata_text
+BM25_WEIGHTS = (0.0, 10.0, 2.0, 5.0)
+
+_TRIGGERS = (
+    "media_fts_ai",
+    "media_fts_au",
+    "media_fts_ad",
+    "metadata_fts_ai",
+    "metadata_fts_au",
+    "metadata_fts_ad",
+)
+
+
+def _indexed_key_condition(alias: str) -> str:
+    """Condition SQL vraie si la clé de la ligne ``alias`` est indexée."""
+    keys = ", ".join(f"'{key}'" for key in FTS_METADATA_KEYS)
+    prefixes = " OR ".join(
+        f"{alias}.key LIKE '{prefix}%'" for prefix in FTS_METADATA_PREFIXES
+    )
+    return f"({alias}.key IN ({keys}) OR {prefixes})"
+
+
+def _metadata_text(media_id: str) -> str:
+    """Sous-requête SQL concaténant les métadonnées indexées d'un média."""
+    return (
+        "(SELECT coalesce(group_concat(m.value, ' '), '') FROM metadata AS m "
+        f"WHERE m.media_id = {media_id} AND {_indexed_key_condition('m')})"
+    )
+
+
+def _mark_pending(media_id: str) -> str:
+    """Instruction notant un média dont le texte est à recalculer."""
+    return f"INSERT OR IGNORE INTO media_fts_pending (media_id) VALUES ({media_id}); "
+
+
+def _ddl() -> Tuple[str, ...]:
+    """Instructions de création des tables virtuelles et des triggers."""
+    columns = "media_id UNINDEXED, filename, path, metadata_text"
+    insert = "".join(
+        f"INSERT INTO {fts} (rowid, media_id, filename, path, metadata_text) "
+        "VALUES (new.rowid, new.id, new.original_filename, new.path, ''); "
+        for fts in FTS_TABLES
+    )
+    rename = "".join(
+        f"UPDATE {fts} SET filename = new.original_filename, path = new.path "
+        "WHERE rowid = new.rowid; "
+        for fts in FTS_TABLES
+    )
+    delete = "".join(f"DELETE FROM {fts} WHERE rowid = old.rowid; " for fts in FTS_TABLES)
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS media_fts USING fts5({columns}, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS media_fts_trigram USING fts5({columns}, "
+        "tokenize = 'trigram')",
+        "CREATE TABLE IF NOT EXISTS media_fts_pending "
+        "(media_id VARCHAR(36) PRIMARY KEY) WITHOUT ROWID",
+        f"CREATE TRIGGER IF NOT EXISTS media_fts_ai AFTER INSERT ON media_items BEGIN "
+        f"{insert}END",
+        "CREATE TRIGGER IF NOT EXISTS media_fts_au "
+        f"AFTER UPDATE OF original_filename, path ON media_items BEGIN {rename}END",
+        f"CREATE TRIGGER IF NOT EXISTS media_fts_ad AFTER DELETE ON media_items BEGIN "
+        f"{delete}END",
+        "CREATE TRIGGER IF NOT EXISTS metadata_fts_ai AFTER INSERT ON metadata "
+        f"WHEN {_indexed_key_condition('new')} BEGIN "
+        f"{_mark_pending('new.media_id')}END",
+        "CREATE TRIGGER IF NOT EXISTS metadata_fts_au "
+        "AFTER UPDATE OF key, value, media_id ON metadata "
+        f"WHEN {_indexed_key_condition('old')} "
+        f"OR {_indexed_key_condition('new')} BEGIN "
+        f"{_mark_pending('old.media_id')}{_mark_pending('new.media_id')}END",
+        "CREATE TRIGGER IF NOT EXISTS metadata_fts_ad AFTER DELETE ON metadata "
+        f"WHEN {_indexed_key_condition('old')} BEGIN "
+        f"{_mark_pending('old.media_id')}END",
+    )
+
+
+def _is_current(conn: Connection) -> bool:
+    """Vérifie que les tables de l'index existent (disposition actuelle)."""
+    names = {
+        row[0]
+        for row in conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name IN ('media_fts', 'media_fts_trigram', 'media_fts_pending')"
+        )
+    }
+    return len(names) == 3
+
+
+def create_fulltext_index(conn: Connection) -> bool:
+    """Crée les tables de l'index et leurs triggers s'ils n'existent pas.
+
+    Lorsque l'index est créé sur une base contenant déjà des médias, ou
+    remplace un index d'une version précédente (lignes repérées par
+    ``media_id`` et non par rowid), il est peuplé à partir des tables
+    existantes.
+
+    Args:
+        conn: Connexion dans une transaction
+
+    Returns:
+        True si l'index vient d'être créé
+    """
+    exists = _is_current(conn)
+    if not exists:
+        drop_fulltext_index(conn)
+
+    for statement in _ddl():
+        conn.exec_driver_sql(statement)
+
+    if not exists:
+        count = rebuild_fulltext_index(conn)
+        if count:
+            logger.info(f"Full-text index built for {count} existing media")
+    return not exists
+
+
+def flush_pending_fulltext(conn: Connection) -> int:
+    """Recalcule le texte des métadonnées des médias notés par les triggers.
+
+    Chaque média noté dans ``media_fts_pending`` voit sa colonne
+    ``metadata_text`` recalculée une seule fois, dans les deux tables,
+    quel que soit le nombre de métadonnées écrites depuis.
+
+    Args:
+        conn: Connexion dans une transaction
+
+    Returns:
+        Nombre de médias mis à jour
+    """
+    if conn.exec_driver_sql("SELECT 1 FROM media_fts_pending LIMIT 1").first() is None:
+        return 0
+
+    rows = (
+        "SELECT mi.rowid FROM media_fts_pending AS p "
+        "JOIN media_items AS mi ON mi.id = p.media_id"
+    )
+    result = conn.exec_driver_sql(
+        f"UPDATE media_fts SET metadata_text = {_metadata_text('media_fts.media_id')} "
+        f"WHERE rowid IN ({rows})"
+    )
+    conn.exec_driver_sql(
+        "UPDATE media_fts_trigram SET metadata_text = "
+        "(SELECT f.metadata_text FROM media_fts AS f "
+        "WHERE f.rowid = media_fts_trigram.rowid) "
+        f"WHERE rowid IN ({rows})"
+    )
+    conn.exec_driver_sql("DELETE FROM media_fts_pending")
+    return result.rowcount
+
+
+def rebuild_fulltext_index(conn: Connection) -> int:
+    """Reconstruit entièrement l'index à partir des tables sources.
+
+    Args:
+        conn: Connexion dans une transaction
+
+    Returns:
+        Nombre de médias indexés
+    """
+    for fts in FTS_TABLES:
+        conn.exec_driver_sql(f"DELETE FROM {fts}")
+    conn.exec_driver_sql("DELETE FROM media_fts_pending")
+    # Texte de tous les médias en une seule agrégation de metadata
+    result = conn.exec_driver_sql(
+        "INSERT INTO media_fts (rowid, media_id, filename, path, metadata_text) "
+        "SELECT mi.rowid, mi.id, mi.original_filename, mi.path, "
+        "coalesce(t.text, '') FROM media_items AS mi LEFT JOIN ("
+        "SELECT m.media_id, group_concat(m.value, ' ') AS text FROM metadata AS m "
+        f"WHERE {_indexed_key_condition('m')} GROUP BY m.media_id"
+        ") AS t ON t.media_id = mi.id"
+    )
+    conn.exec_driver_sql(
+        "INSERT INTO media_fts_trigram (rowid, media_id, filename, path, metadata_text) "
+        "SELECT rowid, media_id, filename, path, metadata_text FROM media_fts"
+    )
+    for fts in FTS_TABLES:
+        conn.exec_driver_sql(f"INSERT INTO {fts} ({fts}) VALUES ('optimize')")
+    return result.rowcount
+
+
+def drop_fulltext_index(conn: Connection) -> None:
+    """Supprime les tables de l'index et leurs triggers.
+
+    Args:
+        conn: Connexion dans une transaction
+    """
+    for trigger in _TRIGGERS:
+        conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+    for name in FTS_TABLES + ("media_fts_pending",):
+        conn.exec_driver_sql(f"DROP TABLE IF EXISTS {name}")
+
+
+def build_match_query(text: str, prefix: bool = True) -> Optional[str]:
+    """Convertit une saisie libre en requête FTS5 sûre.
+
+    Chaque mot devient une chaîne entre guillemets (les opérateurs FTS5
+    de la saisie sont neutralisés) ; tous les mots sont requis. Avec
+    ``prefix``, chaque mot est recherché comme préfixe (« vac » trouve
+    « vacances »).
+
+    Args:
+        text: Saisie de l'utilisateur
+        prefix: Si True, recherche par préfixe
+
+    Returns:
+        Expression MATCH, ou None si la saisie ne contient aucun mot
+
+    Example:
+        >>> build_match_query("plage été")
+        '{filename path metadata_text} : ("plage"* AND "été"*)'
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    star = "*" if prefix else ""
+    terms = " AND ".join(f'"{word}"{star}' for word in words)
+    return f"{FTS_SEARCH_COLUMNS} : ({terms})"
+
+
+def substring_condition(text: str) -> Optional[ColumnElement[bool]]:
+    """Condition de recherche de sous-chaînes sur ``media_fts_trigram``.
+
+    La saisie est découpée sur les espaces ; chaque fragment doit
+    apparaître, sans tenir compte de la casse, dans le nom, le chemin ou
+    les métadonnées textuelles. Les fragments d'au moins
+    ``TRIGRAM_MIN_LENGTH`` caractères sont cherchés par l'index trigram,
+    les plus courts par ``LIKE`` (parcours de la table).
+
+    Args:
+        text: Saisie de l'utilisateur
+
+    Returns:
+        Condition sur ``media_fts_trigram``, ou None si la saisie est vide
+
+    Example:
+        >>> condition = substring_condition("IMG 12")  # "12" cherché par LIKE
+        >>> select(media_fts_trigram.c.media_id).where(condition)
+    """
+    fragments = text.split()
+    if not fragments:
+        return None
+
+    conditions: List[ColumnElement[bool]] = []
+    indexed = [f for f in fragments if len(f) >= TRIGRAM_MIN_LENGTH]
+    if indexed:
+        terms = " AND ".join('"{}"'.format(f.replace('"', '""')) for f in indexed)
+        conditions.append(MEDIA_FTS_TRIGRAM.match(f"{FTS_SEARCH_COLUMNS} : ({terms})"))
+    for fragment in fragments:
+        if len(fragment) >= TRIGRAM_MIN_LENGTH:
+            continue
+        pattern = f"%{_escape_like(fragment)}%"
+        conditions.append(
+            or_(
+                media_fts_trigram.c.filename.like(pattern, escape="\\"),
+                media_fts_trigram.c.path.like(pattern, escape="\\"),
+                media_fts_trigram.c.metadata_text.like(pattern, escape="\\"),
+            )
+        )
+    return and_(*conditions)
@@ -0,0 +1,800 @@
+"""Import en masse de fichiers dans une collection.
+
+Ce module implémente un pipeline par étapes pour importer de grands
+volumes de fichiers : parcours des répertoires → stat et hachage →
+déduplication → placement dans le stockage → extraction de métadonnées
+→ écriture en base par lots. Chaque étape dispose de ses propres
+threads et communique avec la suivante par une file bornée, ce qui
+limite la mémoire consommée et ralentit les étapes amont lorsque l'aval
+sature (back-pressure). Les résultats sont produits au fil de l'eau.
+
+Comme ``MediaCollection.add_media_to_collection``, l'étape de hachage
+passe d'abord par le préfiltre de déduplication (taille puis checksum
+partiel), évalué par lot : un fichier sans candidat en base est copié
+(ou découpé en blocs) et haché en une seule lecture, le placement se
+réduisant ensuite à un ``os.replace``, et son checksum n'est pas
+recherché en base.
+"""
+
+import json
+import logging
+import os
+import queue
+import stat
+import threading
+import uuid
+from enum import Enum
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from sqlalchemy import select
+
+from .checksum import compute_blake2b, compute_partial_blake2b
+from .models import Collection, MediaItem, collection_items
+from .storage import StorageMode
+
+if TYPE_CHECKING:
+    from .chunk_store import ChunkRef
+    from .collection import MediaCollection
+    from .perceptual import ImageHashes
+
+logger = logging.getLogger(__name__)
+
+# Marqueur de fin de flux entre deux étapes
+_DONE = object()
+
+# Délai d'attente des files, pour réagir à une annulation
+_POLL_INTERVAL = 0.1
+
+
+class ImportStatus(Enum):
+    """Issue de l'import d'un fichier.
+
+    ADDED: Nouveau média créé et ajouté à la collection
+    LINKED: Média existant (doublon) ajouté à la collection
+    ALREADY_PRESENT: Média existant déjà présent dans la collection
+    FAILED: Échec de l'import (voir ``error``)
+    """
+
+    ADDED = "added"
+    LINKED = "linked"
+    ALREADY_PRESENT = "already_present"
+    FAILED = "failed"
+
+
+class ImportResult(NamedTuple):
+    """Résultat de l'import d'un fichier.
+
+    Attributes:
+        path: Chemin du fichier source
+        media_id: Identifiant du média (None en cas d'échec)
+        status: Issue de l'import
+        error: Exception levée, None en cas de succès
+    """
+
+    path: Path
+    media_id: Optional[str]
+    status: ImportStatus
+    error: Optional[Exception] = None
+
+
+class _ImportItem:
+    """État d'un fichier au fil des étapes du pipeline.
+
+    ``checksum`` est renseigné par l'étape de hachage et ``media_id`` par
+    celle de déduplication ; les étapes suivantes ne voient que des
+    éléments qui les ont franchies. ``candidate`` vaut False lorsque le
+    préfiltre garantit qu'aucun média en base n'a ce contenu, None s'il
+    n'a pas conclu. ``staged_path`` (copie temporaire faite pendant le
+    hachage) et ``placed_path`` (fichier placé dans le stockage) sont
+    supprimés si le média n'est finalement pas écrit.
+    """
+
+    __slots__ = (
+        "path",
+        "stat",
+        "stat_before",
+        "candidate",
+        "checksum",
+        "partial_checksum",
+        "media_id",
+        "is_new",
+        "duplicate_of_pending",
+        "stored_path",
+        "staged_path",
+        "placed_path",
+        "metadata",
+        "image_hashes",
+        "chunks",
+    )
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.stat: Optional[os.stat_result] = None
+        self.stat_before: Optional[os.stat_result] = None
+        self.candidate: Optional[bool] = None
+        self.checksum = ""
+        self.partial_checksum: Optional[str] = None
+        self.media_id = ""
+        self.is_new = False
+        self.duplicate_of_pending = False
+        self.stored_path: Optional[str] = None
+        self.staged_path: Optional[Path] = None
+        self.placed_path: Optional[Path] = None
+        self.metadata: Dict[str, Any] = {}
+        self.image_hashes: Optional["ImageHashes"] = None
+        self.chunks: Optional[List["ChunkRef"]] = None
+
+
+class _Stage:
+    """Étape du pipeline : un pool de threads consommant une file bornée.
+
+    Si ``prepare`` est fourni, chaque thread retire d'un coup les
+    éléments disponibles (jusqu'à ``batch_size``) et appelle
+    ``prepare`` sur le lot avant ``func`` sur chaque élément.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[_ImportItem], Optional[_ImportItem]],
+        workers: int,
+        prepare: Optional[Callable[[List[_ImportItem]], None]] = None,
+    ):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.prepare = prepare
+
+
+class BulkImporter:
+    """Pipeline d'import en masse pour une MediaCollection.
+
+    Attributes:
+        collection: Gestionnaire de collections cible
+        hash_workers: Threads de hachage
+        io_workers: Threads de placement dans le stockage
+        metadata_workers: Threads d'extraction de métadonnées
+        batch_size: Nombre de médias écrits par transaction
+        queue_size: Capacité des files entre étapes
+
+    Example:
+        >>> importer = BulkImporter(collection, hash_workers=8)
+        >>> for result in importer.run(coll_id, [Path("/photos")]):
+        ...     print(result.status, result.path)
+    """
+
+    def __init__(
+        self,
+        collection: "MediaCollection",
+        hash_workers: Optional[int] = None,
+        io_workers: int = 4,
+        metadata_workers: int = 4,
+        batch_size: int = 500,
+        queue_size: int = 1000,
+    ):
+        """Initialise le pipeline.
+
+        Args:
+            collection: Gestionnaire de collections cible
+            hash_workers: Threads de hachage (défaut: nombre de CPU)
+            io_workers: Threads de placement dans le stockage
+            metadata_workers: Threads d'extraction de métadonnées
+            batch_size: Nombre de médias écrits par transaction
+            queue_size: Capacité des files entre étapes
+
+        Raises:
+            ValueError: Si un paramètre est inférieur à 1
+        """
+        self.collection = collection
+        self.hash_workers = hash_workers or os.cpu_count() or 1
+        self.io_workers = io_workers
+        self.metadata_workers = metadata_workers
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+
+        for name in (
+            "hash_workers",
+            "io_workers",
+            "metadata_workers",
+            "batch_size",
+            "queue_size",
+        ):
+            if getattr(self, name) < 1:
+                raise ValueError(f"{name} must be >= 1, got {getattr(self, name)}")
+
+    def run(
+        self,
+        collection_id: str,
+        paths: Iterable[Union[str, Path]],
+        custom_metadata: Optional[Dict[str, Any]] = None,
+        copy_file: bool = True,
+    ) -> Iterator[ImportResult]:
+        """Importe des fichiers et répertoires dans une collection.
+
+        Les répertoires sont parcourus récursivement. Interrompre
+        l'itération annule le pipeline ; les lots déjà écrits restent
+        en base.
+
+        Args:
+            collection_id: ID de la collection cible
+            paths: Fichiers et/ou répertoires à importer
+            custom_metadata: Métadonnées personnalisées appliquées à chaque média
+            copy_file: Si True, place les fichiers dans le stockage
+
+        Returns:
+            Itérateur d'ImportResult, produits au fil des écritures en base
+
+        Raises:
+            ValueError: Si la collection n'existe pas
+        """
+        with self.collection.db.get_read_session() as session:
+            if session.get(Collection, collection_id) is None:
+                raise ValueError(f"Collection not found: {collection_id}")
+
+        run = _PipelineRun(self, collection_id, custom_metadata, copy_file)
+        return run.execute(paths)
+
+
+class _PipelineRun:
+    """Exécution unique du pipeline (files, threads et état partagé)."""
+
+    def __init__(
+        self,
+        importer: BulkImporter,
+        collection_id: str,
+        custom_metadata: Optional[Dict[str, Any]],
+        copy_file: bool,
+    ):
+        self.importer = importer
+        self.collection = importer.collection
+        self.collection_id = collection_id
+        self.custom_metadata = custom_metadata or {}
+        self.copy_file = copy_file
+
+        self.cancelled = threading.Event()
+        self.results: "queue.Queue[Any]" = queue.Queue(maxsize=importer.queue_size)
+
+        # Checksums rencontrés pendant cet import -> (media_id, nouveau média)
+        self._seen: Dict[str, Tuple[str, bool]] = {}
+        self._seen_lock = threading.Lock()
+        # Checksums recherchés en base par lot -> media_id existant ou None
+        self._existing: Dict[str, Optional[str]] = {}
+        # Périphérique source -> mode de placement attendu
+        self._modes: Dict[int, StorageMode] = {}
+        # Exception levée par l'itération de ``paths`` (relevée à la fin)
+        self._walk_error: Optional[Exception] = None
+
+        self.stages = [
+            _Stage("hash", self._hash, importer.hash_workers, prepare=self._prefilter),
+            _Stage("dedup", self._dedup, 1, prepare=self._lookup_duplicates),
+            _Stage("store", self._store, importer.io_workers),
+            _Stage("metadata", self._extract_metadata, importer.metadata_workers),
+        ]
+
+    def execute(self, paths: Iterable[Union[str, Path]]) -> Iterator[ImportResult]:
+        """Démarre les threads et produit les résultats."""
+        size = self.importer.queue_size
+        queues: List["queue.Queue[Any]"] = [
+            queue.Queue(maxsize=size) for _ in range(len(self.stages) + 1)
+        ]
+
+        threads = [
+            threading.Thread(
+                target=self._walk,
+                args=(paths, queues[0], self.stages[0].workers),
+                name="import-walk",
+                daemon=True,
+            )
+        ]
+        for i, stage in enumerate(self.stages):
+            downstream = self.stages[i + 1].workers if i + 1 < len(self.stages) else 1
+            threads.append(
+                threading.Thread(
+                    target=self._run_stage,
+                    args=(stage, queues[i], queues[i + 1], downstream),
+                    name=f"import-{stage.name}",
+                    daemon=True,
+                )
+            )
+        threads.append(
+            threading.Thread(
+                target=self._write,
+                args=(queues[-1],),
+                name="import-write",
+                daemon=True,
+            )
+        )
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                result = self.results.get()
+                if result is _DONE:
+                    break
+                yield result
+            if self._walk_error is not None:
+                raise self._walk_error
+        finally:
+            # Arrêt anticipé : les threads terminent l'élément en cours
+            # (le lot déjà formé est écrit) avant de rendre la main
+            self.cancelled.set()
+            for thread in threads:
+                thread.join()
+            # Éléments abandonnés dans les files : copies non écrites en base
+            for q in queues:
+                while True:
+                    try:
+                        item = q.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, _ImportItem):
+                        self._discard(item)
+
+    # -- Plomberie -----------------------------------------------------
+
+    def _put(self, q: "queue.Queue[Any]", item: Any) -> bool:
+        """Dépose un élément en respectant la capacité de la file."""
+        while not self.cancelled.is_set():
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: "queue.Queue[Any]", timeout: Optional[float] = None) -> Any:
+        """Retire un élément, ou _DONE si le pipeline est annulé."""
+        waited = 0.0
+        while not self.cancelled.is_set():
+            try:
+                return q.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                waited += _POLL_INTERVAL
+                if timeout is not None and waited >= timeout:
+                    raise
+        return _DONE
+
+    @staticmethod
+    def _discard(item: _ImportItem) -> None:
+        """Supprime les copies d'un élément qui ne sera pas écrit en base."""
+        for path in (item.staged_path, item.placed_path):
+            if path is not None:
+                path.unlink(missing_ok=True)
+        item.staged_path = item.placed_path = None
+
+    def _fail(self, item: _ImportItem, error: Exception) -> None:
+        """Signale l'échec d'un fichier et supprime ses copies."""
+        logger.error(f"Import failed for {item.path}: {error}")
+        self._discard(item)
+        self._put(
+            self.results, ImportResult(item.path, None, ImportStatus.FAILED, error)
+        )
+
+    def _walk(
+        self,
+        paths: Iterable[Union[str, Path]],
+        out_q: "queue.Queue[Any]",
+        consumers: int,
+    ) -> None:
+        """Étape 1 : énumère les fichiers (parcours récursif des répertoires).
+
+        Un répertoire ou un chemin illisible produit un résultat FAILED
+        et le parcours continue. Une exception levée par l'itération de
+        ``paths`` elle-même est relevée par ``execute`` après les
+        résultats déjà produits.
+        """
+
+        def walk_error(error: OSError) -> None:
+            failed = Path(error.filename) if error.filename else path
+            self._fail(_ImportItem(failed), error)
+
+        try:
+            for raw_path in paths:
+                path = Path(raw_path)
+                try:
+                    if path.is_dir():
+                        for root, dirs, files in os.walk(path, onerror=walk_error):
+                            dirs.sort()
+                            for name in sorted(files):
+                                if not self._put(out_q, _ImportItem(Path(root) / name)):
+                                    return
+                    elif not self._put(out_q, _ImportItem(path)):
+                        return
+                except OSError as e:
+                    self._fail(_ImportItem(path), e)
+        except Exception as e:
+            logger.error(f"Directory walk failed: {e}")
+            self._walk_error = e
+        finally:
+            for _ in range(consumers):
+                self._put(out_q, _DONE)
+
+    def _run_stage(
+        self,
+        stage: _Stage,
+        in_q: "queue.Queue[Any]",
+        out_q: "queue.Queue[Any]",
+        consumers: int,
+    ) -> None:
+        """Fait tourner le pool de threads d'une étape."""
+
+        def worker() -> None:
+            done = False
+            while not done:
+                item = self._get(in_q)
+                if item is _DONE:
+                    return
+                batch = [item]
+                if stage.prepare is not None:
+                    while len(batch) < self.importer.batch_size:
+                        try:
+                            item = in_q.get_nowait()
+                        except queue.Empty:
+                            break
+                        if item is _DONE:
+                            done = True
+                            break
+                        batch.append(item)
+                    try:
+                        stage.prepare(batch)
+                    except Exception as e:
+                        # func traite alors chaque élément isolément
+                        logger.warning(
+                            f"Batch preparation failed in stage {stage.name}: {e}"
+                        )
+
+                for item in batch:
+                    try:
+                        forwarded = stage.func(item)
+                    except Exception as e:
+                        self._fail(item, e)
+                        continue
+                    if forwarded is not None and not self._put(out_q, forwarded):
+                        return
+
+        workers = [
+            threading.Thread(
+                target=worker, name=f"import-{stage.name}-{i}", daemon=True
+            )
+            for i in range(stage.workers)
+        ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        for _ in range(consumers):
+            self._put(out_q, _DONE)
+
+    # -- Étapes --------------------------------------------------------
+
+    def _prefilter(self, items: List[_ImportItem]) -> None:
+        """Étape 2 (préparation) : stat, cache de checksums et tailles d'un lot.
+
+        Une requête pour le cache de checksums et une pour les tailles
+        présentes en base : un fichier non caché d'une taille absente
+        est nouveau, sans lecture préalable ni recherche de son checksum.
+        """
+        statted = []
+        for item in items:
+            try:
+                item.stat_before = os.stat(item.path)
+            except OSError:
+                continue  # Signalé par _hash
+            statted.append((item, item.stat_before))
+
+        cache = self.collection.checksum_cache
+        if cache is not None:
+            cached = cache.lookup_many(st for _, st in statted)
+            for (item, _), checksum in zip(statted, cached):
+                item.checksum = checksum or ""
+
+        uncached = [(i, st) for i, st in statted if not i.checksum]
+        if not uncached:
+            return
+        with self.collection.db.get_read_session() as session:
+            known = set(
+                session.scalars(
+                    select(MediaItem.size)
+                    .where(MediaItem.size.in_({st.st_size for _, st in uncached}))
+                    .distinct()
+                )
+            )
+        for item, st in uncached:
+            if st.st_size not in known:
+                item.candidate = False
+
+    def _hash(self, item: _ImportItem) -> _ImportItem:
+        """Étape 2 : stat et calcul (ou réutilisation) des checksums.
+
+        Sans checksum en cache, le préfiltre de déduplication décide :
+        un fichier sans candidat en base est copié dans la zone
+        temporaire (ou découpé en blocs) pendant son hachage.
+        """
+        before = item.stat_before
+        if before is None and item.path.is_file():
+            before = os.stat(item.path)
+        if before is None or not stat.S_ISREG(before.st_mode):
+            raise FileNotFoundError(f"File not found: {item.path}")
+
+        collection = self.collection
+        cache = collection.checksum_cache
+        checksum = item.checksum
+        if not checksum and item.candidate is None and cache is not None:
+            checksum = cache.lookup(item.path, touch=False) or ""
+        partial_checksum = None
+        if not checksum:
+            if item.candidate is None:
+                probe = collection.dedup_manager.probe_file(item.path)
+                item.candidate = probe.candidate
+                partial_checksum = probe.partial_checksum
+            if not self.copy_file or item.candidate:
+                checksum = compute_blake2b(item.path)
+            elif collection.chunk_store is not None:
+                stored = collection.chunk_store.put(item.path)
+                checksum, item.chunks = stored.checksum, stored.chunks
+            elif self._placement_mode(item.path, before) is StorageMode.COPY:
+                item.staged_path, checksum = collection._stage_file(
+                    item.path, cache_checksum=False
+                )
+            else:
+                checksum = compute_blake2b(item.path)
+        item.partial_checksum = partial_checksum or compute_partial_blake2b(item.path)
+
+        after = os.stat(item.path)
+        item.checksum = checksum
+        # L'état n'est mis en cache que si le fichier n'a pas changé pendant le calcul
+        if (before.st_size, before.st_mtime_ns, before.st_ctime_ns) == (
+            after.st_size,
+            after.st_mtime_ns,
+            after.st_ctime_ns,
+        ):
+            item.stat = after
+        return item
+
+    def _placement_mode(self, path: Path, st: os.stat_result) -> StorageMode:
+        """Mode de placement attendu, mémorisé par périphérique source."""
+        mode = self._modes.get(st.st_dev)
+        if mode is None:
+            mode = self.collection.file_placer.resolve_mode(
+                path, self.collection.storage_path
+            )
+            self._modes[st.st_dev] = mode
+        return mode
+
+    def _lookup_duplicates(self, items: List[_ImportItem]) -> None:
+        """Étape 3 (préparation) : recherche en base des checksums d'un lot."""
+        with self._seen_lock:
+            checksums = {
+                i.checksum
+                for i in items
+                if i.candidate is not False and i.checksum not in self._seen
+            }
+        if not checksums:
+            return
+        found = self.collection.dedup_manager.find_duplicates_many(checksums)
+        existing = {c: (found[c].id if c in found else None) for c in checksums}
+        with self._seen_lock:
+            self._existing.update(existing)
+
+    def _dedup(self, item: _ImportItem) -> _ImportItem:
+        """Étape 3 : détection des doublons (en base et dans l'import en cours)."""
+        with self._seen_lock:
+            seen = self._seen.get(item.checksum)
+            if seen is not None:
+                item.media_id, pending = seen
+                item.duplicate_of_pending = pending
+                return item
+
+            if item.checksum in self._existing:
+                existing_id = self._existing.pop(item.checksum)
+            elif item.candidate is False:
+                existing_id = None
+            else:
+                existing = self.collection.dedup_manager.find_duplicate(item.checksum)
+                existing_id = existing.id if existing is not None else None
+            if existing_id is not None:
+                item.media_id = existing_id
+            else:
+                item.media_id = str(uuid.uuid4())
+                item.is_new = True
+            self._seen[item.checksum] = (item.media_id, item.is_new)
+        return item
+
+    def _store(self, item: _ImportItem) -> _ImportItem:
+        """Étape 4 : placement des nouveaux fichiers dans le stockage.
+
+        La copie temporaire d'un doublon est supprimée ; celle d'un
+        nouveau média est déplacée dans son répertoire de sharding.
+        """
+        if not item.is_new:
+            self._discard(item)
+            return item
+
+        if not self.copy_file:
+            item.stored_path = str(item.path)
+            return item
+
+        dest_path = self.collection._get_storage_path(item.checksum, item.path.suffix)
+        chunk_store = self.collection.chunk_store
+        if chunk_store is not None:
+            if item.chunks is None:
+                stored = chunk_store.put(item.path)
+                if stored.checksum != item.checksum:
+                    raise ValueError(f"File changed while being imported: {item.path}")
+                item.chunks = stored.chunks
+        else:
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            if item.staged_path is not None:
+                os.replace(item.staged_path, dest_path)
+                item.staged_path = None
+            else:
+                self.collection.file_placer.place(item.path, dest_path)
+            item.placed_path = dest_path
+        item.stored_path = str(dest_path.relative_to(self.collection.storage_path))
+        return item
+
+    def _extract_metadata(self, item: _ImportItem) -> _ImportItem:
+        """Étape 5 : métadonnées et empreintes perceptuelles des nouveaux médias."""
+        if item.is_new and self.collection.auto_extract_metadata:
+            try:
+                item.metadata = self.collection.metadata_extractor.extract(item.path)
+            except Exception as e:
+                logger.error(f"Failed to extract metadata: {e}")
+            item.image_hashes = self.collection._compute_image_hashes(item.path)
+        return item
+
+    def _write(self, in_q: "queue.Queue[Any]") -> None:
+        """Étape 6 : écriture en base par lots (une transaction par lot)."""
+        batch: List[_ImportItem] = []
+        # Doublons d'un média de cet import pas encore écrit
+        deferred: List[_ImportItem] = []
+        written: Set[str] = set()
+
+        try:
+            done = False
+            while not done:
+                try:
+                    item = self._get(in_q, timeout=0.5)
+                except queue.Empty:
+                    item = None
+
+                if item is _DONE:
+                    done = True
+                elif item is not None:
+                    batch.append(item)
+
+                if batch and (
+                    done or item is None or len(batch) >= self.importer.batch_size
+                ):
+                    ready = batch + deferred
+                    batch = []
+                    deferred = [
+                        i
+                        for i in ready
+                        if i.duplicate_of_pending
+                        and i.media_id not in written
+                        and not any(
+                            o.is_new and o.media_id == i.media_id for o in ready
+                        )
+                    ]
+                    to_write = [i for i in ready if i not in deferred]
+                    self._write_batch(to_write, written)
+
+            for item in deferred:
+                self._fail(
+                    item,
+                    RuntimeError("Original media of this duplicate failed to import"),
+                )
+        finally:
+            self._put(self.results, _DONE)
+
+    def _write_batch(self, items: List[_ImportItem], written: Set[str]) -> None:
+        """Écrit un lot de médias, liens de collection et métadonnées."""
+        if not items:
+            return
+
+        new_items = [i for i in items if i.is_new]
+        media_ids = {i.media_id for i in items}
+
+        db = self.collection.db
+        try:
+            with db.get_read_session() as session:
+                members = set(
+                    session.scalars(
+                        select(collection_items.c.media_id).where(
+                            collection_items.c.collection_id == self.collection_id,
+                            collection_items.c.media_id.in_(media_ids),
+                        )
+                    )
+                )
+
+            statuses = {}
+            with db.batch_writer(batch_size=len(items)) as writer:
+                for item in new_items:
+                    writer.add_media(
+                        id=item.media_id,
+                        checksum=item.checksum,
+                        partial_checksum=item.partial_checksum,
+                        path=item.stored_path,
+                        mime_type=self.collection._guess_mime_type(item.path),
+                        size=(
+                            item.stat.st_size if item.stat else item.path.stat().st_size
+                        ),
+                        original_filename=item.path.name,
+                    )
+                    for key, value in item.metadata.items():
+                        writer.add_metadata(
+                            item.media_id, key, str(value), source="auto"
+                        )
+                    if item.image_hashes is not None:
+                        writer.add_perceptual_hashes(item.media_id, *item.image_hashes)
+                    if item.chunks is not None:
+                        writer.add_chunks(item.media_id, item.chunks)
+
+                for item in items:
+                    if item.media_id in members:
+                        statuses[id(item)] = ImportStatus.ALREADY_PRESENT
+                    else:
+                        members.add(item.media_id)
+                        writer.add_link(self.collection_id, item.media_id)
+                        statuses[id(item)] = (
+                            ImportStatus.ADDED if item.is_new else ImportStatus.LINKED
+                        )
+                        for key, value in self.custom_metadata.items():
+                            writer.add_metadata(
+                                item.media_id,
+                                f"custom.{key}",
+                                (
+                                    json.dumps(value)
+                                    if isinstance(value, (dict, list))
+                                    else str(value)
+                                ),
+                                source="user",
+                            )
+        except Exception as e:
+            for item in items:
+                self._fail(item, e)
+            return
+
+        written.update(i.media_id for i in new_items)
+        self.collection.invalidate_cache(
+            media_ids=media_ids, collection_ids=[self.collection_id]
+        )
+        self.collection._index_image_hashes(
+            {
+                i.media_id: i.image_hashes
+                for i in new_items
+                if i.image_hashes is not None
+            }
+        )
+        logger.info(f"Imported batch of {len(items)} files ({len(new_items)} new)")
+
+        cache = self.collection.checksum_cache
+        if cache is not None:
+            try:
+                cache.store_many(
+                    (i.stat, i.checksum) for i in items if i.stat is not None
+                )
+            except Exception as e:
+                logger.warning(f"Failed to update checksum cache: {e}")
+
+        for item in items:
+            self._put(
+                self.results, ImportResult(item.path, item.media_id, statuses[id(item)])
+            )
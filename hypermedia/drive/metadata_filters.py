@@ -0,0 +1,314 @@
+"""Filtres de recherche sur les métadonnées.
+
+Ce module traduit les filtres ``metadata_filters`` de
+``MediaCollection.search`` en conditions SQL sur les colonnes typées de
+``Metadata`` (``value``, ``value_num``, ``value_time``), chacune couverte
+par un index composite ``(key, colonne)``.
+
+Un filtre associe une clé à une valeur (égalité exacte) ou à un
+dictionnaire d'opérateurs :
+
+    {"exif.Make": "Canon"}                       # égalité
+    {"image.width": {"gte": 1920}}               # comparaison numérique
+    {"exif.DateTimeOriginal": {"lt": "2026-01-01"}}
+    {"audio.genre": {"in": ["Jazz", "Blues"]}}
+    {"custom.note": {"contains": "plage"}}       # sous-chaîne (non indexée)
+
+Une valeur seule était auparavant recherchée comme sous-chaîne
+(``LIKE '%v%'``) ; elle teste désormais l'égalité, qui utilise l'index
+``(key, value)``. ``{"contains": v}`` conserve l'ancien comportement.
+
+Plusieurs filtres sont compilés par ``MetadataFilterCompiler`` en une
+seule condition : le filtre estimé le plus sélectif (statistiques de
+cardinalité par clé, table ``metadata_key_stats``) produit l'ensemble de
+départ, les autres sont vérifiés par des sous-requêtes ``EXISTS``
+corrélées sur l'index ``(media_id, key)``, du plus au moins sélectif.
+"""
+
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, exists, false, intersect, or_, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.sql.elements import ColumnElement
+
+from .models import Metadata, MetadataKeyStat, typed_value_columns
+
+logger = logging.getLogger(__name__)
+
+# Opérateurs de comparaison (colonne typée, opérande) -> condition
+_COMPARISONS: Dict[str, Callable[[Any, Any], ColumnElement]] = {
+    "eq": lambda column, operand: column == operand,
+    "ne": lambda column, operand: column != operand,
+    "gt": lambda column, operand: column > operand,
+    "gte": lambda column, operand: column >= operand,
+    "lt": lambda column, operand: column < operand,
+    "lte": lambda column, operand: column <= operand,
+}
+
+METADATA_OPERATORS = tuple(_COMPARISONS) + ("in", "contains")
+
+
+def _typed_operand(meta: Any, operand: Any) -> Tuple[Any, Any]:
+    """Choisit la colonne typée correspondant à un opérande.
+
+    Returns:
+        Tuple (colonne, opérande converti)
+    """
+    typed = typed_value_columns(operand)
+    if typed["value_num"] is not None:
+        return meta.value_num, typed["value_num"]
+    if typed["value_time"] is not None:
+        return meta.value_time, typed["value_time"]
+    return meta.value, str(operand)
+
+
+def _escape_like(text: str) -> str:
+    """Échappe les jokers LIKE d'une chaîne (caractère d'échappement ``\\``)."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def metadata_condition(meta: Any, key: str, spec: Any) -> ColumnElement:
+    """Construit la condition SQL d'un filtre de métadonnée.
+
+    Args:
+        meta: Entité ou alias de ``Metadata`` sur lequel porte le filtre
+        key: Clé de la métadonnée
+        spec: Valeur (égalité exacte) ou dictionnaire
+            ``{opérateur: opérande}``
+
+    Returns:
+        Condition SQL (clé et valeur)
+
+    Raises:
+        ValueError: Si un opérateur est inconnu ou un opérande invalide
+    """
+    operators = spec if isinstance(spec, dict) else {"eq": spec}
+    if not operators:
+        raise ValueError(f"Empty filter for metadata key '{key}'")
+
+    conditions = [meta.key == key]
+    for op, operand in operators.items():
+        if op in _COMPARISONS:
+            column, value = _typed_operand(meta, operand)
+            conditions.append(_COMPARISONS[op](column, value))
+        elif op == "in":
+            if isinstance(operand, (str, bytes)) or not hasattr(operand, "__iter__"):
+                raise ValueError(f"'in' filter on '{key}' expects a list of values")
+            options = [_typed_operand(meta, item) for item in operand]
+            conditions.append(or_(*(column == value for column, value in options)))
+        elif op == "contains":
+            pattern = f"%{_escape_like(str(operand))}%"
+            conditions.append(meta.value.like(pattern, escape="\\"))
+        else:
+            raise ValueError(
+                f"Unknown metadata operator '{op}' "
+                f"(expected one of {', '.join(METADATA_OPERATORS)})"
+            )
+    return and_(*conditions)
+
+
+# Fraction estimée des lignes d'une clé retenue par chaque opérateur
+_SELECTIVITY: Dict[str, float] = {
+    "eq": 0.05,
+    "in": 0.05,  # par valeur de la liste
+    "gt": 0.3,
+    "gte": 0.3,
+    "lt": 0.3,
+    "lte": 0.3,
+    "contains": 0.5,
+    "ne": 0.95,
+}
+
+STRATEGIES = ("exists", "intersect")
+
+
+def create_key_statistics(conn: Connection) -> bool:
+    """Crée les triggers tenant à jour ``metadata_key_stats``.
+
+    Lorsque les triggers sont créés sur une base contenant déjà des
+    métadonnées, les statistiques sont calculées à partir de la table.
+
+    Args:
+        conn: Connexion dans une transaction
+
+    Returns:
+        True si les triggers viennent d'être créés
+    """
+    exists_already = (
+        conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master "
+            "WHERE type = 'trigger' AND name = 'metadata_stats_ai'"
+        ).first()
+        is not None
+    )
+
+    for statement in (
+        "CREATE TRIGGER IF NOT EXISTS metadata_stats_ai AFTER INSERT ON metadata BEGIN "
+        "INSERT INTO metadata_key_stats (key, row_count) VALUES (new.key, 1) "
+        "ON CONFLICT (key) DO UPDATE SET row_count = row_count + 1; "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS metadata_stats_ad AFTER DELETE ON metadata BEGIN "
+        "UPDATE metadata_key_stats SET row_count = row_count - 1 WHERE key = old.key; "
+        "END",
+        "CREATE TRIGGER IF NOT EXISTS metadata_stats_au "
+        "AFTER UPDATE OF key ON metadata "
+        "WHEN old.key <> new.key BEGIN "
+        "UPDATE metadata_key_stats SET row_count = row_count - 1 WHERE key = old.key; "
+        "INSERT INTO metadata_key_stats (key, row_count) VALUES (new.key, 1) "
+        "ON CONFLICT (key) DO UPDATE SET row_count = row_count + 1; "
+        "END",
+    ):
+        conn.exec_driver_sql(statement)
+
+    if not exists_already:
+        conn.exec_driver_sql("DELETE FROM metadata_key_stats")
+        conn.exec_driver_sql(
+            "INSERT INTO metadata_key_stats (key, row_count) "
+            "SELECT key, count(*) FROM metadata GROUP BY key"
+        )
+    return not exists_already
+
+
+class MetadataFilterCompiler:
+    """Compile un ensemble de filtres de métadonnées en une condition SQL.
+
+    Les filtres sont ordonnés par nombre de lignes estimé (cardinalité
+    de la clé multipliée par la sélectivité des opérateurs). Une clé
+    absente de la base rend la recherche vide sans requête
+    supplémentaire.
+
+    Attributes:
+        strategy: "exists" (ensemble de départ + EXISTS corrélés) ou
+            "intersect" (INTERSECT des ensembles de chaque filtre)
+        plan: Après compile(), liste ordonnée (clé, lignes estimées)
+
+    Example:
+        >>> compiler = MetadataFilterCompiler(session)
+        >>> condition = compiler.compile(
+        ...     {"exif.Make": "Canon", "image.width": {"gte": 1920}}, MediaItem.id
+        ... )
+        >>> compiler.plan
+        [('exif.Make', 120), ('image.width', 2400)]
+    """
+
+    def __init__(self, session: Session, strategy: str = "exists"):
+        """Initialise le compilateur.
+
+        Args:
+            session: Session utilisée pour lire les statistiques
+            strategy: Stratégie de compilation ("exists" ou "intersect")
+
+        Raises:
+            ValueError: Si la stratégie est inconnue
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(
+                f"Unknown filter strategy '{strategy}' "
+                f"(expected one of {', '.join(STRATEGIES)})"
+            )
+        self.session = session
+        self.strategy = strategy
+        self.plan: List[Tuple[str, int]] = []
+
+    def key_counts(self, keys: Iterable[str]) -> Dict[str, int]:
+        """Lit le nombre de lignes de chaque clé (0 si absente).
+
+        Args:
+            keys: Clés de métadonnées
+
+        Returns:
+            Dictionnaire {clé: nombre de lignes}
+        """
+        keys = list(keys)
+        counts = dict.fromkeys(keys, 0)
+        counts.update(
+            self.session.execute(
+                select(MetadataKeyStat.key, MetadataKeyStat.row_count).where(
+                    MetadataKeyStat.key.in_(keys)
+                )
+            ).all()
+        )
+        return counts
+
+    @staticmethod
+    def estimate(row_count: int, spec: Any) -> int:
+        """Estime le nombre de lignes retenues par un filtre.
+
+        Args:
+            row_count: Nombre de lignes portant la clé
+            spec: Spécification du filtre (valeur ou opérateurs)
+
+        Returns:
+            Nombre de lignes estimé (0 seulement si la clé est absente)
+        """
+        if row_count == 0:
+            return 0
+        operators = spec if isinstance(spec, dict) else {"eq": spec}
+        fraction = 1.0
+        for op, operand in operators.items():
+            factor = _SELECTIVITY.get(op, 1.0)
+            if op == "in" and hasattr(operand, "__len__"):
+                factor = min(1.0, factor * len(operand))
+            fraction *= factor
+        return max(1, round(row_count * fraction))
+
+    def compile(
+        self, filters: Dict[str, Any], media_id_column: Any
+    ) -> Optional[ColumnElement]:
+        """Compile les filtres en une condition portant sur ``media_id_column``.
+
+        Args:
+            filters: Filtres {clé: valeur ou opérateurs}
+            media_id_column: Colonne identifiant le média dans la requête
+                englobante (ex: ``MediaItem.id``)
+
+        Returns:
+            Condition SQL, ou None si aucun filtre
+
+        Raises:
+            ValueError: Si un filtre est invalide
+        """
+        if not filters:
+            self.plan = []
+            return None
+
+        counts = self.key_counts(filters)
+        ordered = sorted(
+            (
+                (self.estimate(counts[key], spec), key, spec)
+                for key, spec in filters.items()
+            ),
+            key=lambda planned: planned[0],
+        )
+        self.plan = [(key, estimated) for estimated, key, _ in ordered]
+        logger.debug(f"Metadata filter plan: {self.plan}")
+
+        # Conditions construites avant tout court-circuit : un filtre
+        # invalide est signalé même si la recherche est vide
+        branches = []
+        for _, key, spec in ordered:
+            meta = aliased(Metadata)
+            branches.append((meta, metadata_condition(meta, key, spec)))
+
+        if ordered[0][0] == 0:
+            return false()
+
+        if self.strategy == "intersect":
+            intersected: ColumnElement[bool] = media_id_column.in_(
+                intersect(
+                    *(select(meta.media_id).where(cond) for meta, cond in branches)
+                )
+                if len(branches) > 1
+                else select(branches[0][0].media_id).where(branches[0][1])
+            )
+            return intersected
+
+        first_meta, first_cond = branches[0]
+        conditions = [
+            media_id_column.in_(select(first_meta.media_id).where(first_cond))
+        ]
+        for meta, cond in branches[1:]:
+            conditions.append(exists().where(meta.media_id == media_id_column, cond))
+        return and_(*conditions)
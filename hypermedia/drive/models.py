@@ -4,21 +4,30 @@ Ce module définit les modèles de données pour le stockage
 des médias et métadonnées dans SQLite.
 """
 
+import re
 import uuid
-from datetime import datetime
-from typing import List, Optional
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from sqlalchemy import (
+    DDL,
+    BigInteger,
     Column,
     DateTime,
+    Float,
     ForeignKey,
+    Index,
     Integer,
+    LargeBinary,
     String,
     Table,
     Text,
-    BigInteger,
+    event,
 )
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy.engine import Connection, Dialect
+from sqlalchemy.engine.default import DefaultExecutionContext
+from sqlalchemy.orm import DeclarativeBase, Mapped, Mapper, mapped_column, relationship
+from sqlalchemy.types import TypeDecorator
 
 
 class Base(DeclarativeBase):
@@ -27,6 +36,113 @@ class Base(DeclarativeBase):
     pass
 
 
+# Checksum hexadécimal canonique (minuscules, nombre pair de chiffres)
+_HEX_DIGEST_RE = re.compile(r"^(?:[0-9a-f]{2})+$")
+
+
+def checksum_bytes(checksum: str) -> bytes:
+    """Forme binaire d'un checksum.
+
+    Un checksum hexadécimal canonique est décodé (64 octets pour un
+    BLAKE2b-512) ; toute autre chaîne est conservée encodée en UTF-8.
+
+    Args:
+        checksum: Checksum hexadécimal
+
+    Returns:
+        Octets du checksum
+    """
+    if _HEX_DIGEST_RE.match(checksum):
+        return bytes.fromhex(checksum)
+    return checksum.encode()
+
+
+def checksum_prefix(checksum: str) -> int:
+    """Préfixe de 8 octets d'un checksum, en entier signé 64 bits.
+
+    Clé de l'index ``ix_media_items_checksum_prefix`` : huit fois plus
+    courte que le checksum hexadécimal, et sélective (une collision
+    de préfixe entre deux contenus distincts est improbable avant des
+    milliards de médias).
+
+    Args:
+        checksum: Checksum hexadécimal
+
+    Returns:
+        Entier signé big-endian formé des 8 premiers octets
+
+    Example:
+        >>> checksum_prefix("00000000000000ff" + "00" * 56)
+        255
+    """
+    return int.from_bytes(
+        checksum_bytes(checksum)[:8].ljust(8, b"\0"), "big", signed=True
+    )
+
+
+class HexDigest(TypeDecorator):
+    """Checksum stocké en binaire et exposé en hexadécimal.
+
+    Les checksums hexadécimaux canoniques sont écrits sous forme de BLOB
+    (deux fois plus compacts que le texte) et relus en hexadécimal : la
+    conversion n'a lieu qu'à la frontière avec la base. Les chaînes qui
+    ne sont pas un hexadécimal canonique sont stockées telles quelles
+    en texte, ce qui préserve leur valeur à la relecture.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def bind_processor(self, dialect: Dialect) -> Callable[[Optional[str]], Any]:
+        def process(value: Optional[str]) -> Any:
+            if value is not None and _HEX_DIGEST_RE.match(value):
+                return bytes.fromhex(value)
+            return value
+
+        return process
+
+    def result_processor(
+        self, dialect: Dialect, coltype: object
+    ) -> Callable[[Any], Optional[str]]:
+        def process(value: Any) -> Optional[str]:
+            if isinstance(value, (bytes, memoryview)):
+                return bytes(value).hex()
+            return None if value is None else str(value)
+
+        return process
+
+
+class UnsignedInt64(TypeDecorator):
+    """Entier non signé de 64 bits stocké en entier SQLite signé.
+
+    Les valeurs supérieures à 2**63 - 1 sont rangées en complément à
+    deux (empreintes perceptuelles).
+    """
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(
+        self, value: Optional[int], dialect: Dialect
+    ) -> Optional[int]:
+        if value is not None and value >= 1 << 63:
+            return value - (1 << 64)
+        return value
+
+    def process_result_value(
+        self, value: Optional[int], dialect: Dialect
+    ) -> Optional[int]:
+        if value is not None and value < 0:
+            return value + (1 << 64)
+        return value
+
+
+def _default_checksum_prefix(context: DefaultExecutionContext) -> Optional[int]:
+    """Valeur par défaut de ``checksum_prefix`` (insertions ORM et Core)."""
+    checksum = context.get_current_parameters().get("checksum")
+    return checksum_prefix(checksum) if checksum is not None else None
+
+
 # Table d'association many-to-many pour Collection <-> MediaItem
 collection_items = Table(
     "collection_items",
@@ -45,7 +161,12 @@ class MediaItem(Base):
 
     Attributes:
         id: Identifiant unique (UUID)
-        checksum: Checksum BLAKE2b du fichier (hex digest)
+        checksum: Checksum BLAKE2b du fichier (hex digest, stocké en
+            BLOB de 64 octets)
+        checksum_prefix: 8 premiers octets du checksum (entier indexé,
+            clé des recherches de doublons)
+        partial_checksum: Checksum du début et de la fin du fichier
+            (préfiltre de déduplication)
         path: Chemin relatif dans le stockage
         mime_type: Type MIME du fichier
         size: Taille en bytes
@@ -57,13 +178,22 @@ class MediaItem(Base):
     """
 
     __tablename__ = "media_items"
+    __table_args__ = (
+        Index("ix_media_items_checksum_prefix", "checksum_prefix"),
+        Index("ix_media_items_size_partial", "size", "partial_checksum"),
+        Index("ix_media_items_created_id", "created_at", "id"),
+    )
 
     id: Mapped[str] = mapped_column(
         String(36), primary_key=True, default=lambda: str(uuid.uuid4())
     )
-    checksum: Mapped[str] = mapped_column(
-        String(128), unique=True, index=True, nullable=False
+    # Unicité garantie par des triggers s'appuyant sur l'index du
+    # préfixe (voir DatabaseManager), sans index sur le checksum complet
+    checksum: Mapped[str] = mapped_column(HexDigest, nullable=False)
+    checksum_prefix: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=_default_checksum_prefix
     )
+    partial_checksum: Mapped[Optional[str]] = mapped_column(String(64))
     path: Mapped[str] = mapped_column(String(512), nullable=False)
     mime_type: Mapped[Optional[str]] = mapped_column(String(128))
     size: Mapped[int] = mapped_column(BigInteger, nullable=False)
@@ -82,6 +212,12 @@ class MediaItem(Base):
     metadata: Mapped[List["Metadata"]] = relationship(
         "Metadata", back_populates="media_item", cascade="all, delete-orphan"
     )
+    perceptual_hash: Mapped[Optional["PerceptualHash"]] = relationship(
+        "PerceptualHash", cascade="all, delete-orphan", passive_deletes=True
+    )
+    chunks: Mapped[List["MediaChunk"]] = relationship(
+        "MediaChunk", cascade="all, delete-orphan", passive_deletes=True
+    )
 
     def __repr__(self) -> str:
         return f"<MediaItem(id={self.id[:8]}, checksum={self.checksum[:16]}, filename={self.original_filename})>"
@@ -136,19 +272,29 @@ class Metadata(Base):
         media_id: Référence au média
         key: Clé de la métadonnée (ex: 'exif.camera_model')
         value: Valeur (stockée en JSON si complexe)
+        value_num: Valeur numérique (entiers et réels), None si non numérique
+        value_time: Valeur date/heure (UTC), None si non temporelle
         source: Source de la métadonnée (auto/user/import/api)
         created_at: Date de création
         media_item: Relation vers le MediaItem
     """
 
     __tablename__ = "metadata"
+    __table_args__ = (
+        Index("ix_metadata_media_key", "media_id", "key"),
+        Index("ix_metadata_key_value", "key", "value"),
+        Index("ix_metadata_key_num", "key", "value_num"),
+        Index("ix_metadata_key_time", "key", "value_time"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     media_id: Mapped[str] = mapped_column(
-        String(36), ForeignKey("media_items.id"), nullable=False, index=True
+        String(36), ForeignKey("media_items.id"), nullable=False
     )
-    key: Mapped[str] = mapped_column(String(256), nullable=False, index=True)
+    key: Mapped[str] = mapped_column(String(256), nullable=False)
     value: Mapped[str] = mapped_column(Text, nullable=False)
+    value_num: Mapped[Optional[float]] = mapped_column(Float)
+    value_time: Mapped[Optional[datetime]] = mapped_column(DateTime)
     source: Mapped[str] = mapped_column(
         String(32), nullable=False, default="user"
     )  # auto, user, import, api
@@ -161,3 +307,291 @@ class Metadata(Base):
 
     def __repr__(self) -> str:
         return f"<Metadata(media_id={self.media_id[:8]}, key={self.key}, source={self.source})>"
+
+
+class PerceptualHash(Base):
+    """Empreintes perceptuelles d'une image (quasi-doublons).
+
+    Attributes:
+        media_id: Référence au média
+        ahash: Empreinte moyenne (64 bits)
+        dhash: Empreinte de gradients (64 bits)
+        phash: Empreinte DCT (64 bits)
+        created_at: Date du calcul
+    """
+
+    __tablename__ = "perceptual_hashes"
+
+    media_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("media_items.id", ondelete="CASCADE"), primary_key=True
+    )
+    ahash: Mapped[int] = mapped_column(UnsignedInt64, nullable=False)
+    dhash: Mapped[int] = mapped_column(UnsignedInt64, nullable=False)
+    phash: Mapped[int] = mapped_column(UnsignedInt64, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<PerceptualHash(media_id={self.media_id[:8]}, phash={self.phash:016x})>"
+        )
+
+
+class Chunk(Base):
+    """Bloc de contenu du stockage par blocs (``ChunkStore``).
+
+    Attributes:
+        digest: Checksum BLAKE2b du bloc (nom du fichier du bloc)
+        size: Taille du bloc en bytes
+        created_at: Date de première écriture
+    """
+
+    __tablename__ = "chunks"
+
+    digest: Mapped[str] = mapped_column(HexDigest, primary_key=True)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return f"<Chunk(digest={self.digest[:16]}, size={self.size})>"
+
+
+class MediaChunk(Base):
+    """Entrée du manifeste d'un média stocké par blocs.
+
+    Attributes:
+        media_id: Référence au média
+        seq: Rang du bloc dans le fichier (à partir de 0)
+        offset: Position du bloc dans le fichier
+        size: Taille du bloc en bytes
+        chunk_digest: Référence au bloc
+    """
+
+    __tablename__ = "media_chunks"
+    __table_args__ = (Index("ix_media_chunks_digest", "chunk_digest"),)
+
+    media_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("media_items.id", ondelete="CASCADE"), primary_key=True
+    )
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True)
+    offset: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    chunk_digest: Mapped[str] = mapped_column(
+        HexDigest, ForeignKey("chunks.digest"), nullable=False
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<MediaChunk(media_id={self.media_id[:8]}, seq={self.seq}, "
+            f"size={self.size})>"
+        )
+
+
+class MetadataKeyStat(Base):
+    """Statistiques de cardinalité d'une clé de métadonnée.
+
+    Nombre de lignes ``metadata`` par clé, tenu à jour par des triggers
+    SQLite. Sert à ordonner les filtres de recherche du plus au moins
+    sélectif.
+
+    Attributes:
+        key: Clé de la métadonnée
+        row_count: Nombre de lignes portant cette clé
+    """
+
+    __tablename__ = "metadata_key_stats"
+
+    key: Mapped[str] = mapped_column(String(256), primary_key=True)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<MetadataKeyStat(key={self.key}, row_count={self.row_count})>"
+
+
+class MediaChange(Base):
+    """Journal des ajouts et suppressions de médias.
+
+    Alimenté par des triggers SQLite sur ``media_items``. Le dernier
+    numéro de séquence attribué (``sqlite_sequence``) sert de marque de
+    progression : un index de déduplication persisté qui l'a enregistré
+    se met à jour en relisant les changements suivants.
+
+    Attributes:
+        seq: Numéro de séquence (strictement croissant)
+        op: "I" (média ajouté) ou "D" (média supprimé)
+        media_id: Identifiant du média
+        checksum: Checksum du média
+    """
+
+    __tablename__ = "media_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    op: Mapped[str] = mapped_column(String(1), nullable=False)
+    media_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    checksum: Mapped[str] = mapped_column(HexDigest, nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"<MediaChange(seq={self.seq}, op={self.op}, media_id={self.media_id[:8]})>"
+        )
+
+
+# Nombres décimaux (ex: "1920", "-2.5", "1e3") et dates ISO 8601 ou EXIF
+_NUMBER_RE = re.compile(r"^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$")
+_ISO_DATE_RE = re.compile(
+    r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?(Z|[+-]\d{2}:?\d{2})?$"
+)
+_EXIF_DATE_RE = re.compile(r"^\d{4}:\d{2}:\d{2} \d{2}:\d{2}:\d{2}$")
+
+
+def typed_value_columns(value: Any) -> Dict[str, Any]:
+    """Détermine les colonnes typées d'une valeur de métadonnée.
+
+    Les nombres (hors booléens) renseignent ``value_num``, les dates
+    ``value_time`` (ramenées en UTC sans fuseau). Les chaînes sont
+    analysées : « 1920 » est numérique, « 2026-10-17T12:00:00 » et
+    « 2026:10:17 12:00:00 » (EXIF) sont des dates.
+
+    Args:
+        value: Valeur d'origine ou sérialisée
+
+    Returns:
+        Dictionnaire ``{"value_num": ..., "value_time": ...}``
+
+    Example:
+        >>> typed_value_columns("1920")
+        {'value_num': 1920.0, 'value_time': None}
+    """
+    num: Optional[float] = None
+    when: Optional[datetime] = None
+
+    if isinstance(value, bool):
+        pass
+    elif isinstance(value, (int, float)):
+        num = float(value)
+    elif isinstance(value, datetime):
+        when = value
+    elif isinstance(value, date):
+        when = datetime(value.year, value.month, value.day)
+    elif isinstance(value, str):
+        text = value.strip()
+        if _NUMBER_RE.match(text):
+            num = float(text)
+        else:
+            try:
+                if _ISO_DATE_RE.match(text):
+                    when = datetime.fromisoformat(text.replace("Z", "+00:00"))
+                elif _EXIF_DATE_RE.match(text):
+                    when = datetime.strptime(text, "%Y:%m:%d %H:%M:%S")
+            except ValueError:
+                pass  # Forme de date mais valeur invalide (mois 13...)
+
+    if when is not None and when.tzinfo is not None:
+        when = when.astimezone(timezone.utc).replace(tzinfo=None)
+    if num is not None and num != num:  # NaN : non comparable
+        num = None
+    return {"value_num": num, "value_time": when}
+
+
+# Unicité des checksums : vérifiée via l'index du préfixe (8 octets)
+# plutôt que par un index UNIQUE sur le checksum complet (64 octets).
+# Créés avec la table, et par init_schema sur les bases antérieures.
+_CHECKSUM_UNIQUE_CONDITION = (
+    "SELECT 1 FROM media_items AS mi WHERE mi.checksum_prefix = new.checksum_prefix "
+    "AND mi.checksum = new.checksum"
+)
+CHECKSUM_TRIGGERS: Tuple[str, ...] = (
+    "CREATE TRIGGER IF NOT EXISTS media_items_checksum_bi BEFORE INSERT ON media_items "
+    f"WHEN EXISTS ({_CHECKSUM_UNIQUE_CONDITION}) BEGIN "
+    "SELECT RAISE(ABORT, 'UNIQUE constraint failed: media_items.checksum'); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS media_items_checksum_bu "
+    "BEFORE UPDATE OF checksum, checksum_prefix ON media_items "
+    f"WHEN EXISTS ({_CHECKSUM_UNIQUE_CONDITION} AND mi.id <> new.id) BEGIN "
+    "SELECT RAISE(ABORT, 'UNIQUE constraint failed: media_items.checksum'); "
+    "END",
+)
+
+
+# Alimentation de media_changes (la table est résolue à l'exécution des
+# triggers : ils peuvent être créés avant elle)
+MEDIA_CHANGE_TRIGGERS: Tuple[str, ...] = (
+    "CREATE TRIGGER IF NOT EXISTS media_changes_ai AFTER INSERT ON media_items BEGIN "
+    "INSERT INTO media_changes (op, media_id, checksum) "
+    "VALUES ('I', new.id, new.checksum); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS media_changes_ad AFTER DELETE ON media_items BEGIN "
+    "INSERT INTO media_changes (op, media_id, checksum) "
+    "VALUES ('D', old.id, old.checksum); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS media_changes_au "
+    "AFTER UPDATE OF checksum ON media_items "
+    "WHEN old.checksum IS NOT new.checksum BEGIN "
+    "INSERT INTO media_changes (op, media_id, checksum) "
+    "VALUES ('D', old.id, old.checksum); "
+    "INSERT INTO media_changes (op, media_id, checksum) "
+    "VALUES ('I', new.id, new.checksum); "
+    "END",
+)
+
+for _statement in CHECKSUM_TRIGGERS + MEDIA_CHANGE_TRIGGERS:
+    event.listen(MediaItem.__table__, "after_create", DDL(_statement))
+
+
+@event.listens_for(MediaItem, "before_update")
+def _set_checksum_prefix(
+    mapper: Mapper[MediaItem], connection: Connection, target: MediaItem
+) -> None:
+    """Recalcule le préfixe d'un checksum modifié via l'ORM."""
+    if target.checksum is not None:
+        target.checksum_prefix = checksum_prefix(target.checksum)
+
+
+@event.listens_for(Metadata, "before_insert")
+@event.listens_for(Metadata, "before_update")
+def _set_typed_value(
+    mapper: Mapper[Metadata], connection: Connection, target: Metadata
+) -> None:
+    """Renseigne les colonnes typées des métadonnées écrites via l'ORM."""
+    for column, typed in typed_value_columns(target.value).items():
+        setattr(target, column, typed)
+
+
+class ChecksumCacheEntry(Base):
+    """Entrée du cache persistant de checksums.
+
+    Associe l'identité d'un fichier source (périphérique, inode) et
+    son état (taille, dates de modification) au checksum calculé, pour
+    éviter de re-hacher un fichier inchangé lors d'un nouvel import.
+
+    Attributes:
+        device: Identifiant du périphérique (st_dev)
+        inode: Numéro d'inode (st_ino)
+        size: Taille en bytes au moment du calcul
+        mtime_ns: Date de modification du contenu (ns)
+        ctime_ns: Date de changement de statut (ns)
+        checksum: Checksum BLAKE2b calculé
+        last_used_at: Date de dernière utilisation (éviction LRU)
+    """
+
+    __tablename__ = "checksum_cache"
+
+    device: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    inode: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    mtime_ns: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    ctime_ns: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    checksum: Mapped[str] = mapped_column(String(128), nullable=False)
+    last_used_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False, index=True
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<ChecksumCacheEntry(device={self.device}, inode={self.inode}, "
+            f"checksum={self.checksum[:16]})>"
+        )
@@ -0,0 +1,492 @@
+"""Empreintes perceptuelles et recherche de quasi-doublons d'images.
+
+Ce module calcule trois empreintes de 64 bits par image (aHash, dHash,
+pHash) qui restent proches quand l'image est réencodée, redimensionnée
+ou légèrement retouchée, et fournit ``PerceptualIndex``, un index en
+mémoire (index multiple de sous-chaînes) qui retrouve les empreintes à
+distance de Hamming bornée sans comparer la requête à toutes les images.
+
+Pillow est requis pour le calcul des empreintes ; NumPy (extra
+``perceptual``), s'il est installé, accélère la transformée en cosinus
+de pHash.
+"""
+
+import logging
+import math
+from enum import Enum
+from functools import lru_cache
+from itertools import combinations
+from pathlib import Path
+from typing import (
+    Any,
+    BinaryIO,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from sqlalchemy import select
+
+from .database import DatabaseManager
+from .models import PerceptualHash
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps
+
+    PILLOW_AVAILABLE = True
+except ImportError:
+    PILLOW_AVAILABLE = False
+    logger.warning("Pillow not available - perceptual hashes disabled")
+
+try:
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+HASH_SIZE = 8
+# Côté de l'image réduite dont pHash garde les basses fréquences
+PHASH_IMAGE_SIZE = 32
+
+# Cosinus de la DCT-II limitée aux HASH_SIZE premières fréquences
+_DCT_ROWS = [
+    [
+        math.cos(math.pi * (2 * n + 1) * k / (2 * PHASH_IMAGE_SIZE))
+        for n in range(PHASH_IMAGE_SIZE)
+    ]
+    for k in range(HASH_SIZE)
+]
+
+
+class HashAlgorithm(Enum):
+    """Algorithme d'empreinte perceptuelle.
+
+    AHASH: Pixels comparés à la moyenne (rapide, sensible aux retouches)
+    DHASH: Gradients horizontaux (robuste aux changements de luminosité)
+    PHASH: Basses fréquences de la DCT (le plus robuste)
+    """
+
+    AHASH = "ahash"
+    DHASH = "dhash"
+    PHASH = "phash"
+
+
+class ImageHashes(NamedTuple):
+    """Empreintes perceptuelles d'une image (entiers de 64 bits).
+
+    Attributes:
+        ahash: Empreinte moyenne
+        dhash: Empreinte de gradients
+        phash: Empreinte DCT
+    """
+
+    ahash: int
+    dhash: int
+    phash: int
+
+    def get(self, algorithm: HashAlgorithm) -> int:
+        """Empreinte d'un algorithme donné."""
+        value: int = getattr(self, algorithm.value)
+        return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Nombre de bits différents entre deux empreintes."""
+    return (a ^ b).bit_count()
+
+
+def _bits_to_int(bits: Iterable[bool]) -> int:
+    """Empreinte à partir de bits (le premier est le bit de poids fort)."""
+    value = 0
+    for bit in bits:
+        value = (value << 1) | bool(bit)
+    return value
+
+
+def _grayscale(image: "Image.Image", width: int, height: int) -> bytes:
+    """Pixels en niveaux de gris de l'image réduite, ligne par ligne."""
+    small = image.convert("L").resize((width, height), Image.Resampling.LANCZOS)
+    return small.tobytes()
+
+
+def compute_ahash(image: "Image.Image") -> int:
+    """Calcule l'empreinte moyenne (aHash) d'une image.
+
+    Args:
+        image: Image Pillow
+
+    Returns:
+        Empreinte de 64 bits
+    """
+    pixels = _grayscale(image, HASH_SIZE, HASH_SIZE)
+    mean = sum(pixels) / len(pixels)
+    return _bits_to_int(p > mean for p in pixels)
+
+
+def compute_dhash(image: "Image.Image") -> int:
+    """Calcule l'empreinte de gradients (dHash) d'une image.
+
+    Args:
+        image: Image Pillow
+
+    Returns:
+        Empreinte de 64 bits
+    """
+    width = HASH_SIZE + 1
+    pixels = _grayscale(image, width, HASH_SIZE)
+    return _bits_to_int(
+        pixels[row * width + col + 1] > pixels[row * width + col]
+        for row in range(HASH_SIZE)
+        for col in range(HASH_SIZE)
+    )
+
+
+def compute_phash(image: "Image.Image") -> int:
+    """Calcule l'empreinte DCT (pHash) d'une image.
+
+    L'image est réduite à 32x32 ; seuls les 8x8 coefficients de plus
+    basse fréquence de la DCT sont calculés et comparés à leur médiane.
+
+    Args:
+        image: Image Pillow
+
+    Returns:
+        Empreinte de 64 bits
+    """
+    size = PHASH_IMAGE_SIZE
+    pixels = _grayscale(image, size, size)
+
+    if NUMPY_AVAILABLE:
+        basis = np.array(_DCT_ROWS)
+        matrix = np.frombuffer(pixels, dtype=np.uint8).reshape(size, size).astype(float)
+        coefficients = (basis @ matrix @ basis.T).flatten().tolist()
+    else:
+        rows = [pixels[r * size : (r + 1) * size] for r in range(size)]
+        # DCT des lignes (basses fréquences seulement), puis des colonnes
+        row_dct = [
+            [sum(c * p for c, p in zip(cos, row)) for cos in _DCT_ROWS] for row in rows
+        ]
+        coefficients = [
+            sum(cos[r] * row_dct[r][u] for r in range(size))
+            for cos in _DCT_ROWS
+            for u in range(HASH_SIZE)
+        ]
+
+    ordered = sorted(coefficients)
+    median = (ordered[31] + ordered[32]) / 2
+    return _bits_to_int(c > median for c in coefficients)
+
+
+def compute_image_hashes(image_path: Union[str, Path, BinaryIO]) -> ImageHashes:
+    """Calcule les trois empreintes d'un fichier image.
+
+    L'orientation EXIF est appliquée avant le calcul : une copie
+    pivotée sans perte reste un quasi-doublon.
+
+    Args:
+        image_path: Chemin de l'image ou flux binaire ouvert
+
+    Returns:
+        ImageHashes de l'image
+
+    Raises:
+        RuntimeError: Si Pillow n'est pas installé
+        OSError: Si le fichier n'est pas une image lisible
+    """
+    if not PILLOW_AVAILABLE:
+        raise RuntimeError("Pillow is required to compute perceptual hashes")
+    with Image.open(image_path) as opened:
+        image = ImageOps.exif_transpose(opened)
+        return ImageHashes(
+            compute_ahash(image), compute_dhash(image), compute_phash(image)
+        )
+
+
+class MultiIndexHashTable:
+    """Recherche par distance de Hamming par index multiple.
+
+    Les empreintes de 64 bits sont découpées en ``chunks`` sous-chaînes
+    indexées chacune dans une table de hachage. Si deux empreintes sont
+    à distance au plus ``r``, l'une de leurs sous-chaînes diffère d'au
+    plus ``r // chunks`` bits (principe des tiroirs) : la recherche ne
+    consulte que les cases voisines de chaque sous-chaîne puis vérifie
+    la distance complète des candidats, au lieu de comparer la requête
+    à toutes les empreintes. Les lignes libérées par ``remove`` sont
+    réutilisées par les ajouts suivants.
+
+    Example:
+        >>> table = MultiIndexHashTable()
+        >>> table.add(0b1011, "a")
+        >>> table.search(0b1001, max_distance=1)
+        [(1, 'a')]
+    """
+
+    def __init__(self, bits: int = 64, chunks: int = 4):
+        """Initialise une table vide.
+
+        Args:
+            bits: Taille des empreintes en bits
+            chunks: Nombre de sous-chaînes (diviseur de ``bits``)
+
+        Raises:
+            ValueError: Si chunks ne divise pas bits
+        """
+        if chunks < 1 or bits % chunks:
+            raise ValueError(f"chunks must divide bits, got {chunks} for {bits} bits")
+        self.bits = bits
+        self.chunks = chunks
+        self._chunk_bits = bits // chunks
+        self._values: List[int] = []
+        self._items: List[Any] = []
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(chunks)]
+        self._free: List[int] = []  # lignes retirées, à réutiliser
+        self._size = 0
+
+    def add(self, value: int, item: Any) -> None:
+        """Ajoute un élément.
+
+        Args:
+            value: Empreinte
+            item: Élément associé (plusieurs éléments peuvent partager
+                une empreinte)
+        """
+        if self._free:
+            row = self._free.pop()
+            self._values[row] = value
+            self._items[row] = item
+        else:
+            row = len(self._values)
+            self._values.append(value)
+            self._items.append(item)
+        for table, chunk in zip(self._tables, self._split(value)):
+            table.setdefault(chunk, []).append(row)
+        self._size += 1
+
+    def remove(self, value: int, item: Any) -> bool:
+        """Retire un élément.
+
+        Args:
+            value: Empreinte sous laquelle l'élément a été ajouté
+            item: Élément à retirer
+
+        Returns:
+            True si l'élément était présent
+        """
+        chunks = self._split(value)
+        for row in self._tables[0].get(chunks[0], ()):
+            if self._values[row] == value and self._items[row] == item:
+                for table, chunk in zip(self._tables, chunks):
+                    table[chunk].remove(row)
+                    if not table[chunk]:
+                        del table[chunk]
+                self._items[row] = None
+                self._free.append(row)
+                self._size -= 1
+                return True
+        return False
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[int, Any]]:
+        """Recherche les éléments proches d'une empreinte.
+
+        Args:
+            value: Empreinte recherchée
+            max_distance: Distance de Hamming maximale (incluse)
+
+        Returns:
+            Liste de tuples (distance, élément) triée par distance
+        """
+        masks = _flip_masks(self._chunk_bits, max_distance // self.chunks)
+        values, items = self._values, self._items
+        seen: Set[int] = set()
+        found: List[Tuple[int, Any]] = []
+        for table, chunk in zip(self._tables, self._split(value)):
+            for mask in masks:
+                for row in table.get(chunk ^ mask, ()):
+                    if row in seen:
+                        continue
+                    seen.add(row)
+                    distance = (value ^ values[row]).bit_count()
+                    if distance <= max_distance:
+                        found.append((distance, items[row]))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    def __len__(self) -> int:
+        """Nombre d'éléments."""
+        return self._size
+
+    def _split(self, value: int) -> List[int]:
+        """Sous-chaînes d'une empreinte."""
+        size = self._chunk_bits
+        mask = (1 << size) - 1
+        return [(value >> (i * size)) & mask for i in range(self.chunks)]
+
+
+@lru_cache(maxsize=None)
+def _flip_masks(bits: int, radius: int) -> Tuple[int, ...]:
+    """Masques de ``bits`` bits ayant au plus ``radius`` bits à 1."""
+    return tuple(
+        sum(1 << i for i in positions)
+        for r in range(min(radius, bits) + 1)
+        for positions in combinations(range(bits), r)
+    )
+
+
+class PerceptualIndex:
+    """Index des empreintes perceptuelles des médias pour un algorithme.
+
+    Attributes:
+        algorithm: Algorithme d'empreinte indexé
+
+    Example:
+        >>> index = PerceptualIndex.from_database(db, HashAlgorithm.PHASH)
+        >>> index.find_similar(media_id, max_distance=8)
+        [('9f1c…', 3)]
+    """
+
+    def __init__(self, algorithm: HashAlgorithm = HashAlgorithm.PHASH):
+        """Initialise un index vide.
+
+        Args:
+            algorithm: Algorithme d'empreinte indexé
+        """
+        self.algorithm = algorithm
+        self._table = MultiIndexHashTable()
+        self._hashes: Dict[str, int] = {}
+
+    @classmethod
+    def from_database(
+        cls, db: DatabaseManager, algorithm: HashAlgorithm = HashAlgorithm.PHASH
+    ) -> "PerceptualIndex":
+        """Construit l'index à partir des empreintes enregistrées.
+
+        Args:
+            db: Instance de DatabaseManager
+            algorithm: Algorithme d'empreinte indexé
+
+        Returns:
+            Index contenant une empreinte par média haché
+        """
+        index = cls(algorithm)
+        column = getattr(PerceptualHash, algorithm.value)
+        with db.get_read_session() as session:
+            rows = session.execute(
+                select(PerceptualHash.media_id, column).execution_options(
+                    yield_per=10_000
+                )
+            )
+            for media_id, value in rows:
+                index.add(media_id, value)
+        logger.info(f"Perceptual index loaded: {len(index)} {algorithm.value} hashes")
+        return index
+
+    def add(self, media_id: str, value: int) -> None:
+        """Indexe (ou réindexe) l'empreinte d'un média.
+
+        Args:
+            media_id: Identifiant du média
+            value: Empreinte de 64 bits
+        """
+        self.remove(media_id)
+        self._hashes[media_id] = value
+        self._table.add(value, media_id)
+
+    def remove(self, media_id: str) -> None:
+        """Retire un média de l'index.
+
+        Args:
+            media_id: Identifiant du média
+        """
+        value = self._hashes.pop(media_id, None)
+        if value is not None:
+            self._table.remove(value, media_id)
+
+    def get(self, media_id: str) -> Optional[int]:
+        """Empreinte indexée d'un média (None si absente)."""
+        return self._hashes.get(media_id)
+
+    def search(self, value: int, max_distance: int) -> List[Tuple[str, int]]:
+        """Recherche les médias proches d'une empreinte.
+
+        Args:
+            value: Empreinte recherchée
+            max_distance: Distance de Hamming maximale (incluse)
+
+        Returns:
+            Liste de tuples (media_id, distance) triée par distance
+        """
+        return [
+            (media_id, d) for d, media_id in self._table.search(value, max_distance)
+        ]
+
+    def find_similar(self, media_id: str, max_distance: int) -> List[Tuple[str, int]]:
+        """Recherche les quasi-doublons d'un média indexé.
+
+        Args:
+            media_id: Identifiant du média
+            max_distance: Distance de Hamming maximale (incluse)
+
+        Returns:
+            Liste de tuples (media_id, distance) triée par distance, sans
+            le média lui-même (vide si le média n'est pas indexé)
+        """
+        value = self._hashes.get(media_id)
+        if value is None:
+            return []
+        return [
+            (other, d)
+            for other, d in self.search(value, max_distance)
+            if other != media_id
+        ]
+
+    def clusters(self, max_distance: int, min_size: int = 2) -> List[List[str]]:
+        """Regroupe les médias en grappes de quasi-doublons.
+
+        Deux médias à distance au plus ``max_distance`` sont dans la même
+        grappe, et la relation est transitive (composantes connexes).
+
+        Args:
+            max_distance: Distance de Hamming maximale (incluse)
+            min_size: Taille minimale des grappes retournées
+
+        Returns:
+            Grappes (identifiants triés), de la plus grande à la plus petite
+        """
+        parent: Dict[str, str] = {}
+
+        def find(media_id: str) -> str:
+            root = media_id
+            while parent.get(root, root) != root:
+                root = parent[root]
+            while media_id != root:
+                parent[media_id], media_id = root, parent[media_id]
+            return root
+
+        for media_id, value in self._hashes.items():
+            for other, _ in self.search(value, max_distance):
+                a, b = find(media_id), find(other)
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+
+        groups: Dict[str, List[str]] = {}
+        for media_id in self._hashes:
+            groups.setdefault(find(media_id), []).append(media_id)
+        clusters = [sorted(g) for g in groups.values() if len(g) >= min_size]
+        clusters.sort(key=lambda g: (-len(g), g[0]))
+        return clusters
+
+    def __len__(self) -> int:
+        """Nombre de médias indexés."""
+        return len(self._hashes)
+
+    def __contains__(self, media_id: str) -> bool:
+        """True si le média est indexé."""
+        return media_id in self._hashes
@@ -0,0 +1,164 @@
+"""Cache mémoire des lectures fréquentes.
+
+Ce module fournit ``ReadCache``, un cache LRU borné à expiration (TTL)
+placé devant les lectures de ``MediaCollection`` qui changent rarement
+(informations d'un média, résumés de collections). Le cache est vidé
+explicitement par les écritures de ``MediaCollection`` ; le TTL borne
+l'obsolescence des entrées modifiées par un autre processus ou
+directement en base.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ReadCache:
+    """Cache LRU borné avec durée de vie des entrées.
+
+    Thread-safe. Pour éviter qu'une lecture commencée avant une écriture
+    ne remette en cache une valeur périmée après son invalidation, chaque
+    invalidation incrémente un compteur de génération : une valeur
+    chargée sous une génération antérieure n'est pas enregistrée.
+
+    Attributes:
+        max_entries: Nombre maximum d'entrées conservées
+        ttl: Durée de vie d'une entrée en secondes (None: illimitée)
+        hits: Nombre de lectures servies depuis le cache
+        misses: Nombre de lectures absentes ou expirées
+        evictions: Nombre d'entrées évincées (LRU)
+
+    Example:
+        >>> cache = ReadCache(max_entries=10_000, ttl=60.0)
+        >>> generation = cache.generation
+        >>> info = cache.get(("media", media_id))
+        >>> if info is None:
+        ...     info = load(media_id)
+        ...     cache.put(("media", media_id), info, generation)
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl: Optional[float] = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Initialise le cache.
+
+        Args:
+            max_entries: Nombre maximum d'entrées avant éviction LRU
+            ttl: Durée de vie d'une entrée en secondes (None: illimitée)
+            clock: Horloge monotone en secondes (remplaçable pour les tests)
+
+        Raises:
+            ValueError: Si max_entries est inférieur à 1 ou ttl négatif ou nul
+        """
+        if max_entries < 1:
+            raise ValueError(f"max_entries must be >= 1, got {max_entries}")
+        if ttl is not None and ttl <= 0:
+            raise ValueError(f"ttl must be > 0 or None, got {ttl}")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        """Génération courante, à relever avant de charger une valeur."""
+        return self._generation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Retourne la valeur en cache d'une clé.
+
+        Args:
+            key: Clé de l'entrée
+
+        Returns:
+            Valeur en cache, ou None si absente ou expirée
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at >= self._clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Retourne les valeurs en cache de plusieurs clés.
+
+        Args:
+            keys: Clés des entrées
+
+        Returns:
+            Dictionnaire {clé: valeur} des seules entrées présentes
+        """
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None) -> bool:
+        """Enregistre une valeur.
+
+        Args:
+            key: Clé de l'entrée
+            value: Valeur (None n'est pas mis en cache)
+            generation: Génération relevée avant le chargement de la
+                valeur ; si une invalidation a eu lieu depuis, la valeur
+                n'est pas enregistrée
+
+        Returns:
+            True si la valeur a été enregistrée
+        """
+        if value is None:
+            return False
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            expires_at = (
+                self._clock() + self.ttl if self.ttl is not None else float("inf")
+            )
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, keys: Iterable[Hashable]) -> None:
+        """Supprime des entrées et rend périmés les chargements en cours.
+
+        Args:
+            keys: Clés des entrées à supprimer
+        """
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Supprime toutes les entrées (les compteurs sont conservés)."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+        logger.debug("Read cache cleared")
+
+    def __len__(self) -> int:
+        """Nombre d'entrées en cache (expirées comprises)."""
+        return len(self._entries)
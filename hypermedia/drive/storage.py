@@ -0,0 +1,220 @@
+"""Placement des fichiers dans le stockage adressé par contenu.
+
+Ce module choisit la manière la moins coûteuse de placer un fichier
+source dans le stockage : clone copy-on-write (reflink, btrfs/XFS),
+lien physique (même système de fichiers) ou copie réalisée par le
+noyau (``copy_file_range``/``sendfile``). Le mode effectif est
+déterminé par couple de volumes (source, stockage) et mémorisé, avec
+repli automatique lorsque le mode demandé n'est pas supporté.
+"""
+
+import errno
+import logging
+import os
+import shutil
+import tempfile
+from enum import Enum
+from pathlib import Path
+from typing import Dict, List, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Requête ioctl FICLONE de Linux (_IOW(0x94, 9, int))
+FICLONE = 0x40049409
+
+
+class StorageMode(Enum):
+    """Mode de placement d'un fichier dans le stockage.
+
+    AUTO: Reflink si le volume le supporte, sinon copie par le noyau
+    COPY: Copie des données (réalisée par le noyau si possible)
+    REFLINK: Clone copy-on-write, partage les blocs sans les dupliquer
+    HARDLINK: Lien physique vers la source (même système de fichiers).
+        La source ne doit plus être modifiée sur place ensuite, sans
+        quoi le contenu stocké ne correspondrait plus à son checksum.
+    """
+
+    AUTO = "auto"
+    COPY = "copy"
+    REFLINK = "reflink"
+    HARDLINK = "hardlink"
+
+
+# Modes essayés successivement pour chaque mode demandé
+_FALLBACKS: Dict[StorageMode, List[StorageMode]] = {
+    StorageMode.AUTO: [StorageMode.REFLINK, StorageMode.COPY],
+    StorageMode.COPY: [StorageMode.COPY],
+    StorageMode.REFLINK: [StorageMode.REFLINK, StorageMode.COPY],
+    StorageMode.HARDLINK: [StorageMode.HARDLINK, StorageMode.REFLINK, StorageMode.COPY],
+}
+
+
+def reflink(src_path: Union[str, Path], dest_path: Union[str, Path]) -> None:
+    """Clone un fichier en copy-on-write via l'ioctl FICLONE.
+
+    Args:
+        src_path: Chemin du fichier source
+        dest_path: Chemin du fichier destination (créé ou écrasé)
+
+    Raises:
+        OSError: Si le système de fichiers ne supporte pas le clonage
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.EOPNOTSUPP, "reflink not supported on this platform")
+
+    with open(src_path, "rb") as src, open(dest_path, "wb") as dest:
+        try:
+            fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dest.close()
+            os.unlink(dest_path)
+            raise
+
+
+def kernel_copy(src_path: Union[str, Path], dest_path: Union[str, Path]) -> None:
+    """Copie un fichier sans transiter par l'espace utilisateur.
+
+    Utilise ``os.copy_file_range`` si disponible, sinon
+    ``shutil.copyfile`` (qui s'appuie sur ``sendfile`` sous Linux).
+    Les permissions et dates sont ensuite copiées.
+
+    Args:
+        src_path: Chemin du fichier source
+        dest_path: Chemin du fichier destination (créé ou écrasé)
+    """
+    copied = False
+    if hasattr(os, "copy_file_range"):
+        with open(src_path, "rb") as src, open(dest_path, "wb") as dest:
+            remaining = os.fstat(src.fileno()).st_size
+            try:
+                while remaining > 0:
+                    n = os.copy_file_range(src.fileno(), dest.fileno(), remaining)
+                    if n == 0:
+                        break
+                    remaining -= n
+                copied = remaining == 0
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    raise
+    if not copied:
+        shutil.copyfile(src_path, dest_path)
+    shutil.copystat(src_path, dest_path)
+
+
+class FilePlacer:
+    """Place les fichiers dans le stockage selon le meilleur mode disponible.
+
+    Le mode effectif est mémorisé pour chaque couple de périphériques
+    (source, destination) : après un premier échec de reflink sur un
+    volume, les fichiers suivants sont directement copiés.
+
+    Attributes:
+        mode: Mode demandé
+
+    Example:
+        >>> placer = FilePlacer(StorageMode.AUTO)
+        >>> used = placer.place(Path("/photos/a.jpg"), storage / "media/ab/cd/abcd.jpg")
+    """
+
+    def __init__(self, mode: StorageMode = StorageMode.AUTO):
+        """Initialise le placeur.
+
+        Args:
+            mode: Mode de placement demandé
+        """
+        self.mode = mode
+        self._volume_modes: Dict[Tuple[int, int], StorageMode] = {}
+
+    def resolve_mode(
+        self, src_path: Union[str, Path], dest_dir: Union[str, Path]
+    ) -> StorageMode:
+        """Prédit le mode qui sera utilisé pour placer un fichier.
+
+        Args:
+            src_path: Chemin du fichier source
+            dest_dir: Répertoire (existant) du stockage
+
+        Returns:
+            Mode effectif attendu (jamais AUTO)
+        """
+        key = self._volume_key(src_path, dest_dir)
+        if key in self._volume_modes:
+            return self._volume_modes[key]
+        return self._candidates(key)[0]
+
+    def place(
+        self, src_path: Union[str, Path], dest_path: Union[str, Path]
+    ) -> StorageMode:
+        """Place un fichier à son emplacement de stockage.
+
+        Le fichier est d'abord créé sous un nom temporaire dans le
+        répertoire de destination puis renommé atomiquement.
+
+        Args:
+            src_path: Chemin du fichier source
+            dest_path: Chemin de destination (répertoire parent existant)
+
+        Returns:
+            Mode effectivement utilisé
+        """
+        dest_path = Path(dest_path)
+        key = self._volume_key(src_path, dest_path.parent)
+        candidates = (
+            [self._volume_modes[key]]
+            if key in self._volume_modes
+            else self._candidates(key)
+        )
+
+        fd, tmp_name = tempfile.mkstemp(dir=dest_path.parent, prefix=".placing-")
+        os.close(fd)
+        os.unlink(tmp_name)
+
+        try:
+            for mode in candidates:
+                try:
+                    self._place_with(mode, src_path, tmp_name)
+                except OSError as e:
+                    if mode is StorageMode.COPY:
+                        raise
+                    logger.debug(f"{mode.value} unavailable for {src_path}: {e}")
+                    continue
+                if self._volume_modes.get(key) is not mode:
+                    logger.info(f"Storage mode for volume pair {key}: {mode.value}")
+                self._volume_modes[key] = mode
+                os.replace(tmp_name, dest_path)
+                return mode
+            raise OSError(f"Could not place {src_path}")  # pragma: no cover
+        finally:
+            if os.path.lexists(tmp_name):
+                os.unlink(tmp_name)
+
+    def _candidates(self, key: Tuple[int, int]) -> List[StorageMode]:
+        """Modes à essayer pour un couple de volumes, par ordre de préférence."""
+        src_dev, dest_dev = key
+        return [
+            mode
+            for mode in _FALLBACKS[self.mode]
+            if mode is not StorageMode.HARDLINK or src_dev == dest_dev
+        ]
+
+    @staticmethod
+    def _volume_key(
+        src_path: Union[str, Path], dest_dir: Union[str, Path]
+    ) -> Tuple[int, int]:
+        """Identifie le couple de volumes (source, destination)."""
+        return os.stat(src_path).st_dev, os.stat(dest_dir).st_dev
+
+    @staticmethod
+    def _place_with(
+        mode: StorageMode, src_path: Union[str, Path], dest_path: str
+    ) -> None:
+        """Place un fichier avec un mode donné."""
+        if mode is StorageMode.REFLINK:
+            reflink(src_path, dest_path)
+            shutil.copystat(src_path, dest_path)
+        elif mode is StorageMode.HARDLINK:
+            os.link(src_path, dest_path)
+        else:
+            kernel_copy(src_path, dest_path)
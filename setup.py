@@ -36,6 +36,10 @@ setup(
     python_requires=">=3.11",
     install_requires=requirements,
     extras_require={
+        # Accélère le calcul des empreintes perceptuelles (pHash)
+        "perceptual": [
+            "numpy>=1.24.0",
+        ],
         "dev": [
             "pytest>=7.4.0",
             "pytest-cov>=4.1.0",
@@ -0,0 +1,185 @@
+"""Tests unitaires pour le cache persistant de checksums.
+
+Ce module teste la réutilisation des checksums de fichiers inchangés,
+l'invalidation sur modification et l'éviction LRU.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from hypermedia.drive.checksum import compute_blake2b
+from hypermedia.drive.checksum_cache import ChecksumCache
+from hypermedia.drive.database import DatabaseManager
+
+
+class TestChecksumCache:
+    """Tests pour ChecksumCache."""
+
+    @pytest.fixture
+    def setup(self):
+        """Base temporaire et fichier source."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            test_file = tmpdir / "photo.jpg"
+            test_file.write_bytes(b"image content")
+
+            db = DatabaseManager(tmpdir / "cache.db")
+            yield {"tmpdir": tmpdir, "file": test_file, "db": db}
+            db.close()
+
+    def test_miss_then_hit(self, setup):
+        """Test qu'un second appel ne recalcule pas le checksum."""
+        cache = ChecksumCache(setup["db"])
+        compute = Mock(side_effect=compute_blake2b)
+
+        first = cache.get_checksum(setup["file"], compute=compute)
+        second = cache.get_checksum(setup["file"], compute=compute)
+
+        assert first == second == compute_blake2b(setup["file"])
+        assert compute.call_count == 1
+        assert cache.misses == 1
+        assert cache.hits == 1
+
+    def test_persistent_across_instances(self, setup):
+        """Test que le cache survit à une nouvelle instance."""
+        ChecksumCache(setup["db"]).get_checksum(setup["file"])
+
+        cache = ChecksumCache(setup["db"])
+        assert cache.lookup(setup["file"]) == compute_blake2b(setup["file"])
+
+    def test_invalidated_on_modification(self, setup):
+        """Test qu'une modification du fichier invalide l'entrée."""
+        cache = ChecksumCache(setup["db"])
+        original = cache.get_checksum(setup["file"])
+
+        setup["file"].write_bytes(b"modified image content")
+
+        assert cache.lookup(setup["file"]) is None
+        updated = cache.get_checksum(setup["file"])
+        assert updated != original
+        assert updated == compute_blake2b(setup["file"])
+
+    def test_store_many_replaces_entries(self, setup):
+        """Test qu'un lot remplace les entrées existantes des mêmes fichiers."""
+        cache = ChecksumCache(setup["db"])
+        st = os.stat(setup["file"])
+        other = setup["tmpdir"] / "other.jpg"
+        other.write_bytes(b"other content")
+
+        assert cache.store_many([(st, "old")]) == 1
+        assert cache.store_many([(st, "new"), (os.stat(other), "other")]) == 2
+
+        assert cache.lookup(setup["file"]) == "new"
+        assert cache.lookup(other) == "other"
+        assert len(cache) == 2
+
+    def test_lookup_many(self, setup):
+        """Test de la recherche groupée, sans recalcul ni entrée périmée."""
+        cache = ChecksumCache(setup["db"])
+        checksum = cache.get_checksum(setup["file"])
+        other = setup["tmpdir"] / "other.jpg"
+        other.write_bytes(b"other content")
+        stale = os.stat(setup["file"])
+        setup["file"].write_bytes(b"modified image content")
+
+        assert cache.lookup_many([stale, os.stat(other)]) == [checksum, None]
+        assert cache.lookup_many([os.stat(setup["file"])]) == [None]
+
+    def test_invalidated_on_mtime_change(self, setup):
+        """Test qu'un changement de mtime seul invalide l'entrée."""
+        cache = ChecksumCache(setup["db"])
+        cache.get_checksum(setup["file"])
+
+        st = setup["file"].stat()
+        os.utime(setup["file"], ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        assert cache.lookup(setup["file"]) is None
+
+    def test_explicit_invalidate(self, setup):
+        """Test de l'invalidation explicite."""
+        cache = ChecksumCache(setup["db"])
+        cache.get_checksum(setup["file"])
+
+        assert cache.invalidate(setup["file"]) is True
+        assert cache.lookup(setup["file"]) is None
+        assert cache.invalidate(setup["file"]) is False
+
+    def test_lru_eviction(self, setup):
+        """Test de l'éviction des entrées les moins récemment utilisées."""
+        tmpdir = setup["tmpdir"]
+        cache = ChecksumCache(setup["db"], max_entries=3, touch_interval=0)
+
+        files = []
+        for i in range(3):
+            path = tmpdir / f"file{i}.bin"
+            path.write_bytes(f"content {i}".encode())
+            cache.get_checksum(path)
+            files.append(path)
+
+        # Rafraîchir file0 pour que file1 devienne le moins récent
+        cache.get_checksum(files[0])
+
+        extra = tmpdir / "extra.bin"
+        extra.write_bytes(b"extra")
+        cache.get_checksum(extra)
+
+        assert len(cache) == 3
+        assert cache.lookup(files[1]) is None
+        assert cache.lookup(files[0]) is not None
+        assert cache.lookup(extra) is not None
+
+    def test_touches_are_batched(self, setup, monkeypatch):
+        """Test que les rafraîchissements LRU sont regroupés en une écriture."""
+        tmpdir = setup["tmpdir"]
+        db = setup["db"]
+        files = []
+        for i in range(5):
+            path = tmpdir / f"file{i}.bin"
+            path.write_bytes(f"content {i}".encode())
+            files.append(path)
+        cache = ChecksumCache(db, touch_interval=0)
+        for path in files:
+            cache.get_checksum(path)
+
+        submitted = []
+        submit_write = db.submit_write
+        monkeypatch.setattr(
+            db, "submit_write", lambda work: submitted.append(submit_write(work))
+        )
+        for _ in range(3):
+            for path in files:
+                assert cache.lookup(path) is not None
+        assert submitted == []
+
+        cache.flush()
+        assert len(submitted) == 1
+        submitted[0].result()
+
+    def test_recent_entries_not_touched(self, setup):
+        """Test qu'une entrée utilisée récemment n'est pas réécrite."""
+        cache = ChecksumCache(setup["db"])
+        cache.get_checksum(setup["file"])
+        assert cache.lookup(setup["file"]) is not None
+        assert not cache._pending_touches
+
+    def test_clear(self, setup):
+        """Test du vidage du cache."""
+        cache = ChecksumCache(setup["db"])
+        cache.get_checksum(setup["file"])
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_invalid_max_entries(self, setup):
+        """Test du rejet d'une taille de cache invalide."""
+        with pytest.raises(ValueError):
+            ChecksumCache(setup["db"], max_entries=0)
+
+    def test_missing_file(self, setup):
+        """Test avec un fichier inexistant."""
+        cache = ChecksumCache(setup["db"])
+        with pytest.raises(FileNotFoundError):
+            cache.get_checksum(setup["tmpdir"] / "missing.jpg")
@@ -4,14 +4,26 @@ Ce module teste le calcul de checksums BLAKE2b, la vérification d'intégrité
 et la détection de doublons.
 """
 
+import hashlib
 import tempfile
+import uuid
 from pathlib import Path
 
 import pytest
 
-from hypermedia.drive.checksum import compute_blake2b, verify_integrity
+from hypermedia.drive.checksum import (
+    PARTIAL_SAMPLE_SIZE,
+    compute_blake2b,
+    compute_partial_blake2b,
+    verify_integrity,
+)
 from hypermedia.drive.database import DatabaseManager
-from hypermedia.drive.deduplication import DeduplicationManager, DuplicatePolicy
+from hypermedia.drive.deduplication import (
+    DeduplicationIndex,
+    DeduplicationManager,
+    DuplicatePolicy,
+    digest_key,
+)
 from hypermedia.drive.models import MediaItem
 
 
@@ -130,6 +142,28 @@ class TestChecksum:
         new_checksum = compute_blake2b(test_file)
         assert new_checksum != original_checksum
 
+    def test_partial_checksum_ignores_middle(self, tmp_path):
+        """Test que le checksum partiel ne dépend que du début et de la fin."""
+        head = b"H" * PARTIAL_SAMPLE_SIZE
+        tail = b"T" * PARTIAL_SAMPLE_SIZE
+        file1 = tmp_path / "a.bin"
+        file2 = tmp_path / "b.bin"
+        file1.write_bytes(head + b"middle-1" + tail)
+        file2.write_bytes(head + b"middle-2" + tail)
+
+        assert compute_partial_blake2b(file1) == compute_partial_blake2b(file2)
+        assert compute_blake2b(file1) != compute_blake2b(file2)
+
+    def test_partial_checksum_small_file(self, tmp_path):
+        """Test que les petits fichiers sont hachés en entier."""
+        file1 = tmp_path / "a.bin"
+        file2 = tmp_path / "b.bin"
+        file1.write_bytes(b"small content A")
+        file2.write_bytes(b"small content B")
+
+        assert compute_partial_blake2b(file1) != compute_partial_blake2b(file2)
+        assert len(compute_partial_blake2b(file1)) == 64
+
 
 class TestDeduplication:
     """Tests pour le gestionnaire de déduplication."""
@@ -289,6 +323,227 @@ class TestDeduplication:
             assert duplicate.checksum == checksum
 
 
+class TestCompactDeduplicationIndex:
+    """Tests pour l'index de déduplication compact."""
+
+    @staticmethod
+    def digest(i: int) -> str:
+        """Checksum hexadécimal de test."""
+        return hashlib.blake2b(str(i).encode()).hexdigest()
+
+    def test_register_grow_and_lookup(self):
+        """Test de l'agrandissement du filtre de Bloom au fil des insertions."""
+        index = DeduplicationIndex(capacity=4)
+        media_ids = {self.digest(i): str(uuid.uuid4()) for i in range(2000)}
+        for checksum, media_id in media_ids.items():
+            index.register(checksum, media_id)
+
+        assert len(index) == 2000
+        assert all(index.check_duplicate(c) == m for c, m in media_ids.items())
+        assert index.check_duplicate(self.digest(-1)) is None
+        assert all(index.might_contain(c) for c in media_ids)
+        # Filtre reconstruit à la taille de l'index : peu de faux positifs
+        misses = sum(index.might_contain(self.digest(i)) for i in range(-1000, 0))
+        assert misses < 50
+
+    def test_remove_then_rebuild(self):
+        """Test du retrait puis de la réutilisation de l'espace."""
+        index = DeduplicationIndex(capacity=16)
+        for i in range(100):
+            index.register(self.digest(i), f"media-{i}")
+        for i in range(50):
+            index.remove(self.digest(i))
+        for i in range(100, 400):
+            index.register(self.digest(i), f"media-{i}")
+
+        assert len(index) == 350
+        assert self.digest(10) not in index
+        assert index.check_duplicate(self.digest(60)) == "media-60"
+        assert index.check_duplicate(self.digest(399)) == "media-399"
+
+    def test_register_replaces_media_id(self):
+        """Test du remplacement de l'identifiant d'un checksum."""
+        index = DeduplicationIndex()
+        index.register(self.digest(1), "ancien")
+        new_id = str(uuid.uuid4())
+        index.register(self.digest(1), new_id)
+
+        assert len(index) == 1
+        assert index.check_duplicate(self.digest(1)) == new_id
+
+    def test_bloom_filters_negatives(self):
+        """Test que les absents sont écartés par le filtre de Bloom."""
+        index = DeduplicationIndex(capacity=1000)
+        for i in range(1000):
+            index.register(self.digest(i), str(uuid.uuid4()))
+
+        misses = [index.might_contain(self.digest(i)) for i in range(1000, 3000)]
+
+        assert misses.count(True) < 100
+        assert index.bloom_rejections > 1900
+        assert all(index.might_contain(self.digest(i)) for i in range(1000))
+
+    def test_digest_key(self):
+        """Test de la clé de 16 octets."""
+        checksum = self.digest(1)
+        assert digest_key(checksum) == bytes.fromhex(checksum[:32])
+        assert len(digest_key("abc123")) == 16
+        assert digest_key("checksum_long_000001") != digest_key("checksum_long_000002")
+
+    def test_from_database(self):
+        """Test du chargement en masse depuis la base."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = DatabaseManager(Path(tmpdir) / "index.db")
+            try:
+                with db.batch_writer() as writer:
+                    ids = {
+                        self.digest(i): writer.add_media(
+                            checksum=self.digest(i), path=f"/{i}", size=i
+                        )
+                        for i in range(300)
+                    }
+                    ids["non-hex"] = writer.add_media(
+                        checksum="non-hex", path="/x", size=1
+                    )
+
+                index = DeduplicationIndex.from_database(db)
+            finally:
+                db.close()
+
+        assert len(index) == 301
+        assert all(index.check_duplicate(c) == m for c, m in ids.items())
+
+
+class TestFindDuplicatesMany:
+    """Tests de la recherche de doublons par lot."""
+
+    def test_find_duplicates_many(self):
+        """Test de la recherche d'un lot de checksums en plusieurs tranches."""
+        digest = TestCompactDeduplicationIndex.digest
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = DatabaseManager(Path(tmpdir) / "many.db")
+            try:
+                with db.batch_writer() as writer:
+                    ids = {
+                        digest(i): writer.add_media(
+                            checksum=digest(i), path=f"/{i}", size=i
+                        )
+                        for i in range(50)
+                    }
+                    ids["non-hex"] = writer.add_media(
+                        checksum="non-hex", path="/x", size=1
+                    )
+
+                dedup = DeduplicationManager(db)
+                wanted = [digest(i) for i in range(40, 60)] + [
+                    "non-hex",
+                    digest(45),
+                    "absent",
+                ]
+                found = dedup.find_duplicates_many(wanted, chunk_size=7)
+            finally:
+                db.close()
+
+        expected = {c for c in wanted if c in ids}
+        assert set(found) == expected
+        assert all(found[c].id == ids[c] and found[c].checksum == c for c in expected)
+
+    def test_empty_and_invalid(self):
+        """Test d'un lot vide et d'une taille de tranche invalide."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = DatabaseManager(Path(tmpdir) / "many.db")
+            try:
+                dedup = DeduplicationManager(db)
+                assert dedup.find_duplicates_many([]) == {}
+                with pytest.raises(ValueError):
+                    dedup.find_duplicates_many(["abc"], chunk_size=0)
+            finally:
+                db.close()
+
+
+class TestDuplicatePrefilter:
+    """Tests du préfiltre taille + checksum partiel."""
+
+    @pytest.fixture
+    def setup(self):
+        """Base temporaire avec un média de référence."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            db = DatabaseManager(tmpdir / "prefilter.db")
+            dedup = DeduplicationManager(db)
+
+            reference = tmpdir / "reference.bin"
+            reference.write_bytes(b"R" * (3 * PARTIAL_SAMPLE_SIZE))
+            with db.get_session() as session:
+                media = MediaItem(
+                    checksum=compute_blake2b(reference),
+                    partial_checksum=compute_partial_blake2b(reference),
+                    path=str(reference),
+                    size=reference.stat().st_size,
+                )
+                session.add(media)
+                session.commit()
+                media_id = media.id
+
+            yield {
+                "tmpdir": tmpdir,
+                "db": db,
+                "dedup": dedup,
+                "reference": reference,
+                "media_id": media_id,
+            }
+            db.close()
+
+    def test_probe_different_size(self, setup):
+        """Test qu'une taille inédite exclut tout doublon sans hachage."""
+        other = setup["tmpdir"] / "other.bin"
+        other.write_bytes(b"R" * 10)
+
+        probe = setup["dedup"].probe_file(other)
+        assert probe.candidate is False
+        assert probe.partial_checksum is None
+
+    def test_probe_same_size_different_content(self, setup):
+        """Test qu'une même taille avec un début différent n'est pas candidate."""
+        other = setup["tmpdir"] / "other.bin"
+        other.write_bytes(b"X" + b"R" * (3 * PARTIAL_SAMPLE_SIZE - 1))
+
+        probe = setup["dedup"].probe_file(other)
+        assert probe.candidate is False
+        assert probe.partial_checksum is not None
+
+    def test_probe_identical(self, setup):
+        """Test qu'un fichier identique est candidat."""
+        copy = setup["tmpdir"] / "copy.bin"
+        copy.write_bytes(setup["reference"].read_bytes())
+
+        assert setup["dedup"].probe_file(copy).candidate is True
+
+    def test_probe_legacy_media_without_partial(self, setup):
+        """Test qu'un média sans checksum partiel reste candidat."""
+        with setup["db"].get_session() as session:
+            session.query(MediaItem).update({MediaItem.partial_checksum: None})
+            session.commit()
+
+        other = setup["tmpdir"] / "other.bin"
+        other.write_bytes(b"X" + b"R" * (3 * PARTIAL_SAMPLE_SIZE - 1))
+        assert setup["dedup"].probe_file(other).candidate is True
+
+    def test_find_duplicate_for_file(self, setup):
+        """Test de la recherche de doublon par fichier."""
+        copy = setup["tmpdir"] / "copy.bin"
+        copy.write_bytes(setup["reference"].read_bytes())
+        unique = setup["tmpdir"] / "unique.bin"
+        unique.write_bytes(b"unique")
+
+        media, checksum = setup["dedup"].find_duplicate_for_file(copy)
+        assert media is not None
+        assert media.id == setup["media_id"]
+        assert checksum == compute_blake2b(copy)
+
+        assert setup["dedup"].find_duplicate_for_file(unique) == (None, None)
+
+
 class TestChecksumDeduplicationIntegration:
     """Tests d'intégration entre checksum et déduplication."""
 
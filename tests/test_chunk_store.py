@@ -0,0 +1,323 @@
+"""Tests unitaires pour le stockage par blocs définis par le contenu.
+
+Ce module teste le découpage FastCDC, l'écriture et la relecture des
+blocs, le bilan de déduplication, le ramasse-miettes et l'intégration
+dans MediaCollection (ajout, import en masse, lecture des médias).
+"""
+
+import io
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select
+
+from hypermedia.drive.checksum import compute_blake2b
+from hypermedia.drive.chunk_store import (
+    FCNTL_AVAILABLE,
+    GC_LOCK_FILENAME,
+    ChunkStore,
+    ContentDefinedChunker,
+)
+from hypermedia.drive.collection import MediaCollection
+from hypermedia.drive.database import DatabaseManager
+from hypermedia.drive.models import MediaChunk
+
+
+def small_chunker() -> ContentDefinedChunker:
+    """Découpeur à petits blocs pour des données de test réduites."""
+    return ContentDefinedChunker(min_size=256, avg_size=1024, max_size=4096)
+
+
+def make_versions(count: int, size: int, seed: int = 1):
+    """Versions successives d'un contenu, chacune avec une petite insertion."""
+    rng = random.Random(seed)
+    content = bytearray(rng.randbytes(size))
+    versions = []
+    for _ in range(count):
+        pos = rng.randrange(len(content))
+        content[pos:pos] = rng.randbytes(100)
+        versions.append(bytes(content))
+    return versions
+
+
+class TestContentDefinedChunker:
+    """Tests pour ContentDefinedChunker."""
+
+    def test_chunks_cover_stream(self):
+        """Test que les blocs couvrent le flux en respectant les tailles."""
+        chunker = small_chunker()
+        data = random.Random(3).randbytes(200_000)
+        chunks = [bytes(c) for c in chunker.iter_chunks(io.BytesIO(data))]
+
+        assert b"".join(chunks) == data
+        assert all(256 <= len(c) <= 4096 for c in chunks[:-1])
+        assert 0.5 < len(data) / len(chunks) / 1024 < 2
+
+    def test_independent_of_read_size(self):
+        """Test que les frontières ne dépendent pas de la taille des lectures."""
+        chunker = small_chunker()
+        data = random.Random(4).randbytes(100_000)
+
+        expected = [
+            len(c) for c in chunker.iter_chunks(io.BytesIO(data), read_size=1 << 20)
+        ]
+        assert [
+            len(c) for c in chunker.iter_chunks(io.BytesIO(data), read_size=5000)
+        ] == expected
+
+    def test_insertion_keeps_other_chunks(self):
+        """Test qu'une insertion ne modifie que les blocs voisins."""
+        chunker = small_chunker()
+        data = random.Random(5).randbytes(200_000)
+        edited = data[:100_000] + b"insertion" + data[100_000:]
+
+        before = {bytes(c) for c in chunker.iter_chunks(io.BytesIO(data))}
+        after = [bytes(c) for c in chunker.iter_chunks(io.BytesIO(edited))]
+        assert sum(c not in before for c in after) <= 3
+
+    def test_low_entropy_data(self):
+        """Test des données constantes (blocs de taille maximale)."""
+        chunks = list(small_chunker().iter_chunks(io.BytesIO(b"\0" * 10_000)))
+        assert [len(c) for c in chunks] == [4096, 4096, 1808]
+        assert list(small_chunker().iter_chunks(io.BytesIO(b""))) == []
+
+    def test_invalid_sizes(self):
+        """Test du rejet de tailles incohérentes."""
+        with pytest.raises(ValueError):
+            ContentDefinedChunker(min_size=4096, avg_size=1024, max_size=8192)
+        with pytest.raises(ValueError):
+            ContentDefinedChunker(min_size=256, avg_size=1000, max_size=4096)
+
+
+class TestChunkStore:
+    """Tests pour ChunkStore."""
+
+    @pytest.fixture
+    def setup(self):
+        """Stockage par blocs et répertoire de fichiers sources."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            db = DatabaseManager(tmpdir / "test.db")
+            store = ChunkStore(tmpdir / "chunks", db, chunker=small_chunker())
+            yield {"tmpdir": tmpdir, "db": db, "store": store}
+            db.close()
+
+    def _put(self, setup, name: str, content: bytes):
+        """Écrit un fichier dans le stockage et enregistre son manifeste."""
+        path = setup["tmpdir"] / name
+        path.write_bytes(content)
+        stored = setup["store"].put(path)
+        with setup["db"].batch_writer() as writer:
+            media_id = writer.add_media(
+                checksum=stored.checksum, path=name, size=stored.size
+            )
+            writer.add_chunks(media_id, stored.chunks)
+        return media_id, stored
+
+    def test_put_and_open(self, setup):
+        """Test de l'écriture puis de la relecture en flux."""
+        content = random.Random(6).randbytes(50_000)
+        media_id, stored = self._put(setup, "a.bin", content)
+
+        assert stored.checksum == compute_blake2b(setup["tmpdir"] / "a.bin")
+        assert stored.size == 50_000 and stored.new_bytes == 50_000
+        with setup["store"].open(media_id) as f:
+            assert f.read() == content
+            f.seek(12_345)
+            assert f.read(10_000) == content[12_345:22_345]
+            f.seek(-100, io.SEEK_END)
+            assert f.read() == content[-100:]
+        assert setup["store"].open("inconnu") is None
+
+    def test_versions_share_chunks(self, setup):
+        """Test de la déduplication entre versions et du bilan."""
+        versions = make_versions(4, 50_000)
+        results = [self._put(setup, f"v{i}.bin", v) for i, v in enumerate(versions)]
+
+        assert all(stored.new_bytes < 10_000 for _, stored in results[1:])
+        for (media_id, _), content in zip(results, versions):
+            with setup["store"].open(media_id) as f:
+                assert f.read() == content
+
+        report = setup["store"].report()
+        assert report.media_count == 4
+        assert report.logical_bytes == sum(len(v) for v in versions)
+        assert report.dedup_ratio > 3
+        assert report.garbage_bytes == 0
+
+    def test_empty_file(self, setup):
+        """Test d'un fichier vide (un bloc vide)."""
+        media_id, stored = self._put(setup, "vide.bin", b"")
+        assert len(stored.chunks) == 1
+        with setup["store"].open(media_id) as f:
+            assert f.read() == b""
+
+    def test_collect_garbage(self, setup):
+        """Test de la libération des blocs non référencés."""
+        store = setup["store"]
+        shared = random.Random(7).randbytes(30_000)
+        kept_id, _ = self._put(setup, "garde.bin", shared)
+        dropped_id, _ = self._put(setup, "supprime.bin", shared + os.urandom(30_000))
+        orphan = setup["tmpdir"] / "orphelin.bin"
+        orphan.write_bytes(os.urandom(20_000))
+        orphan_chunks = store.put(orphan).chunks  # import interrompu : pas de manifeste
+
+        setup["db"].write(
+            lambda s: s.query(MediaChunk).filter_by(media_id=dropped_id).delete()
+        )
+        assert store.report().garbage_bytes > 0
+
+        # Blocs récents : épargnés pendant le délai de grâce
+        assert store.collect_garbage(grace_period=3600) == 0
+        assert store.report().garbage_bytes == 0
+
+        removed = store.collect_garbage(grace_period=0)
+        assert removed > len(orphan_chunks)
+        assert not any(store.chunk_path(c.digest).exists() for c in orphan_chunks)
+        with store.open(kept_id) as f:
+            assert f.read() == shared
+
+    def test_reused_chunk_is_refreshed(self, setup):
+        """Test qu'un bloc réutilisé par put échappe au ramasse-miettes."""
+        store = setup["store"]
+        path = setup["tmpdir"] / "a.bin"
+        path.write_bytes(os.urandom(10_000))
+        chunks = store.put(path).chunks
+        old = time.time() - 7200
+        for chunk in chunks:
+            os.utime(store.chunk_path(chunk.digest), (old, old))
+
+        assert store.put(path).new_chunks == 0
+        assert store.collect_garbage(grace_period=3600) == 0
+
+    @pytest.mark.skipif(not FCNTL_AVAILABLE, reason="fcntl non disponible")
+    def test_gc_waits_for_other_process(self, setup):
+        """Test que le ramasse-miettes attend le verrou d'un autre processus."""
+        import fcntl
+
+        store = setup["store"]
+        path = setup["tmpdir"] / "orphelin.bin"
+        path.write_bytes(os.urandom(10_000))
+        chunks = store.put(path).chunks
+        old = time.time() - 7200
+        for chunk in chunks:
+            os.utime(store.chunk_path(chunk.digest), (old, old))
+
+        removed = []
+        gc = threading.Thread(
+            target=lambda: removed.append(store.collect_garbage(grace_period=3600))
+        )
+        # Autre processus : verrou pris, blocs réutilisés pendant que le
+        # ramasse-miettes attend
+        with open(store.root / "tmp" / GC_LOCK_FILENAME, "ab") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            gc.start()
+            gc.join(timeout=0.5)
+            assert gc.is_alive()
+            for chunk in chunks:
+                os.utime(store.chunk_path(chunk.digest))
+        gc.join()
+
+        assert removed == [0]
+        assert all(store.chunk_path(c.digest).exists() for c in chunks)
+
+
+class TestCollectionChunkStore:
+    """Tests de l'intégration dans MediaCollection."""
+
+    @pytest.fixture
+    def setup(self):
+        """Collection stockée par blocs et versions successives d'un fichier."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            db = DatabaseManager(tmpdir / "test.db")
+            coll = MediaCollection(tmpdir / "storage", db, use_chunk_store=True)
+            coll_id = coll.create_collection("Montages")
+            files = []
+            for i, content in enumerate(make_versions(6, 2_000_000)):
+                path = tmpdir / f"montage_v{i}.bin"
+                path.write_bytes(content)
+                files.append(path)
+            yield {
+                "tmpdir": tmpdir,
+                "db": db,
+                "collection": coll,
+                "collection_id": coll_id,
+                "files": files,
+            }
+            db.close()
+
+    def test_add_and_open(self, setup):
+        """Test de l'ajout par blocs puis de la lecture du média."""
+        coll = setup["collection"]
+        ids = [
+            coll.add_media_to_collection(setup["collection_id"], p)
+            for p in setup["files"]
+        ]
+
+        for media_id, path in zip(ids, setup["files"]):
+            with coll.open_media(media_id) as f:
+                assert f.read() == path.read_bytes()
+        info = coll.get_media_info(ids[0])
+        assert not (setup["tmpdir"] / "storage" / info["path"]).exists()
+
+        # Doublon : aucun nouveau manifeste
+        assert (
+            coll.add_media_to_collection(setup["collection_id"], setup["files"][0])
+            == ids[0]
+        )
+        report = coll.chunk_store.report()
+        assert report.media_count == 6
+        assert report.dedup_ratio > 3
+
+    def test_import_paths(self, setup):
+        """Test de l'écriture des manifestes par l'import en masse."""
+        coll = setup["collection"]
+        results = {
+            r.path: r for r in coll.import_paths(setup["collection_id"], setup["files"])
+        }
+
+        assert all(r.error is None for r in results.values())
+        for path, result in results.items():
+            with coll.open_media(result.media_id) as f:
+                assert f.read() == path.read_bytes()
+        assert coll.chunk_store.report().dedup_ratio > 3
+
+    def test_delete_and_collect(self, setup):
+        """Test de la suppression d'un média puis du ramasse-miettes."""
+        coll = setup["collection"]
+        ids = [
+            coll.add_media_to_collection(setup["collection_id"], p)
+            for p in setup["files"]
+        ]
+
+        assert coll.delete_media(ids[-1], remove_file=True)
+        with setup["db"].get_read_session() as session:
+            assert (
+                session.scalar(
+                    select(func.count())
+                    .select_from(MediaChunk)
+                    .where(MediaChunk.media_id == ids[-1])
+                )
+                == 0
+            )
+        assert coll.chunk_store.collect_garbage(grace_period=0) > 0
+        with coll.open_media(ids[0]) as f:
+            assert f.read() == setup["files"][0].read_bytes()
+
+    def test_open_media_without_chunk_store(self, setup):
+        """Test de open_media sur un stockage de fichiers entiers."""
+        coll = MediaCollection(setup["tmpdir"] / "plain", setup["db"])
+        media_id = coll.add_media_to_collection(
+            setup["collection_id"], setup["files"][0]
+        )
+
+        with coll.open_media(media_id) as f:
+            assert f.read() == setup["files"][0].read_bytes()
+        with pytest.raises(FileNotFoundError):
+            coll.open_media("inconnu")
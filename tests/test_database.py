@@ -4,14 +4,26 @@ Ce module teste les fonctionnalités du DatabaseManager incluant
 la création, les sessions, et les opérations de maintenance.
 """
 
+import hashlib
+import sqlite3
 import tempfile
+from datetime import datetime
 from pathlib import Path
+from unittest.mock import Mock
 
 import pytest
+from sqlalchemy import inspect, select, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from hypermedia.drive.database import DatabaseManager
-from hypermedia.drive.models import Base, Collection, MediaItem
+from hypermedia.drive.deduplication import DeduplicationManager, checksum_condition
+from hypermedia.drive.models import Base, Collection, MediaItem, checksum_prefix
+
+
+def blake2b_hex(data: bytes) -> str:
+    """Checksum BLAKE2b hexadécimal d'un contenu en mémoire."""
+    return hashlib.blake2b(data).hexdigest()
 
 
 class TestDatabaseManager:
@@ -50,6 +62,95 @@ class TestDatabaseManager:
         
         db.close()
 
+    def _pragma(self, db: DatabaseManager, name: str):
+        """Lit la valeur d'un PRAGMA sur une connexion du moteur."""
+        from sqlalchemy import text
+
+        with db.engine.connect() as conn:
+            return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+    def test_durable_profile(self, temp_db_path: Path):
+        """Test des PRAGMA du profil par défaut."""
+        db = DatabaseManager(temp_db_path)
+
+        assert db.profile == "durable"
+        assert self._pragma(db, "journal_mode") == "wal"
+        assert self._pragma(db, "synchronous") == 2  # FULL
+        assert self._pragma(db, "foreign_keys") == 1
+        assert self._pragma(db, "temp_store") == 2  # MEMORY
+        assert self._pragma(db, "busy_timeout") == 5000
+
+        db.close()
+
+    def test_ingest_profile(self, temp_db_path: Path):
+        """Test des PRAGMA du profil d'import."""
+        db = DatabaseManager(temp_db_path, profile="ingest")
+
+        assert self._pragma(db, "journal_mode") == "wal"
+        assert self._pragma(db, "synchronous") == 1  # NORMAL
+        assert self._pragma(db, "cache_size") == -256000
+
+        db.close()
+
+    def test_readonly_profile(self, temp_db_path: Path):
+        """Test du profil en lecture seule sur une base existante."""
+        DatabaseManager(temp_db_path).close()
+        db = DatabaseManager(temp_db_path, profile="readonly")
+
+        assert self._pragma(db, "query_only") == 1
+        with db.get_session() as session:
+            assert session.query(Collection).count() == 0
+            session.add(Collection(name="Interdit"))
+            with pytest.raises(Exception, match="readonly|query_only"):
+                session.commit()
+
+        db.close()
+
+    def test_profiles_are_per_engine(self, temp_db_path: Path):
+        """Test que les PRAGMA d'un moteur n'affectent pas les autres."""
+        from sqlalchemy import create_engine, text
+
+        db = DatabaseManager(temp_db_path, profile="ingest")
+        other = create_engine(f"sqlite:///{temp_db_path.parent / 'other.db'}")
+        with other.connect() as conn:
+            assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 0
+        other.dispose()
+
+        db.close()
+
+    def test_unknown_profile(self, temp_db_path: Path):
+        """Test du rejet d'un profil inconnu."""
+        with pytest.raises(ValueError, match="Unknown SQLite profile"):
+            DatabaseManager(temp_db_path, profile="turbo")
+
+    def test_init_schema_upgrades_existing_tables(self, temp_db_path: Path):
+        """Test de l'ajout des colonnes manquantes sur une base existante."""
+        import sqlite3
+
+        conn = sqlite3.connect(temp_db_path)
+        conn.execute(
+            "CREATE TABLE media_items (id VARCHAR(36) PRIMARY KEY, "
+            "checksum VARCHAR(128) NOT NULL UNIQUE, path VARCHAR(512) NOT NULL, "
+            "mime_type VARCHAR(128), size BIGINT NOT NULL, "
+            "original_filename VARCHAR(256), created_at DATETIME NOT NULL, "
+            "updated_at DATETIME NOT NULL)"
+        )
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(temp_db_path)
+
+        from sqlalchemy import inspect
+
+        inspector = inspect(db.engine)
+        columns = {c["name"] for c in inspector.get_columns("media_items")}
+        indexes = {i["name"] for i in inspector.get_indexes("media_items")}
+
+        assert "partial_checksum" in columns
+        assert "ix_media_items_size_partial" in indexes
+
+        db.close()
+
     def test_get_session_context_manager(self, temp_db_path: Path):
         """Test du context manager get_session."""
         db = DatabaseManager(temp_db_path)
@@ -339,3 +440,350 @@ class TestDatabaseIntegration:
             )
             
             assert len(results) == 3  # Images 0, 2, 4
+
+
+class TestBatchWriter:
+    """Tests pour l'écriture par lots."""
+
+    @pytest.fixture
+    def db(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_manager = DatabaseManager(Path(tmpdir) / "batch.db")
+            yield db_manager
+            db_manager.close()
+
+    def test_batch_write(self, db: DatabaseManager):
+        """Test de l'écriture de médias, liens et métadonnées."""
+        from hypermedia.drive.models import Metadata
+
+        with db.get_session() as session:
+            collection = Collection(name="Batch")
+            session.add(collection)
+            session.commit()
+            collection_id = collection.id
+
+        with db.batch_writer(batch_size=10) as writer:
+            for i in range(25):
+                media_id = writer.add_media(
+                    checksum=f"batch{i}", path=f"/b{i}.jpg", size=i
+                )
+                writer.add_link(collection_id, media_id)
+                writer.add_metadata(media_id, "file.name", f"b{i}.jpg")
+
+        assert writer.media_written == 25
+        with db.get_session() as session:
+            assert session.query(MediaItem).count() == 25
+            assert session.query(Metadata).count() == 25
+            collection = session.get(Collection, collection_id)
+            assert len(collection.media_items) == 25
+            media = session.query(MediaItem).filter_by(checksum="batch3").one()
+            assert media.created_at is not None
+            assert media.metadata[0].value == "b3.jpg"
+
+    def test_batch_flushes_per_batch_size(self, db: DatabaseManager):
+        """Test qu'un lot est écrit dès que batch_size médias sont accumulés."""
+        writer = db.batch_writer(batch_size=3)
+        for i in range(4):
+            writer.add_media(checksum=f"flush{i}", path=f"/f{i}.jpg", size=i)
+
+        with db.get_session() as session:
+            assert session.query(MediaItem).count() == 3
+
+        writer.flush()
+        with db.get_session() as session:
+            assert session.query(MediaItem).count() == 4
+
+    def test_batch_discarded_on_error(self, db: DatabaseManager):
+        """Test que le lot en cours est abandonné en cas d'exception."""
+        with pytest.raises(RuntimeError):
+            with db.batch_writer() as writer:
+                writer.add_media(checksum="lost", path="/lost.jpg", size=1)
+                raise RuntimeError("boom")
+
+        with db.get_session() as session:
+            assert session.query(MediaItem).count() == 0
+
+    def test_batch_is_atomic(self, db: DatabaseManager):
+        """Test qu'un lot invalide n'est pas écrit partiellement."""
+        from sqlalchemy.exc import IntegrityError
+
+        writer = db.batch_writer()
+        writer.add_media(checksum="same", path="/a.jpg", size=1)
+        writer.add_media(checksum="same", path="/b.jpg", size=1)
+        with pytest.raises(IntegrityError):
+            writer.flush()
+
+        with db.get_session() as session:
+            assert session.query(MediaItem).count() == 0
+
+
+class TestReadPoolAndWriter:
+    """Tests du pool de lecture et du thread d'écriture."""
+
+    @pytest.fixture
+    def db(self):
+        """Base de données temporaire."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_manager = DatabaseManager(Path(tmpdir) / "test.db")
+            yield db_manager
+            db_manager.close()
+
+    def test_read_session_is_read_only(self, db: DatabaseManager):
+        """Test qu'une session de lecture ne peut pas écrire."""
+        with db.get_read_session() as session:
+            session.add(Collection(name="Interdit"))
+            with pytest.raises(Exception, match="readonly|read-only"):
+                session.commit()
+
+    def test_write_returns_result(self, db: DatabaseManager):
+        """Test d'une écriture via le thread d'écriture."""
+
+        def create(session: Session) -> str:
+            collection = Collection(name="Écrite")
+            session.add(collection)
+            session.flush()
+            return collection.id
+
+        collection_id = db.write(create)
+
+        with db.get_read_session() as session:
+            assert session.get(Collection, collection_id).name == "Écrite"
+
+    def test_pending_writes_grouped(self, db: DatabaseManager):
+        """Test du regroupement des écritures en attente dans un COMMIT."""
+        import threading
+
+        gate = threading.Event()
+        blocker = db.submit_write(lambda session: gate.wait())
+        futures = [
+            db.submit_write(lambda session, i=i: session.add(Collection(name=f"C{i}")))
+            for i in range(10)
+        ]
+        gate.set()
+        for future in [blocker] + futures:
+            future.result()
+
+        writer = db._writer
+        assert writer.transactions == 11
+        assert writer.commits < 11
+        with db.get_read_session() as session:
+            assert session.query(Collection).count() == 10
+
+    def test_failed_write_isolated(self, db: DatabaseManager):
+        """Test qu'un échec n'annule pas les autres écritures du groupe."""
+        import threading
+
+        gate = threading.Event()
+        db.submit_write(lambda session: gate.wait())
+        ok = db.submit_write(lambda session: session.add(Collection(name="OK")))
+
+        def fail(session: Session) -> None:
+            session.add(Collection(name="KO"))
+            raise ValueError("boom")
+
+        failed = db.submit_write(fail)
+        gate.set()
+
+        ok.result()
+        with pytest.raises(ValueError, match="boom"):
+            failed.result()
+        with db.get_read_session() as session:
+            assert [c.name for c in session.query(Collection)] == ["OK"]
+
+    def test_base_exception_in_group_isolated(self, db: DatabaseManager):
+        """Test qu'une BaseException dans un groupe ne tue pas le thread d'écriture."""
+        import threading
+
+        class Abort(BaseException):
+            pass
+
+        gate = threading.Event()
+        db.submit_write(lambda session: gate.wait())
+        ok = db.submit_write(lambda session: session.add(Collection(name="OK")))
+
+        def abort(session: Session) -> None:
+            raise Abort()
+
+        aborted = db.submit_write(abort)
+        gate.set()
+
+        ok.result(timeout=5)
+        with pytest.raises(Abort):
+            aborted.result(timeout=5)
+        db.write(lambda session: session.add(Collection(name="Après")))
+        with db.get_read_session() as session:
+            names = sorted(c.name for c in session.query(Collection))
+        assert names == ["Après", "OK"]
+
+    def test_writer_survives_session_failure(
+        self, db: DatabaseManager, monkeypatch: pytest.MonkeyPatch
+    ):
+        """Test que le thread d'écriture survit à un échec hors transaction."""
+        db.write(lambda session: None)
+        session_factory = db.SessionLocal
+        monkeypatch.setattr(
+            db, "SessionLocal", Mock(side_effect=RuntimeError("no session"))
+        )
+        with pytest.raises(RuntimeError, match="no session"):
+            db.write(lambda session: None)
+
+        monkeypatch.setattr(db, "SessionLocal", session_factory)
+        db.write(lambda session: session.add(Collection(name="OK")))
+        with db.get_read_session() as session:
+            assert session.query(Collection).count() == 1
+
+    def test_write_from_writer_thread(self, db: DatabaseManager):
+        """Test du refus d'une écriture imbriquée (interblocage)."""
+        future = db.submit_write(lambda session: db.write(lambda s: None))
+
+        with pytest.raises(RuntimeError, match="writer thread"):
+            future.result()
+
+    def test_reads_during_writes(self, db: DatabaseManager):
+        """Test de lectures concurrentes pendant des écritures."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        def read(_: int) -> int:
+            with db.get_read_session() as session:
+                return session.query(Collection).count()
+
+        futures = [
+            db.submit_write(lambda session, i=i: session.add(Collection(name=f"C{i}")))
+            for i in range(200)
+        ]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            counts = list(pool.map(read, range(200)))
+        for future in futures:
+            future.result()
+
+        assert all(0 <= c <= 200 for c in counts)
+        assert read(0) == 200
+
+    def test_close_flushes_pending_writes(self, db: DatabaseManager):
+        """Test que close() valide les écritures en attente."""
+        db.submit_write(lambda session: session.add(Collection(name="Tardive")))
+        db.close()
+
+        with db.get_session() as session:
+            assert session.query(Collection).filter_by(name="Tardive").count() == 1
+
+
+class TestBinaryChecksums:
+    """Tests du stockage binaire des checksums."""
+
+    @pytest.fixture
+    def db(self):
+        """Base temporaire."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = DatabaseManager(Path(tmpdir) / "test.db")
+            yield db
+            db.close()
+
+    def test_stored_as_blob(self, db: DatabaseManager):
+        """Test du stockage en BLOB et de la relecture en hexadécimal."""
+        digest = blake2b_hex(b"contenu")
+        with db.get_session() as session:
+            session.add(MediaItem(checksum=digest, path="/a.jpg", size=1))
+            session.commit()
+
+        with db.get_read_session() as session:
+            raw = session.execute(
+                text(
+                    "SELECT typeof(checksum), length(checksum), checksum_prefix "
+                    "FROM media_items"
+                )
+            ).one()
+            media = session.query(MediaItem).one()
+
+        assert raw == ("blob", 64, checksum_prefix(digest))
+        assert media.checksum == digest
+
+    def test_non_hex_checksum_preserved(self, db: DatabaseManager):
+        """Test qu'une chaîne non hexadécimale est conservée telle quelle."""
+        with db.batch_writer() as writer:
+            writer.add_media(checksum="not-a-digest", path="/a.jpg", size=1)
+
+        with db.get_read_session() as session:
+            media = session.query(MediaItem).one()
+
+        assert media.checksum == "not-a-digest"
+        assert media.checksum_prefix == checksum_prefix("not-a-digest")
+
+    def test_prefix(self):
+        """Test du calcul du préfixe entier."""
+        assert checksum_prefix("00" * 7 + "ff" + "00" * 56) == 255
+        assert checksum_prefix("ff" * 64) == -1
+
+    def test_duplicate_rejected_by_trigger(self, db: DatabaseManager):
+        """Test de l'unicité garantie sans index UNIQUE sur le checksum."""
+        digest = blake2b_hex(b"doublon")
+        with db.batch_writer() as writer:
+            writer.add_media(checksum=digest, path="/a.jpg", size=1)
+
+        with pytest.raises(IntegrityError):
+            with db.batch_writer() as writer:
+                writer.add_media(checksum=digest, path="/b.jpg", size=1)
+
+    def test_lookup_uses_prefix_index(self, db: DatabaseManager):
+        """Test que la recherche d'un checksum utilise l'index du préfixe."""
+        stmt = select(MediaItem.id).where(checksum_condition(blake2b_hex(b"x")))
+        with db.get_read_session() as session:
+            compiled = stmt.compile(session.bind)
+            plan = (
+                session.connection()
+                .exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {compiled}",
+                    tuple(compiled.construct_params().values()),
+                )
+                .all()
+            )
+
+        assert "ix_media_items_checksum_prefix" in plan[0][-1]
+
+    def test_migrate_legacy_hex_checksums(self):
+        """Test de la conversion d'une base aux checksums hexadécimaux."""
+        digest = blake2b_hex(b"ancien")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = Path(tmpdir) / "old.db"
+            conn = sqlite3.connect(db_path)
+            conn.execute(
+                "CREATE TABLE media_items (id VARCHAR(36) NOT NULL PRIMARY KEY, "
+                "checksum VARCHAR(128) NOT NULL, partial_checksum VARCHAR(64), "
+                "path VARCHAR(512) NOT NULL, mime_type VARCHAR(128), "
+                "size BIGINT NOT NULL, original_filename VARCHAR(256), "
+                "created_at DATETIME NOT NULL, "
+                "updated_at DATETIME NOT NULL)"
+            )
+            conn.execute(
+                "CREATE UNIQUE INDEX ix_media_items_checksum ON media_items (checksum)"
+            )
+            conn.executemany(
+                "INSERT INTO media_items "
+                "(id, checksum, path, size, created_at, updated_at) "
+                "VALUES (?, ?, ?, 1, '2026-01-01 00:00:00', '2026-01-01 00:00:00')",
+                [("m1", digest, "/a.jpg"), ("m2", "legacy-id", "/b.jpg")],
+            )
+            conn.commit()
+            conn.close()
+
+            db = DatabaseManager(db_path)
+            try:
+                with db.get_read_session() as session:
+                    types = dict(
+                        session.execute(
+                            text("SELECT id, typeof(checksum) FROM media_items")
+                        ).all()
+                    )
+                    indexes = {
+                        i["name"]
+                        for i in inspect(session.bind).get_indexes("media_items")
+                    }
+                    media = session.get(MediaItem, "m1")
+
+                assert types == {"m1": "blob", "m2": "text"}
+                assert "ix_media_items_checksum" not in indexes
+                assert media.checksum == digest
+                assert media.updated_at == datetime(2026, 1, 1)
+                assert DeduplicationManager(db).find_duplicate(digest).id == "m1"
+            finally:
+                db.close()
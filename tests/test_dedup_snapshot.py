@@ -0,0 +1,204 @@
+"""Tests unitaires pour l'instantané persisté de l'index de déduplication.
+
+Ce module teste l'écriture et l'ouverture de l'instantané, le journal
+des changements postérieurs et la vérification de cohérence avec la
+marque de progression de la base.
+"""
+
+import hashlib
+import tempfile
+from pathlib import Path
+
+import pytest
+from sqlalchemy import delete, func, select
+
+from hypermedia.drive import dedup_snapshot
+from hypermedia.drive.database import DatabaseManager
+from hypermedia.drive.dedup_snapshot import (
+    DeduplicationSnapshot,
+    database_high_water_mark,
+)
+from hypermedia.drive.models import MediaChange, MediaItem
+
+
+def digest(i: int) -> str:
+    """Checksum hexadécimal de test."""
+    return hashlib.blake2b(str(i).encode()).hexdigest()
+
+
+class TestDeduplicationSnapshot:
+    """Tests pour DeduplicationSnapshot."""
+
+    @pytest.fixture
+    def setup(self):
+        """Base de 200 médias et chemin de l'instantané."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            db = DatabaseManager(tmpdir / "snapshot.db")
+            with db.batch_writer() as writer:
+                ids = {
+                    digest(i): writer.add_media(
+                        checksum=digest(i), path=f"/{i}", size=i
+                    )
+                    for i in range(200)
+                }
+                ids["non-hex"] = writer.add_media(checksum="non-hex", path="/x", size=1)
+
+            yield {"db": db, "ids": ids, "path": tmpdir / "dedup.snapshot"}
+            db.close()
+
+    def _add(self, db: DatabaseManager, checksum: str) -> str:
+        def work(session):
+            media = MediaItem(checksum=checksum, path=f"/{checksum[:8]}", size=1)
+            session.add(media)
+            session.flush()
+            return media.id
+
+        return db.write(work)
+
+    def _delete(self, db: DatabaseManager, media_id: str) -> None:
+        db.write(
+            lambda s: s.execute(
+                delete(MediaItem).where(MediaItem.id == media_id)
+            ).rowcount
+        )
+
+    def test_build_and_lookup(self, setup):
+        """Test de l'écriture puis de la consultation de l'instantané."""
+        with DeduplicationSnapshot.build(setup["db"], setup["path"]) as snapshot:
+            assert len(snapshot) == 201
+            assert all(
+                snapshot.check_duplicate(c) == m for c, m in setup["ids"].items()
+            )
+            assert snapshot.check_duplicate(digest(-1)) is None
+            assert snapshot.hwm == database_high_water_mark(setup["db"]) == 201
+
+    def test_reopen_without_database(self, setup):
+        """Test de l'ouverture d'un instantané existant."""
+        DeduplicationSnapshot.build(setup["db"], setup["path"]).close()
+
+        with DeduplicationSnapshot(setup["path"]) as snapshot:
+            assert snapshot.check_duplicate(digest(42)) == setup["ids"][digest(42)]
+            misses = [snapshot.check_duplicate(digest(i)) for i in range(1000, 2000)]
+            assert misses == [None] * 1000
+            assert snapshot.bloom_rejections > 950
+
+    def test_sync_applies_changes_and_journal(self, setup):
+        """Test de la synchronisation et de la relecture du journal."""
+        db = setup["db"]
+        DeduplicationSnapshot.build(db, setup["path"]).close()
+        new_id = self._add(db, digest(500))
+        self._delete(db, setup["ids"][digest(1)])
+
+        with DeduplicationSnapshot(setup["path"]) as snapshot:
+            assert not snapshot.is_current(db)
+            assert snapshot.sync(db) == 2
+            assert snapshot.is_current(db)
+            assert snapshot.check_duplicate(digest(500)) == new_id
+            assert snapshot.check_duplicate(digest(1)) is None
+            assert len(snapshot) == 201
+
+        # Un autre processus relit le journal sans interroger la base
+        with DeduplicationSnapshot(setup["path"]) as snapshot:
+            assert snapshot.is_current(db)
+            assert snapshot.check_duplicate(digest(500)) == new_id
+            assert snapshot.check_duplicate(digest(1)) is None
+
+    def test_truncated_journal_record_ignored(self, setup):
+        """Test qu'un enregistrement incomplet du journal est ignoré."""
+        db = setup["db"]
+        DeduplicationSnapshot.build(db, setup["path"]).close()
+        self._add(db, digest(500))
+        with DeduplicationSnapshot(setup["path"]) as snapshot:
+            snapshot.sync(db)
+        with open(snapshot.journal_path, "ab") as f:
+            f.write(b"I\x01\x02")
+
+        with DeduplicationSnapshot(setup["path"]) as snapshot:
+            assert snapshot.is_current(db)
+            assert digest(500) in snapshot
+
+    def test_pruned_changes_trigger_rebuild(self, setup):
+        """Test de la reconstruction d'un instantané aux changements purgés."""
+        db = setup["db"]
+        DeduplicationSnapshot.build(db, setup["path"]).close()
+        self._add(db, digest(500))
+        self._add(db, digest(501))
+        db.write(
+            lambda s: s.execute(
+                delete(MediaChange).where(MediaChange.seq <= 202)
+            ).rowcount
+        )
+
+        with DeduplicationSnapshot(setup["path"]) as snapshot:
+            with pytest.raises(ValueError, match="pruned"):
+                snapshot.sync(db)
+
+        with DeduplicationSnapshot.load_or_build(db, setup["path"]) as snapshot:
+            assert snapshot.is_current(db)
+            assert digest(500) in snapshot and digest(501) in snapshot
+            assert not snapshot.journal_path.exists()
+
+    def _change_count(self, db: DatabaseManager) -> int:
+        with db.get_read_session() as session:
+            return session.scalar(select(func.count()).select_from(MediaChange))
+
+    def test_build_prunes_changes(self, setup):
+        """Test de la purge du journal des changements par build()."""
+        db = setup["db"]
+        DeduplicationSnapshot.build(db, setup["path"], prune_changes=False).close()
+        assert self._change_count(db) == 201
+
+        DeduplicationSnapshot.build(db, setup["path"]).close()
+        assert self._change_count(db) == 0
+        assert database_high_water_mark(db) == 201
+
+    def test_sync_prunes_old_changes(self, setup, monkeypatch):
+        """Test de la purge des changements au-delà de la rétention par sync()."""
+        db = setup["db"]
+        monkeypatch.setattr(dedup_snapshot, "CHANGE_RETENTION", 3)
+        DeduplicationSnapshot.build(db, setup["path"]).close()
+        other = setup["path"].with_name("other.snapshot")
+        DeduplicationSnapshot.build(db, other).close()
+
+        with DeduplicationSnapshot(setup["path"]) as snapshot:
+            for i in range(6):
+                self._add(db, digest(500 + i))
+                snapshot.sync(db)
+                assert self._change_count(db) == i + 1
+            # Deux fois la rétention dépassée : seuls 3 changements restent
+            self._add(db, digest(506))
+            assert snapshot.sync(db) == 1
+            assert self._change_count(db) == 3
+
+        # Instantané trop en retard : reconstruit
+        with DeduplicationSnapshot.load_or_build(db, other) as snapshot:
+            assert snapshot.is_current(db)
+            assert digest(506) in snapshot
+
+    def test_invalid_file(self, setup):
+        """Test du rejet d'un fichier qui n'est pas un instantané."""
+        setup["path"].write_bytes(b"x" * 100)
+        with pytest.raises(ValueError):
+            DeduplicationSnapshot(setup["path"])
+
+        with DeduplicationSnapshot.load_or_build(
+            setup["db"], setup["path"]
+        ) as snapshot:
+            assert len(snapshot) == 201
+
+    def test_checksum_update_logged(self, setup):
+        """Test de la journalisation d'un changement de checksum."""
+        db = setup["db"]
+        DeduplicationSnapshot.build(db, setup["path"]).close()
+        media_id = setup["ids"][digest(3)]
+
+        def work(session):
+            session.get(MediaItem, media_id).checksum = digest(600)
+
+        db.write(work)
+
+        with DeduplicationSnapshot.load_or_build(db, setup["path"]) as snapshot:
+            assert snapshot.check_duplicate(digest(3)) is None
+            assert snapshot.check_duplicate(digest(600)) == media_id
+            assert len(snapshot) == 201
@@ -1,9 +1,18 @@
 """Tests for checksum module."""
 
-import pytest
-from pathlib import Path
 import hashlib
-from hypermedia.drive.checksum import compute_blake2b, verify_integrity
+from pathlib import Path
+
+import pytest
+
+from hypermedia.drive.checksum import (
+    BUFFER_SIZE,
+    HashMode,
+    compute_blake2b,
+    compute_blake2b_many,
+    copy_with_blake2b,
+    verify_integrity,
+)
 
 
 class TestChecksum:
@@ -23,7 +32,6 @@ class TestChecksum:
         
         return file_path, expected
 
-    @pytest.mark.skip(reason="Not implemented yet")
     def test_compute_blake2b(self, test_file):
         """Test BLAKE2b checksum computation."""
         file_path, expected_checksum = test_file
@@ -31,21 +39,110 @@ class TestChecksum:
         assert computed == expected_checksum
         assert len(computed) == 128  # BLAKE2b produces 64-byte (128 hex chars) hash
 
-    @pytest.mark.skip(reason="Not implemented yet")
     def test_compute_blake2b_nonexistent_file(self, tmp_path):
         """Test that FileNotFoundError is raised for non-existent file."""
         with pytest.raises(FileNotFoundError):
             compute_blake2b(tmp_path / "nonexistent.txt")
 
-    @pytest.mark.skip(reason="Not implemented yet")
     def test_verify_integrity_valid(self, test_file):
         """Test integrity verification with valid checksum."""
         file_path, expected_checksum = test_file
         assert verify_integrity(file_path, expected_checksum) is True
 
-    @pytest.mark.skip(reason="Not implemented yet")
     def test_verify_integrity_invalid(self, test_file):
         """Test integrity verification with invalid checksum."""
         file_path, _ = test_file
         wrong_checksum = "0" * 128
         assert verify_integrity(file_path, wrong_checksum) is False
+
+    @pytest.mark.parametrize("mode", list(HashMode))
+    @pytest.mark.parametrize("size", [0, 1, 4096, BUFFER_SIZE + 123])
+    def test_compute_blake2b_modes(self, tmp_path, mode, size):
+        """Test that every read strategy produces the same checksum."""
+        file_path = tmp_path / "data.bin"
+        content = bytes(i % 251 for i in range(size))
+        file_path.write_bytes(content)
+
+        assert (
+            compute_blake2b(file_path, mode=mode)
+            == hashlib.blake2b(content).hexdigest()
+        )
+
+    def test_compute_blake2b_drop_cache(self, test_file):
+        """Test that dropping the page cache does not alter the checksum."""
+        file_path, expected_checksum = test_file
+        assert compute_blake2b(file_path, drop_cache=True) == expected_checksum
+
+    @pytest.mark.parametrize("size", [0, 10, BUFFER_SIZE + 7])
+    def test_copy_with_blake2b(self, tmp_path, size):
+        """Test that copying while hashing yields an identical copy and checksum."""
+        src = tmp_path / "src.bin"
+        dest = tmp_path / "dest.bin"
+        content = bytes(i % 253 for i in range(size))
+        src.write_bytes(content)
+
+        checksum = copy_with_blake2b(src, dest)
+
+        assert dest.read_bytes() == content
+        assert checksum == hashlib.blake2b(content).hexdigest()
+
+
+class TestChecksumMany:
+    """Test suite for batch checksum computation."""
+
+    @pytest.fixture
+    def test_files(self, tmp_path):
+        """Create several files with distinct content."""
+        files = {}
+        for i in range(12):
+            file_path = tmp_path / f"file{i}.bin"
+            content = f"content {i}".encode() * (i + 1)
+            file_path.write_bytes(content)
+            files[file_path] = hashlib.blake2b(content).hexdigest()
+        return files
+
+    def test_compute_blake2b_many(self, test_files):
+        """Test that every file is hashed exactly once with the right checksum."""
+        results = list(compute_blake2b_many(test_files.keys(), workers=4))
+
+        assert len(results) == len(test_files)
+        assert all(r.ok for r in results)
+        assert {r.path: r.checksum for r in results} == test_files
+
+    def test_compute_blake2b_many_matches_single(self, test_files):
+        """Test that batch results match compute_blake2b."""
+        for result in compute_blake2b_many(test_files.keys(), workers=2):
+            assert result.checksum == compute_blake2b(result.path)
+
+    def test_compute_blake2b_many_mmap(self, test_files):
+        """Test batch hashing with the mmap strategy."""
+        results = compute_blake2b_many(test_files.keys(), workers=2, mode=HashMode.MMAP)
+        assert {r.path: r.checksum for r in results} == test_files
+
+    def test_compute_blake2b_many_reports_errors(self, test_files, tmp_path):
+        """Test that a missing file is reported without stopping the batch."""
+        missing = tmp_path / "missing.bin"
+        paths = list(test_files.keys()) + [missing]
+
+        results = {r.path: r for r in compute_blake2b_many(paths, workers=3)}
+
+        assert len(results) == len(paths)
+        assert not results[missing].ok
+        assert results[missing].checksum is None
+        assert isinstance(results[missing].error, FileNotFoundError)
+        assert all(results[p].ok for p in test_files)
+
+    def test_compute_blake2b_many_lazy_iterable(self, test_files):
+        """Test that a generator of paths is consumed correctly."""
+        paths = (p for p in test_files)
+        results = list(compute_blake2b_many(paths, workers=1))
+        assert len(results) == len(test_files)
+
+    def test_compute_blake2b_many_empty(self):
+        """Test with an empty batch."""
+        assert list(compute_blake2b_many([])) == []
+
+    def test_compute_blake2b_many_invalid_workers(self, test_files):
+        """Test that workers < 1 is rejected."""
+        with pytest.raises(ValueError):
+            list(compute_blake2b_many(test_files.keys(), workers=0))
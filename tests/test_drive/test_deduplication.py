@@ -12,13 +12,11 @@ class TestDeduplicationIndex:
         """Create a deduplication index."""
         return DeduplicationIndex(policy=DuplicationPolicy.REFERENCE)
 
-    @pytest.mark.skip(reason="Not implemented yet")
     def test_check_duplicate_not_found(self, index):
         """Test checking for non-existent duplicate."""
         result = index.check_duplicate("abc123")
         assert result is None
 
-    @pytest.mark.skip(reason="Not implemented yet")
     def test_register_and_check(self, index):
         """Test registering and checking duplicate."""
         checksum = "abc123"
@@ -28,7 +26,6 @@ class TestDeduplicationIndex:
         result = index.check_duplicate(checksum)
         assert result == media_id
 
-    @pytest.mark.skip(reason="Not implemented yet")
     def test_remove(self, index):
         """Test removing checksum from index."""
         checksum = "abc123"
@@ -0,0 +1,250 @@
+"""Tests unitaires pour l'index plein texte FTS5.
+
+Ce module teste la synchronisation de ``media_fts`` et
+``media_fts_trigram`` par les triggers, la recherche classée par
+pertinence, les préfixes, les sous-chaînes et la reconstruction de
+l'index sur une base existante.
+"""
+
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+
+from hypermedia.drive.collection import MediaCollection
+from hypermedia.drive.database import DatabaseManager
+from hypermedia.drive.fulltext import build_match_query
+from hypermedia.drive.models import Metadata
+
+
+class TestBuildMatchQuery:
+    """Tests pour build_match_query."""
+
+    def test_prefix_terms(self):
+        """Test de la conversion en termes préfixes."""
+        assert build_match_query("plage été") == (
+            '{filename path metadata_text} : ("plage"* AND "été"*)'
+        )
+
+    def test_operators_neutralized(self):
+        """Test que les opérateurs FTS5 de la saisie sont neutralisés."""
+        assert build_match_query('a" OR NEAR(b') == (
+            '{filename path metadata_text} : ("a"* AND "OR"* AND "NEAR"* AND "b"*)'
+        )
+
+    def test_empty_query(self):
+        """Test d'une saisie sans mot."""
+        assert build_match_query(" -- ") is None
+
+
+class TestFullTextSearch:
+    """Tests de la recherche plein texte."""
+
+    @pytest.fixture
+    def setup(self):
+        """Collection contenant quelques médias nommés."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            db = DatabaseManager(tmpdir / "test.db")
+            coll = MediaCollection(tmpdir / "storage", db, auto_extract_metadata=False)
+            coll_id = coll.create_collection("Texte")
+
+            media = {}
+            for name in ("vacances_plage.jpg", "plage_hiver.jpg", "montagne.jpg"):
+                path = tmpdir / name
+                path.write_text(f"content of {name}")
+                media[name] = coll.add_media_to_collection(coll_id, path)
+
+            yield {
+                "tmpdir": tmpdir,
+                "db": db,
+                "collection": coll,
+                "collection_id": coll_id,
+                "media": media,
+            }
+            db.close()
+
+    def test_search_text_ranked(self, setup):
+        """Test de la recherche classée."""
+        coll = setup["collection"]
+        results = coll.search_text("plage")
+
+        assert {r["filename"] for r in results} == {
+            "vacances_plage.jpg",
+            "plage_hiver.jpg",
+        }
+        assert all("rank" in r for r in results)
+        assert results == sorted(results, key=lambda r: r["rank"])
+
+    def test_search_text_prefix(self, setup):
+        """Test de la recherche par préfixe."""
+        coll = setup["collection"]
+
+        assert [r["filename"] for r in coll.search_text("mont")] == ["montagne.jpg"]
+        assert coll.search_text("mont", prefix=False) == []
+
+    def test_search_query_uses_index(self, setup):
+        """Test du filtre textuel de search()."""
+        coll = setup["collection"]
+        results = coll.search(query="vacances plage")
+
+        assert [r["filename"] for r in results] == ["vacances_plage.jpg"]
+
+    def test_search_query_matches_substrings(self, setup):
+        """Test que query cherche des sous-chaînes, comme l'ancien LIKE."""
+        coll = setup["collection"]
+
+        assert [r["filename"] for r in coll.search(query="cances")] == [
+            "vacances_plage.jpg"
+        ]
+        assert [r["filename"] for r in coll.search(query="PLAGE iver")] == [
+            "plage_hiver.jpg"
+        ]
+        assert [r["filename"] for r in coll.search(query="es_p")] == [
+            "vacances_plage.jpg"
+        ]
+        assert coll.search(query="plages") == []
+
+    def test_search_query_short_fragment(self, setup):
+        """Test d'un fragment trop court pour l'index trigram."""
+        coll = setup["collection"]
+
+        assert [r["filename"] for r in coll.search(query="nt")] == ["montagne.jpg"]
+        assert [r["filename"] for r in coll.search(query="plage e_")] == [
+            "plage_hiver.jpg"
+        ]
+
+    def test_rows_keyed_by_media_rowid(self, setup):
+        """Test que les lignes de l'index ont le rowid de leur média."""
+        with setup["db"].get_read_session() as session:
+            for fts in ("media_fts", "media_fts_trigram"):
+                mismatched = session.execute(
+                    text(
+                        f"SELECT count(*) FROM {fts} AS f "
+                        "JOIN media_items AS mi ON mi.rowid = f.rowid "
+                        "WHERE mi.id = f.media_id"
+                    )
+                ).scalar()
+                assert mismatched == 3
+
+    def test_metadata_batch_indexed_at_commit(self, setup):
+        """Test que le texte d'un média est recalculé une fois, à la validation."""
+        coll = setup["collection"]
+        media_id = setup["media"]["montagne.jpg"]
+        with setup["db"].get_session() as session:
+            for i in range(20):
+                session.add(
+                    Metadata(media_id=media_id, key=f"custom.tag{i}", value=f"mot{i}")
+                )
+            session.flush()
+            pending = session.execute(
+                text("SELECT media_id FROM media_fts_pending")
+            ).scalars()
+            assert list(pending) == [media_id]
+            session.commit()
+
+        with setup["db"].get_read_session() as session:
+            assert (
+                session.execute(text("SELECT count(*) FROM media_fts_pending")).scalar()
+                == 0
+            )
+        assert [r["id"] for r in coll.search_text("mot0 mot19")] == [media_id]
+        assert [r["id"] for r in coll.search(query="ot19")] == [media_id]
+
+    def test_previous_index_layout_replaced(self, setup):
+        """Test du remplacement d'un index sans tables trigram ni file d'attente."""
+        db_path = setup["tmpdir"] / "test.db"
+        setup["db"].close()
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP TABLE media_fts_trigram")
+        conn.execute("DROP TABLE media_fts_pending")
+        conn.commit()
+        conn.close()
+
+        db = DatabaseManager(db_path)
+        try:
+            coll = MediaCollection(
+                setup["tmpdir"] / "storage", db, auto_extract_metadata=False
+            )
+            assert len(coll.search(query="lage")) == 2
+            assert len(coll.search_text("plage")) == 2
+        finally:
+            db.close()
+
+    def test_custom_metadata_indexed(self, setup):
+        """Test de l'indexation des métadonnées personnalisées."""
+        coll = setup["collection"]
+        path = setup["tmpdir"] / "sans_nom.jpg"
+        path.write_text("untitled")
+        media_id = coll.add_media_to_collection(
+            setup["collection_id"], path, custom_metadata={"tags": "coucher soleil"}
+        )
+
+        assert [r["id"] for r in coll.search_text("soleil")] == [media_id]
+
+    def test_metadata_delete_updates_index(self, setup):
+        """Test de la mise à jour de l'index à la suppression d'une métadonnée."""
+        coll = setup["collection"]
+        media_id = setup["media"]["montagne.jpg"]
+        with setup["db"].get_session() as session:
+            session.add(
+                Metadata(media_id=media_id, key="custom.lieu", value="Chamonix")
+            )
+            session.commit()
+        assert len(coll.search_text("chamonix")) == 1
+
+        with setup["db"].get_session() as session:
+            session.query(Metadata).filter_by(key="custom.lieu").delete()
+            session.commit()
+        assert coll.search_text("chamonix") == []
+
+    def test_unindexed_metadata_ignored(self, setup):
+        """Test que les métadonnées techniques ne sont pas indexées."""
+        coll = setup["collection"]
+        with setup["db"].get_session() as session:
+            session.add(
+                Metadata(
+                    media_id=setup["media"]["montagne.jpg"],
+                    key="image.format",
+                    value="JPEG",
+                )
+            )
+            session.commit()
+
+        assert coll.search_text("jpeg") == []
+
+    def test_delete_media_removes_from_index(self, setup):
+        """Test de la suppression d'un média de l'index."""
+        coll = setup["collection"]
+        coll.delete_media(setup["media"]["montagne.jpg"])
+
+        assert coll.search_text("montagne") == []
+
+    def test_search_text_by_collection(self, setup):
+        """Test du filtre par collection."""
+        coll = setup["collection"]
+        other = coll.create_collection("Autre")
+
+        assert coll.search_text("plage", collection_id=other) == []
+        assert len(coll.search_text("plage", collection_id=setup["collection_id"])) == 2
+
+    def test_index_built_for_existing_database(self, setup):
+        """Test de la construction de l'index sur une base existante."""
+        db = setup["db"]
+        with db.engine.begin() as conn:
+            conn.execute(text("DROP TABLE media_fts"))
+
+        db.init_schema()
+
+        assert len(setup["collection"].search_text("plage")) == 2
+
+    def test_rebuild_and_reset(self, setup):
+        """Test de la reconstruction et de la réinitialisation de l'index."""
+        db = setup["db"]
+        assert db.rebuild_fulltext_index() == 3
+
+        db.reset()
+        with db.get_read_session() as session:
+            assert session.execute(text("SELECT count(*) FROM media_fts")).scalar() == 0
@@ -0,0 +1,265 @@
+"""Tests unitaires pour l'import en masse.
+
+Ce module teste le pipeline d'import de MediaCollection.import_paths :
+parcours de répertoires, déduplication, rapports d'erreurs par fichier
+et écriture par lots.
+"""
+
+import os
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from hypermedia.drive import importer
+from hypermedia.drive.collection import MediaCollection
+from hypermedia.drive.database import DatabaseManager
+from hypermedia.drive.importer import BulkImporter, ImportStatus
+from hypermedia.drive.models import MediaItem, Metadata
+from hypermedia.drive.storage import StorageMode
+
+
+class TestBulkImport:
+    """Tests pour import_paths."""
+
+    @pytest.fixture
+    def setup(self):
+        """Arborescence source, base et collection temporaires."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            source = tmpdir / "source"
+            (source / "sub").mkdir(parents=True)
+            for i in range(20):
+                folder = source / "sub" if i % 2 else source
+                (folder / f"file{i}.txt").write_text(f"content {i}")
+
+            db = DatabaseManager(tmpdir / "test.db")
+            coll = MediaCollection(tmpdir / "storage", db, auto_extract_metadata=False)
+            coll_id = coll.create_collection("Bulk")
+
+            yield {
+                "tmpdir": tmpdir,
+                "source": source,
+                "db": db,
+                "collection": coll,
+                "collection_id": coll_id,
+            }
+            db.close()
+
+    def test_import_directory(self, setup):
+        """Test de l'import récursif d'un répertoire."""
+        coll = setup["collection"]
+        results = list(
+            coll.import_paths(setup["collection_id"], [setup["source"]], batch_size=7)
+        )
+
+        assert len(results) == 20
+        assert all(r.status is ImportStatus.ADDED for r in results)
+        assert coll.get_collection(setup["collection_id"])["media_count"] == 20
+
+        info = coll.get_media_info(results[0].media_id)
+        assert (coll.storage_path / info["path"]).read_bytes() == results[
+            0
+        ].path.read_bytes()
+
+    def test_import_deduplicates_within_import(self, setup):
+        """Test des doublons à l'intérieur d'un même import."""
+        source = setup["source"]
+        (source / "copy.txt").write_text("content 3")
+        coll = setup["collection"]
+
+        results = list(coll.import_paths(setup["collection_id"], [source]))
+        by_name = {r.path.name: r for r in results}
+
+        assert by_name["copy.txt"].media_id == by_name["file3.txt"].media_id
+        with setup["db"].get_session() as session:
+            assert session.query(MediaItem).count() == 20
+        assert not any((coll.storage_path / "tmp").glob("*"))
+
+    def test_reimport_already_present(self, setup):
+        """Test qu'un ré-import ne crée aucun média."""
+        coll = setup["collection"]
+        list(coll.import_paths(setup["collection_id"], [setup["source"]]))
+        results = list(coll.import_paths(setup["collection_id"], [setup["source"]]))
+
+        assert Counter(r.status for r in results) == {ImportStatus.ALREADY_PRESENT: 20}
+
+    def test_dedup_lookups_batched(self, setup, monkeypatch):
+        """Test que les doublons en base sont recherchés par lot."""
+        coll = setup["collection"]
+        list(coll.import_paths(setup["collection_id"], [setup["source"]]))
+
+        dedup = coll.dedup_manager
+        calls = Counter()
+        find_many = dedup.find_duplicates_many
+
+        def counting_find_many(checksums, session=None, *args):
+            if session is None:
+                calls["checksums"] += len(set(checksums))
+            return find_many(checksums, session, *args)
+
+        def single_lookup(*args, **kwargs):
+            calls["single"] += 1
+            raise AssertionError("unexpected per-file lookup")
+
+        monkeypatch.setattr(dedup, "find_duplicates_many", counting_find_many)
+        monkeypatch.setattr(dedup, "find_duplicate", single_lookup)
+        other_id = coll.create_collection("Other")
+        results = list(coll.import_paths(other_id, [setup["source"]]))
+
+        assert Counter(r.status for r in results) == {ImportStatus.LINKED: 20}
+        assert calls["single"] == 0
+        assert calls["checksums"] == 20
+
+    def test_import_links_existing_media(self, setup):
+        """Test du rattachement de médias existants à une autre collection."""
+        coll = setup["collection"]
+        list(coll.import_paths(setup["collection_id"], [setup["source"]]))
+
+        other_id = coll.create_collection("Other")
+        results = list(coll.import_paths(other_id, [setup["source"]]))
+
+        assert all(r.status is ImportStatus.LINKED for r in results)
+        assert coll.get_collection(other_id)["media_count"] == 20
+
+    def test_import_reports_missing_file(self, setup):
+        """Test qu'un fichier manquant est rapporté sans interrompre l'import."""
+        coll = setup["collection"]
+        missing = setup["tmpdir"] / "missing.txt"
+
+        results = list(
+            coll.import_paths(
+                setup["collection_id"], [setup["source"] / "file0.txt", missing]
+            )
+        )
+        by_path = {r.path: r for r in results}
+
+        assert by_path[missing].status is ImportStatus.FAILED
+        assert isinstance(by_path[missing].error, FileNotFoundError)
+        assert by_path[setup["source"] / "file0.txt"].status is ImportStatus.ADDED
+
+    def test_import_reports_unreadable_directory(self, setup, monkeypatch):
+        """Test qu'un répertoire illisible est rapporté sans interrompre l'import."""
+        unreadable = setup["source"] / "sub"
+        scandir = os.scandir
+
+        def failing_scandir(path):
+            if Path(path) == unreadable:
+                raise PermissionError(13, "Permission denied", str(path))
+            return scandir(path)
+
+        monkeypatch.setattr(os, "scandir", failing_scandir)
+        results = list(
+            setup["collection"].import_paths(setup["collection_id"], [setup["source"]])
+        )
+        by_path = {r.path: r for r in results}
+
+        assert by_path[unreadable].status is ImportStatus.FAILED
+        assert isinstance(by_path[unreadable].error, PermissionError)
+        assert Counter(r.status for r in results) == {
+            ImportStatus.ADDED: 10,
+            ImportStatus.FAILED: 1,
+        }
+
+    def test_import_custom_metadata(self, setup):
+        """Test des métadonnées personnalisées appliquées à chaque média."""
+        coll = setup["collection"]
+        results = list(
+            coll.import_paths(
+                setup["collection_id"],
+                [setup["source"]],
+                custom_metadata={"shoot": "2026"},
+            )
+        )
+
+        with setup["db"].get_session() as session:
+            count = session.query(Metadata).filter_by(key="custom.shoot").count()
+        assert count == len(results)
+
+    def test_custom_metadata_only_for_new_links(self, setup):
+        """Test qu'un média déjà présent ne reçoit pas de nouvelles métadonnées."""
+        coll = setup["collection"]
+        list(
+            coll.import_paths(
+                setup["collection_id"], [setup["source"]], custom_metadata={"shoot": 1}
+            )
+        )
+        results = list(
+            coll.import_paths(
+                setup["collection_id"], [setup["source"]], custom_metadata={"shoot": 2}
+            )
+        )
+
+        assert Counter(r.status for r in results) == {ImportStatus.ALREADY_PRESENT: 20}
+        with setup["db"].get_session() as session:
+            values = Counter(
+                m.value for m in session.query(Metadata).filter_by(key="custom.shoot")
+            )
+        assert values == {"1": 20}
+
+    def test_new_files_copied_while_hashed(self, setup, monkeypatch):
+        """Test qu'un fichier sans candidat en base est haché pendant sa copie."""
+        coll = MediaCollection(
+            setup["tmpdir"] / "copied",
+            setup["db"],
+            auto_extract_metadata=False,
+            storage_mode=StorageMode.COPY,
+        )
+
+        def no_full_hash(*args, **kwargs):
+            raise AssertionError("file read twice")
+
+        monkeypatch.setattr(importer, "compute_blake2b", no_full_hash)
+        results = list(coll.import_paths(setup["collection_id"], [setup["source"]]))
+
+        assert Counter(r.status for r in results) == {ImportStatus.ADDED: 20}
+        for result in results:
+            info = coll.get_media_info(result.media_id)
+            stored = coll.storage_path / info["path"]
+            assert stored.read_bytes() == result.path.read_bytes()
+        assert not any((coll.storage_path / "tmp").glob("*"))
+
+    def test_failed_batch_removes_placed_files(self, setup, monkeypatch):
+        """Test que les fichiers placés d'un lot non écrit sont supprimés."""
+        coll = setup["collection"]
+
+        def failing_batch_writer(*args, **kwargs):
+            raise RuntimeError("disk full")
+
+        monkeypatch.setattr(setup["db"], "batch_writer", failing_batch_writer)
+        results = list(coll.import_paths(setup["collection_id"], [setup["source"]]))
+
+        assert Counter(r.status for r in results) == {ImportStatus.FAILED: 20}
+        assert not [p for p in coll.storage_path.rglob("*") if p.is_file()]
+
+    def test_import_extracts_metadata(self, setup):
+        """Test de l'extraction automatique de métadonnées."""
+        coll = MediaCollection(setup["collection"].storage_path, setup["db"])
+        results = list(
+            coll.import_paths(setup["collection_id"], [setup["source"] / "file0.txt"])
+        )
+
+        info = coll.get_media_info(results[0].media_id)
+        assert info["metadata"]["file.name"] == "file0.txt"
+
+    def test_import_unknown_collection(self, setup):
+        """Test d'import vers une collection inexistante."""
+        with pytest.raises(ValueError, match="Collection not found"):
+            setup["collection"].import_paths("nonexistent-id", [setup["source"]])
+
+    def test_import_early_stop(self, setup):
+        """Test de l'interruption de l'itération avant la fin."""
+        coll = setup["collection"]
+        results = coll.import_paths(
+            setup["collection_id"], [setup["source"]], batch_size=1
+        )
+
+        first = next(results)
+        results.close()
+        assert first.media_id is not None
+
+    def test_invalid_parameters(self, setup):
+        """Test du rejet de paramètres invalides."""
+        with pytest.raises(ValueError):
+            BulkImporter(setup["collection"], batch_size=0)
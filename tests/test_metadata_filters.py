@@ -0,0 +1,264 @@
+"""Tests unitaires pour les métadonnées typées et leurs filtres.
+
+Ce module teste le typage des valeurs (nombres, dates), les opérateurs
+de ``metadata_filters`` et la migration des bases existantes.
+"""
+
+import sqlite3
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from hypermedia.drive.collection import MediaCollection
+from hypermedia.drive.database import DatabaseManager
+from hypermedia.drive.models import Metadata, typed_value_columns
+
+
+class TestTypedValues:
+    """Tests pour typed_value_columns."""
+
+    def test_numbers(self):
+        """Test des valeurs numériques."""
+        assert typed_value_columns(1920)["value_num"] == 1920
+        assert typed_value_columns("-2.5")["value_num"] == -2.5
+        assert typed_value_columns(True)["value_num"] is None
+
+    def test_dates(self):
+        """Test des dates ISO 8601 et EXIF."""
+        expected = datetime(2026, 10, 17, 12, 0)
+        assert typed_value_columns("2026-10-17T12:00:00")["value_time"] == expected
+        assert (
+            typed_value_columns("2026-10-17T14:00:00+02:00")["value_time"] == expected
+        )
+        assert typed_value_columns("2026:10:17 12:00:00")["value_time"] == expected
+        assert typed_value_columns("2026-13-45")["value_time"] is None
+
+    def test_text(self):
+        """Test d'une valeur textuelle."""
+        assert typed_value_columns("Canon") == {"value_num": None, "value_time": None}
+
+    def test_orm_insert_sets_typed_columns(self):
+        """Test du typage des métadonnées écrites via l'ORM."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = DatabaseManager(Path(tmpdir) / "test.db")
+            coll = MediaCollection(
+                Path(tmpdir) / "storage", db, auto_extract_metadata=False
+            )
+            path = Path(tmpdir) / "a.txt"
+            path.write_text("a")
+            media_id = coll.add_media_to_collection(coll.create_collection("C"), path)
+
+            with db.get_session() as session:
+                session.add(Metadata(media_id=media_id, key="image.width", value="640"))
+                session.commit()
+                meta = session.query(Metadata).filter_by(key="image.width").one()
+                assert meta.value_num == 640
+            db.close()
+
+
+class TestMetadataFilters:
+    """Tests des opérateurs de metadata_filters."""
+
+    @pytest.fixture
+    def setup(self):
+        """Médias avec largeur, date et appareil."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            db = DatabaseManager(tmpdir / "test.db")
+            coll = MediaCollection(tmpdir / "storage", db, auto_extract_metadata=False)
+            coll_id = coll.create_collection("Filtres")
+
+            specs = {
+                "small.jpg": {
+                    "width": 640,
+                    "taken": "2025-06-01T10:00:00",
+                    "make": "Canon",
+                },
+                "hd.jpg": {
+                    "width": 1920,
+                    "taken": "2026-01-15T10:00:00",
+                    "make": "Nikon",
+                },
+                "uhd.jpg": {
+                    "width": 3840,
+                    "taken": "2026-08-01T10:00:00",
+                    "make": "Canon",
+                },
+            }
+            for name, meta in specs.items():
+                path = tmpdir / name
+                path.write_text(name)
+                coll.add_media_to_collection(coll_id, path, custom_metadata=meta)
+
+            yield coll
+            db.close()
+
+    def _names(self, coll: MediaCollection, filters) -> set:
+        return {r["filename"] for r in coll.search(metadata_filters=filters)}
+
+    def test_equality(self, setup):
+        """Test du filtre d'égalité (texte et nombre)."""
+        assert self._names(setup, {"custom.make": "Canon"}) == {"small.jpg", "uhd.jpg"}
+        assert self._names(setup, {"custom.width": "1920"}) == {"hd.jpg"}
+        assert self._names(setup, {"custom.make": "Can"}) == set()
+
+    def test_numeric_range(self, setup):
+        """Test d'une plage numérique (comparaison non lexicographique)."""
+        assert self._names(setup, {"custom.width": {"gt": 1000}}) == {
+            "hd.jpg",
+            "uhd.jpg",
+        }
+        assert self._names(setup, {"custom.width": {"gte": 640, "lt": 1920}}) == {
+            "small.jpg"
+        }
+
+    def test_date_range(self, setup):
+        """Test d'une plage de dates."""
+        filters = {"custom.taken": {"gte": "2026-01-01", "lt": datetime(2026, 6, 1)}}
+        assert self._names(setup, filters) == {"hd.jpg"}
+
+    def test_in_and_contains(self, setup):
+        """Test des opérateurs in et contains."""
+        assert self._names(setup, {"custom.make": {"in": ["Nikon", "Sony"]}}) == {
+            "hd.jpg"
+        }
+        assert self._names(setup, {"custom.make": {"contains": "ano"}}) == {
+            "small.jpg",
+            "uhd.jpg",
+        }
+
+    def test_combined_filters(self, setup):
+        """Test de plusieurs clés combinées."""
+        filters = {"custom.make": "Canon", "custom.width": {"gt": 1000}}
+        assert self._names(setup, filters) == {"uhd.jpg"}
+
+    def test_unknown_operator(self, setup):
+        """Test du rejet d'un opérateur inconnu."""
+        with pytest.raises(ValueError, match="Unknown metadata operator"):
+            setup.search(metadata_filters={"custom.width": {"bigger": 1}})
+
+
+class TestTypedMetadataMigration:
+    """Tests de la migration des bases antérieures."""
+
+    def test_backfill_existing_rows(self):
+        """Test du typage des métadonnées d'une base existante."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = Path(tmpdir) / "old.db"
+            conn = sqlite3.connect(db_path)
+            conn.execute(
+                "CREATE TABLE metadata (id INTEGER PRIMARY KEY, "
+                "media_id VARCHAR(36) NOT NULL, key VARCHAR(256) NOT NULL, "
+                "value TEXT NOT NULL, source VARCHAR(32) NOT NULL, "
+                "created_at DATETIME NOT NULL)"
+            )
+            conn.executemany(
+                "INSERT INTO metadata (media_id, key, value, source, created_at) "
+                "VALUES ('m', ?, ?, 'auto', '2026-01-01 00:00:00')",
+                [
+                    ("image.width", "1920"),
+                    ("exif.Make", "Canon"),
+                    ("file.created_at", "2026-02-03T04:05:06"),
+                ],
+            )
+            conn.commit()
+            conn.close()
+
+            db = DatabaseManager(db_path)
+            with db.get_session() as session:
+                typed = {
+                    m.key: (m.value_num, m.value_time) for m in session.query(Metadata)
+                }
+            db.close()
+
+            assert typed["image.width"] == (1920, None)
+            assert typed["exif.Make"] == (None, None)
+            assert typed["file.created_at"] == (None, datetime(2026, 2, 3, 4, 5, 6))
+
+
+class TestFilterCompiler:
+    """Tests de la compilation des filtres multiples."""
+
+    @pytest.fixture
+    def setup(self):
+        """Médias avec une clé fréquente et une clé rare."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            db = DatabaseManager(tmpdir / "test.db")
+            coll = MediaCollection(tmpdir / "storage", db, auto_extract_metadata=False)
+            coll_id = coll.create_collection("Compilation")
+
+            for i in range(12):
+                path = tmpdir / f"m{i}.jpg"
+                path.write_text(f"media {i}")
+                meta = {"width": 640 * (i % 4 + 1)}
+                if i % 6 == 0:
+                    meta["album"] = "Été"
+                coll.add_media_to_collection(coll_id, path, custom_metadata=meta)
+
+            yield {"db": db, "collection": coll}
+            db.close()
+
+    def test_key_statistics_maintained(self, setup):
+        """Test de la mise à jour des statistiques par les triggers."""
+        from hypermedia.drive.models import MetadataKeyStat
+
+        db = setup["db"]
+        with db.get_session() as session:
+            counts = {s.key: s.row_count for s in session.query(MetadataKeyStat)}
+            assert counts["custom.width"] == 12
+            assert counts["custom.album"] == 2
+
+            session.query(Metadata).filter_by(key="custom.album").delete()
+            session.commit()
+            assert session.get(MetadataKeyStat, "custom.album").row_count == 0
+
+    def test_most_selective_first(self, setup):
+        """Test de l'ordre des filtres par sélectivité estimée."""
+        info = setup["collection"].explain_search(
+            metadata_filters={"custom.width": {"gte": 1280}, "custom.album": "Été"}
+        )
+
+        assert [f["key"] for f in info["filters"]] == ["custom.album", "custom.width"]
+        assert any("ix_metadata_key_value" in line for line in info["plan"])
+        assert "EXISTS" in info["sql"]
+
+    def test_strategies_agree(self, setup):
+        """Test que les stratégies EXISTS et INTERSECT donnent le même résultat."""
+        coll = setup["collection"]
+        filters = {"custom.width": {"gte": 1280}, "custom.album": "Été"}
+
+        expected = {r["filename"] for r in coll.search(metadata_filters=filters)}
+        with setup["db"].get_read_session() as session:
+            query_obj = coll._search_query(
+                session, None, None, filters, filter_strategy="intersect"
+            )
+            intersected = {m.original_filename for m in query_obj}
+
+        assert expected == intersected == {"m6.jpg"}
+
+    def test_explain_with_bound_values(self, setup):
+        """Test du plan d'une recherche avec texte, date et liste de valeurs."""
+        info = setup["collection"].explain_search(
+            query="m6.jpg",
+            metadata_filters={
+                "custom.album": {"in": ["Été", "Hiver"]},
+                "custom.width": {"gte": 1280},
+            },
+        )
+
+        assert info["plan"]
+        assert "media_fts_trigram MATCH ?" in info["sql"]
+
+    def test_unknown_key_short_circuits(self, setup):
+        """Test qu'une clé absente rend la recherche vide."""
+        coll = setup["collection"]
+        filters = {"custom.width": 640, "custom.absent": "x"}
+
+        assert coll.search(metadata_filters=filters) == []
+        assert coll.explain_search(metadata_filters=filters)["filters"][0] == {
+            "key": "custom.absent",
+            "estimated_rows": 0,
+        }
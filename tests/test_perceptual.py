@@ -0,0 +1,243 @@
+"""Tests unitaires pour la détection de quasi-doublons d'images.
+
+Ce module teste les empreintes perceptuelles (aHash, dHash, pHash),
+la table d'index multiple, l'index des empreintes et leur intégration dans
+MediaCollection (find_similar, regroupement, calcul différé).
+"""
+
+import random
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from hypermedia.drive.collection import MediaCollection
+from hypermedia.drive.database import DatabaseManager
+from hypermedia.drive.models import PerceptualHash
+from hypermedia.drive.perceptual import (
+    PILLOW_AVAILABLE,
+    HashAlgorithm,
+    MultiIndexHashTable,
+    PerceptualIndex,
+    compute_image_hashes,
+    hamming_distance,
+)
+
+pytestmark = pytest.mark.skipif(not PILLOW_AVAILABLE, reason="Pillow not installed")
+
+
+def make_image(path: Path, variant: str, size=(640, 480), quality: int = 90) -> Path:
+    """Crée une image de test (dégradé et formes propres à la variante)."""
+    from PIL import Image, ImageDraw
+
+    width, height = size
+    image = Image.new("RGB", size)
+    draw = ImageDraw.Draw(image)
+    for x in range(width):
+        shade = int(255 * x / width)
+        draw.line([(x, 0), (x, height)], fill=(shade, 80, 255 - shade))
+    if variant == "soleil":
+        draw.ellipse(
+            [width * 0.2, height * 0.2, width * 0.6, height * 0.7], fill=(250, 250, 30)
+        )
+        draw.rectangle(
+            [width * 0.65, height * 0.1, width * 0.9, height * 0.4], fill=(10, 10, 10)
+        )
+    else:
+        for x in range(0, width, width // 8):
+            draw.rectangle([x, 0, x + width // 16, height], fill=(0, 200, 0))
+        draw.ellipse(
+            [width * 0.5, height * 0.5, width * 0.9, height * 0.9], fill=(255, 255, 255)
+        )
+    image.save(path, quality=quality)
+    return path
+
+
+class TestImageHashes:
+    """Tests des empreintes perceptuelles."""
+
+    def test_resized_copy_is_close(self, tmp_path):
+        """Test qu'une copie réduite et réencodée reste proche."""
+        original = compute_image_hashes(make_image(tmp_path / "a.png", "soleil"))
+        copy = compute_image_hashes(
+            make_image(tmp_path / "a.jpg", "soleil", size=(320, 240), quality=60)
+        )
+        other = compute_image_hashes(make_image(tmp_path / "b.png", "rayures"))
+
+        for algorithm in HashAlgorithm:
+            assert hamming_distance(original.get(algorithm), copy.get(algorithm)) <= 6
+            assert hamming_distance(original.get(algorithm), other.get(algorithm)) > 16
+
+    def test_hashes_are_64_bits(self, tmp_path):
+        """Test de la taille des empreintes."""
+        hashes = compute_image_hashes(make_image(tmp_path / "a.png", "soleil"))
+        assert all(0 <= value < 1 << 64 for value in hashes)
+
+    def test_not_an_image(self, tmp_path):
+        """Test du rejet d'un fichier qui n'est pas une image."""
+        path = tmp_path / "texte.jpg"
+        path.write_text("pas une image")
+        with pytest.raises(OSError):
+            compute_image_hashes(path)
+
+
+class TestMultiIndexHashTable:
+    """Tests pour MultiIndexHashTable."""
+
+    def test_search_matches_brute_force(self):
+        """Test de la recherche comparée à un parcours exhaustif."""
+        rng = random.Random(7)
+        values = [rng.getrandbits(64) for _ in range(2000)]
+        # Quasi-doublons : quelques bits inversés
+        values += [
+            v ^ (1 << rng.randrange(64)) ^ (1 << rng.randrange(64))
+            for v in values[:200]
+        ]
+        table = MultiIndexHashTable()
+        for i, value in enumerate(values):
+            table.add(value, i)
+
+        for query in values[:20] + [rng.getrandbits(64) for _ in range(5)]:
+            for max_distance in (0, 3, 10, 17):
+                expected = sorted(
+                    (hamming_distance(query, v), i)
+                    for i, v in enumerate(values)
+                    if hamming_distance(query, v) <= max_distance
+                )
+                assert sorted(table.search(query, max_distance)) == expected
+        assert len(table) == 2200
+
+    def test_remove(self):
+        """Test du retrait d'un élément."""
+        table = MultiIndexHashTable()
+        table.add(0b1111, "a")
+        table.add(0b1110, "b")
+        table.add(0b1111, "c")
+
+        assert table.remove(0b1111, "a") is True
+        assert table.remove(0b1111, "a") is False
+        assert table.search(0b1111, 1) == [(0, "c"), (1, "b")]
+        assert len(table) == 2
+
+    def test_invalid_chunks(self):
+        """Test du rejet d'un découpage qui ne divise pas l'empreinte."""
+        with pytest.raises(ValueError):
+            MultiIndexHashTable(bits=64, chunks=5)
+
+
+class TestPerceptualIndex:
+    """Tests pour PerceptualIndex."""
+
+    def test_find_similar_and_clusters(self):
+        """Test de la recherche et du regroupement transitif."""
+        index = PerceptualIndex()
+        index.add("a", 0)
+        index.add("b", 0b111)  # a-b : 3
+        index.add("c", 0b111111)  # b-c : 3, a-c : 6
+        index.add("d", (1 << 64) - 1)
+
+        assert index.find_similar("a", 4) == [("b", 3)]
+        assert index.clusters(max_distance=4) == [["a", "b", "c"]]
+        assert index.clusters(max_distance=4, min_size=1)[-1] == ["d"]
+
+        index.add("b", 0xFFFF_FFFF)  # réindexation
+        assert index.find_similar("a", 4) == []
+        index.remove("c")
+        assert "c" not in index and len(index) == 3
+
+    def test_removed_rows_reused(self):
+        """Test que les réindexations ne font pas grandir la table."""
+        index = PerceptualIndex()
+        for i in range(100):
+            index.add("a", i)
+            index.add("b", i << 8)
+
+        assert len(index) == 2
+        assert len(index._table._values) == 2
+        assert index.find_similar("a", 0) == []
+        assert index.search(99 << 8, 0) == [("b", 0)]
+
+
+class TestCollectionSimilarity:
+    """Tests de l'intégration dans MediaCollection."""
+
+    @pytest.fixture
+    def setup(self):
+        """Collection avec deux versions d'une photo et une autre photo."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            db = DatabaseManager(tmpdir / "test.db")
+            coll = MediaCollection(tmpdir / "storage", db)
+            coll_id = coll.create_collection("Photos")
+            sources = tmpdir / "sources"
+            sources.mkdir()
+            files = {
+                "original": make_image(sources / "original.png", "soleil"),
+                "copie": make_image(
+                    sources / "copie.jpg", "soleil", size=(320, 240), quality=60
+                ),
+                "autre": make_image(sources / "autre.png", "rayures"),
+            }
+            yield {
+                "tmpdir": tmpdir,
+                "db": db,
+                "collection": coll,
+                "collection_id": coll_id,
+                "files": files,
+            }
+            db.close()
+
+    def test_find_similar(self, setup):
+        """Test de la recherche des quasi-doublons d'une image."""
+        coll = setup["collection"]
+        ids = {
+            name: coll.add_media_to_collection(setup["collection_id"], path)
+            for name, path in setup["files"].items()
+        }
+
+        similar = coll.find_similar(ids["original"])
+        assert [s["media_id"] for s in similar] == [ids["copie"]]
+        assert similar[0]["distance"] <= 6
+        assert coll.find_similar(ids["autre"]) == []
+
+        # L'index chargé suit les ajouts et suppressions de l'instance
+        third = setup["tmpdir"] / "troisieme.jpg"
+        make_image(third, "soleil", size=(480, 360), quality=40)
+        third_id = coll.add_media_to_collection(setup["collection_id"], third)
+        assert {s["media_id"] for s in coll.find_similar(ids["original"])} == {
+            ids["copie"],
+            third_id,
+        }
+        coll.delete_media(ids["copie"])
+        assert [s["media_id"] for s in coll.find_similar(ids["original"])] == [third_id]
+        with setup["db"].get_session() as session:
+            assert session.get(PerceptualHash, ids["copie"]) is None
+
+    def test_import_and_cluster(self, setup):
+        """Test des empreintes écrites par l'import en masse et du regroupement."""
+        coll = setup["collection"]
+        results = {
+            r.path.stem: r.media_id
+            for r in coll.import_paths(setup["collection_id"], setup["files"].values())
+        }
+
+        clusters = coll.cluster_near_duplicates(algorithm=HashAlgorithm.DHASH)
+        assert clusters == [sorted([results["original"], results["copie"]])]
+
+    def test_index_perceptual_hashes(self, setup):
+        """Test du calcul différé des empreintes."""
+        coll = MediaCollection(
+            setup["tmpdir"] / "storage", setup["db"], auto_extract_metadata=False
+        )
+        ids = [
+            coll.add_media_to_collection(setup["collection_id"], path)
+            for path in setup["files"].values()
+        ]
+        text_file = setup["tmpdir"] / "notes.txt"
+        text_file.write_text("notes")
+        coll.add_media_to_collection(setup["collection_id"], text_file)
+        assert coll.find_similar(ids[0]) == []
+
+        assert coll.index_perceptual_hashes(batch_size=2) == 3
+        assert coll.index_perceptual_hashes() == 0
+        assert [s["media_id"] for s in coll.find_similar(ids[0])] == [ids[1]]
@@ -0,0 +1,197 @@
+"""Tests unitaires pour le cache mémoire des lectures.
+
+Ce module teste le cache LRU/TTL seul, puis son intégration dans
+MediaCollection : lectures servies sans requête, invalidation par les
+écritures et isolation des valeurs renvoyées.
+"""
+
+import tempfile
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+
+from hypermedia.drive.collection import MediaCollection
+from hypermedia.drive.database import DatabaseManager
+from hypermedia.drive.read_cache import ReadCache
+
+
+class FakeClock:
+    """Horloge manuelle pour tester l'expiration."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestReadCache:
+    """Tests pour ReadCache."""
+
+    def test_hit_and_miss_counters(self):
+        """Test des compteurs de lectures."""
+        cache = ReadCache(max_entries=10)
+        assert cache.get("a") is None
+        cache.put("a", 1)
+
+        assert cache.get("a") == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_lru_eviction(self):
+        """Test de l'éviction de l'entrée la moins récemment lue."""
+        cache = ReadCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.evictions == 1
+        assert len(cache) == 2
+
+    def test_ttl_expiry(self):
+        """Test de l'expiration des entrées."""
+        clock = FakeClock()
+        cache = ReadCache(ttl=10.0, clock=clock)
+        cache.put("a", 1)
+
+        clock.now = 9.0
+        assert cache.get("a") == 1
+        clock.now = 11.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_stale_load_not_cached(self):
+        """Test qu'un chargement antérieur à une invalidation est ignoré."""
+        cache = ReadCache()
+        generation = cache.generation
+        cache.invalidate(["a"])
+
+        assert cache.put("a", "ancienne valeur", generation) is False
+        assert cache.put("a", "nouvelle valeur", cache.generation) is True
+
+    def test_none_not_cached(self):
+        """Test que None n'est pas mis en cache."""
+        cache = ReadCache()
+        assert cache.put("a", None) is False
+        assert len(cache) == 0
+
+    def test_invalid_parameters(self):
+        """Test des paramètres invalides."""
+        with pytest.raises(ValueError):
+            ReadCache(max_entries=0)
+        with pytest.raises(ValueError):
+            ReadCache(ttl=0)
+
+
+class TestCollectionReadCache:
+    """Tests du cache mémoire de MediaCollection."""
+
+    @pytest.fixture
+    def setup(self):
+        """Collection contenant un média."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            db = DatabaseManager(tmpdir / "test.db")
+            coll = MediaCollection(tmpdir / "storage", db, auto_extract_metadata=False)
+            coll_id = coll.create_collection("Cache")
+            path = tmpdir / "photo.jpg"
+            path.write_text("photo")
+            media_id = coll.add_media_to_collection(coll_id, path)
+
+            statements = []
+
+            def count(conn, cursor, statement, parameters, context, executemany):
+                statements.append(statement)
+
+            event.listen(db.read_engine, "before_cursor_execute", count)
+            yield {
+                "tmpdir": tmpdir,
+                "db": db,
+                "collection": coll,
+                "collection_id": coll_id,
+                "media_id": media_id,
+                "statements": statements,
+            }
+            event.remove(db.read_engine, "before_cursor_execute", count)
+            db.close()
+
+    def test_hot_reads_skip_database(self, setup):
+        """Test que les lectures répétées ne touchent pas la base."""
+        coll = setup["collection"]
+        first = coll.get_media_info(setup["media_id"])
+        coll.get_collection(setup["collection_id"])
+        coll.list_collections()
+        queries = len(setup["statements"])
+
+        assert coll.get_media_info(setup["media_id"]) == first
+        coll.get_collection(setup["collection_id"])
+        coll.list_collections()
+        coll.get_media_info_many([setup["media_id"]])
+
+        assert len(setup["statements"]) == queries
+        assert coll.read_cache.hits == 4
+
+    def test_results_are_copies(self, setup):
+        """Test que modifier un résultat n'altère pas le cache."""
+        coll = setup["collection"]
+        coll.get_media_info(setup["media_id"])["metadata"]["custom.x"] = "modifié"
+
+        assert coll.get_media_info(setup["media_id"])["metadata"] == {}
+
+    def test_add_media_invalidates(self, setup):
+        """Test de l'invalidation par add_media_to_collection."""
+        coll = setup["collection"]
+        assert coll.get_collection(setup["collection_id"])["media_count"] == 1
+        other = coll.create_collection("Autre")
+        assert len(coll.list_collections()) == 2
+
+        path = setup["tmpdir"] / "photo.jpg"
+        coll.add_media_to_collection(other, path, custom_metadata={"lieu": "Nice"})
+
+        info = coll.get_media_info(setup["media_id"])
+        assert sorted(info["collections"]) == ["Autre", "Cache"]
+        assert info["metadata"] == {"custom.lieu": "Nice"}
+        assert {c["name"]: c["media_count"] for c in coll.list_collections()} == {
+            "Cache": 1,
+            "Autre": 1,
+        }
+
+    def test_delete_media_invalidates(self, setup):
+        """Test de l'invalidation par delete_media."""
+        coll = setup["collection"]
+        assert coll.get_media_info(setup["media_id"]) is not None
+        assert coll.get_collection(setup["collection_id"])["media_count"] == 1
+
+        coll.delete_media(setup["media_id"])
+
+        assert coll.get_media_info(setup["media_id"]) is None
+        assert coll.get_collection(setup["collection_id"])["media_count"] == 0
+
+    def test_import_invalidates(self, setup):
+        """Test de l'invalidation par l'import en masse."""
+        coll = setup["collection"]
+        assert coll.get_collection(setup["collection_id"])["media_count"] == 1
+
+        new_file = setup["tmpdir"] / "nouveau.jpg"
+        new_file.write_text("nouveau")
+        list(coll.import_paths(setup["collection_id"], [new_file]))
+
+        assert coll.get_collection(setup["collection_id"])["media_count"] == 2
+
+    def test_cache_disabled(self, setup):
+        """Test du fonctionnement sans cache."""
+        coll = MediaCollection(
+            setup["tmpdir"] / "storage",
+            setup["db"],
+            auto_extract_metadata=False,
+            read_cache_size=0,
+        )
+        assert coll.read_cache is None
+
+        coll.get_media_info(setup["media_id"])
+        queries = len(setup["statements"])
+        coll.get_media_info(setup["media_id"])
+        assert len(setup["statements"]) == queries + 1
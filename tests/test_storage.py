@@ -0,0 +1,126 @@
+"""Tests unitaires pour le placement des fichiers dans le stockage.
+
+Ce module teste les modes copie, reflink et lien physique ainsi que
+le repli automatique et la mémorisation du mode par volume.
+"""
+
+import errno
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from hypermedia.drive.collection import MediaCollection
+from hypermedia.drive.database import DatabaseManager
+from hypermedia.drive.storage import FilePlacer, StorageMode, kernel_copy
+
+
+class TestFilePlacer:
+    """Tests pour FilePlacer."""
+
+    @pytest.fixture
+    def setup(self):
+        """Fichier source et répertoire de stockage temporaires."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            src = tmpdir / "source.jpg"
+            src.write_bytes(b"image data" * 1000)
+            storage = tmpdir / "storage"
+            storage.mkdir()
+            yield {"src": src, "storage": storage}
+
+    def test_kernel_copy(self, setup):
+        """Test de la copie réalisée par le noyau."""
+        dest = setup["storage"] / "copy.jpg"
+        kernel_copy(setup["src"], dest)
+
+        assert dest.read_bytes() == setup["src"].read_bytes()
+        assert dest.stat().st_mtime_ns == setup["src"].stat().st_mtime_ns
+
+    def test_copy_mode(self, setup):
+        """Test du mode COPY."""
+        placer = FilePlacer(StorageMode.COPY)
+        dest = setup["storage"] / "copy.jpg"
+
+        assert placer.place(setup["src"], dest) is StorageMode.COPY
+        assert dest.read_bytes() == setup["src"].read_bytes()
+        assert dest.stat().st_ino != setup["src"].stat().st_ino
+
+    def test_hardlink_mode(self, setup):
+        """Test du mode HARDLINK sur le même système de fichiers."""
+        placer = FilePlacer(StorageMode.HARDLINK)
+        dest = setup["storage"] / "link.jpg"
+
+        assert placer.place(setup["src"], dest) is StorageMode.HARDLINK
+        assert dest.stat().st_ino == setup["src"].stat().st_ino
+
+    def test_hardlink_fallback(self, setup):
+        """Test du repli lorsque le lien physique échoue."""
+        placer = FilePlacer(StorageMode.HARDLINK)
+        dest = setup["storage"] / "link.jpg"
+
+        with (
+            patch(
+                "hypermedia.drive.storage.os.link",
+                side_effect=OSError(errno.EXDEV, "xdev"),
+            ),
+            patch(
+                "hypermedia.drive.storage.reflink",
+                side_effect=OSError(errno.EOPNOTSUPP, "no"),
+            ),
+        ):
+            used = placer.place(setup["src"], dest)
+
+        assert used is StorageMode.COPY
+        assert dest.read_bytes() == setup["src"].read_bytes()
+
+    def test_auto_remembers_volume_mode(self, setup):
+        """Test que le mode effectif est mémorisé par couple de volumes."""
+        placer = FilePlacer(StorageMode.AUTO)
+        assert (
+            placer.resolve_mode(setup["src"], setup["storage"]) is StorageMode.REFLINK
+        )
+
+        with patch(
+            "hypermedia.drive.storage.reflink",
+            side_effect=OSError(errno.EOPNOTSUPP, "no reflink"),
+        ) as mocked:
+            placer.place(setup["src"], setup["storage"] / "a.jpg")
+            placer.place(setup["src"], setup["storage"] / "b.jpg")
+
+        assert mocked.call_count == 1
+        assert placer.resolve_mode(setup["src"], setup["storage"]) is StorageMode.COPY
+        assert (setup["storage"] / "b.jpg").read_bytes() == setup["src"].read_bytes()
+
+    def test_no_temporary_file_left(self, setup):
+        """Test qu'aucun fichier temporaire ne subsiste."""
+        placer = FilePlacer(StorageMode.AUTO)
+        placer.place(setup["src"], setup["storage"] / "a.jpg")
+
+        assert [p.name for p in setup["storage"].iterdir()] == ["a.jpg"]
+
+
+class TestCollectionStorageMode:
+    """Tests d'intégration du mode de stockage dans MediaCollection."""
+
+    def test_add_media_hardlink(self):
+        """Test d'ajout d'un média en mode HARDLINK."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            tmpdir = Path(tmpdir)
+            src = tmpdir / "photo.jpg"
+            src.write_bytes(b"photo content")
+
+            db = DatabaseManager(tmpdir / "test.db")
+            coll = MediaCollection(
+                tmpdir / "storage",
+                db,
+                auto_extract_metadata=False,
+                storage_mode=StorageMode.HARDLINK,
+            )
+            coll_id = coll.create_collection("Hardlink")
+            media_id = coll.add_media_to_collection(coll_id, src)
+
+            stored = coll.storage_path / coll.get_media_info(media_id)["path"]
+            assert stored.stat().st_ino == src.stat().st_ino
+            db.close()